@@ -11,26 +11,49 @@ Usage:
     python analysis.py --html-content "<html>...</html>"
 """
 
+import asyncio
+import json
 import os
 import sys
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional, Union
 
 try:
     from fastapi import FastAPI, HTTPException
+    from fastapi.responses import StreamingResponse
     from pydantic import BaseModel
 except ImportError:  # FastAPI API mode is optional
     FastAPI = None  # type: ignore
     HTTPException = None  # type: ignore
+    StreamingResponse = None  # type: ignore
     BaseModel = None  # type: ignore
 
-from analysis_service import perform_analysis
-from config import get_env_bool, get_env_int
-from constants import DEFAULT_MAX_CONTEXT, DEFAULT_MAX_QUARTERS, DEFAULT_MAX_YEARS, DEFAULT_MODEL
+from analysis_service import perform_analysis_async
+from batch_service import ConcurrencyLimits, perform_batch_analysis, validate_batch_options
+from config import get_batch_config, get_env_bool, get_env_int, get_jobs_config, get_llm_pool_config
+from event_stream import EventStream
+from jobs import JobStore, JobWorkerPool
+from constants import (
+    DEFAULT_MAX_CONTEXT,
+    DEFAULT_MAX_QUARTERS,
+    DEFAULT_MAX_YEARS,
+    DEFAULT_MODEL,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_TIMEOUT,
+)
+from llm_client import close_search_cache, get_search_cache
+from llm_clients import close_llm_clients, pool_stats, warm_llm_clients
 from prompts import DEFAULT_PROMPT, list_prompts
+from screener_client import ScreenerError, close_clients
+from token_counter import warm_prompt_token_cache
+from tools import close_search_providers, provider_stats, singleflight_stats
 
 # FastAPI app placeholder for uvicorn mode
 app = None
 
+# Background job worker pool (created on API startup)
+job_pool: Optional[JobWorkerPool] = None
+
 if FastAPI and BaseModel:
     try:
         from fastapi.middleware.cors import CORSMiddleware
@@ -43,6 +66,7 @@ if FastAPI and BaseModel:
         html_content: Optional[str] = None
         company: Optional[str] = None
         cookie_header: Optional[str] = None
+        both_views: bool = False  # Fetch consolidated and standalone views and merge them
         base_url: Optional[str] = None
         model: Optional[str] = DEFAULT_MODEL
         api_key: Optional[str] = None
@@ -52,7 +76,10 @@ if FastAPI and BaseModel:
         max_quarters: int = DEFAULT_MAX_QUARTERS
         sections: Optional[Union[str, List[str]]] = None
         aggressive: bool = False
+        output_format: str = DEFAULT_OUTPUT_FORMAT  # html, markdown, tsv or compact
         max_context: int = DEFAULT_MAX_CONTEXT
+        auto_fit: Optional[bool] = None  # None means use CONTEXT_AUTO_FIT
+        bypass_cache: bool = False  # Run the analysis even if a cached result exists
         prompt_name: Optional[str] = DEFAULT_PROMPT
         enable_search: Optional[bool] = None  # None means use config default
         search_provider: Optional[str] = None  # None means use config default
@@ -60,7 +87,58 @@ if FastAPI and BaseModel:
         conversation_id: Optional[str] = None  # For multi-turn conversations
         conversation_history: Optional[List[Dict[str, str]]] = None  # Previous messages
 
-    app = FastAPI(title="Finvarta Fundamental Analysis API")
+    class BatchAnalysisRequest(BaseModel):
+        """Schema for batch requests: a list of companies plus shared options."""
+        companies: List[str]
+        cookie_header: Optional[str] = None
+        both_views: bool = False
+        base_url: Optional[str] = None
+        model: Optional[str] = DEFAULT_MODEL
+        api_key: Optional[str] = None
+        max_years: int = DEFAULT_MAX_YEARS
+        max_quarters: int = DEFAULT_MAX_QUARTERS
+        sections: Optional[Union[str, List[str]]] = None
+        aggressive: bool = False
+        output_format: str = DEFAULT_OUTPUT_FORMAT
+        max_context: int = DEFAULT_MAX_CONTEXT
+        auto_fit: Optional[bool] = None
+        bypass_cache: bool = False
+        prompt_name: Optional[str] = DEFAULT_PROMPT
+        enable_search: Optional[bool] = None
+        search_provider: Optional[str] = None
+        search_api_key: Optional[str] = None
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        """Start the background job workers for the lifetime of the API."""
+        global job_pool
+        db_path, workers, poll_seconds, lease_seconds, max_attempts = get_jobs_config()
+        job_pool = JobWorkerPool(
+            JobStore(db_path, lease_seconds=lease_seconds, max_attempts=max_attempts),
+            perform_analysis_async,
+            workers=workers,
+            poll_interval=poll_seconds,
+        )
+        await job_pool.start()
+        # Load the tokenizer and count prompt tokens off the event loop, without delaying startup
+        warmups = [asyncio.create_task(asyncio.to_thread(warm_prompt_token_cache, (DEFAULT_MODEL,)))]
+        # Open the search cache (and start its expiry sweeper) before the first request needs it
+        warmups.append(asyncio.create_task(asyncio.to_thread(get_search_cache)))
+        # Connect to the default LLM endpoint so the first analysis skips DNS/TCP/TLS
+        if get_llm_pool_config()[3]:
+            warmups.append(asyncio.create_task(warm_llm_clients(timeout=DEFAULT_TIMEOUT)))
+        try:
+            yield
+        finally:
+            for warmup in warmups:
+                warmup.cancel()
+            await job_pool.stop()
+            await close_clients()
+            await close_llm_clients()
+            await close_search_providers()
+            close_search_cache()
+
+    app = FastAPI(title="Finvarta Fundamental Analysis API", lifespan=lifespan)
 
     # Add custom CORS middleware that explicitly sets headers
     @app.middleware("http")
@@ -94,21 +172,128 @@ if FastAPI and BaseModel:
             "message": "CORS preflight successful"
         }
 
+    def _screener_http_error(exc: ScreenerError) -> "HTTPException":
+        """Map a Screener fetch failure onto an HTTP error for the client."""
+        if exc.status_code == 404:
+            return HTTPException(status_code=404, detail=str(exc))
+        if exc.status_code in (429, 503):
+            headers = {"Retry-After": str(int(exc.retry_after))} if exc.retry_after else None
+            return HTTPException(status_code=503, detail=str(exc), headers=headers)
+        return HTTPException(status_code=502, detail=str(exc))
+
     @app.post("/analyze")
-    def analyze_via_api(payload: AnalysisRequest):
-        """HTTP endpoint wrapper around perform_analysis."""
+    async def analyze_via_api(payload: AnalysisRequest):
+        """HTTP endpoint wrapper around perform_analysis_async."""
         try:
-            return perform_analysis(payload)
+            return await perform_analysis_async(payload)
         except SystemExit as exc:
             if HTTPException is None:
                 raise
             raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except ScreenerError as exc:
+            raise _screener_http_error(exc) from exc
+
+    @app.post("/analyze/stream")
+    async def analyze_stream_via_api(payload: AnalysisRequest):
+        """
+        Stream an analysis as server-sent events.
+        
+        Events: "status" (pipeline stage), "token" (LLM output text),
+        "search" (internet_search call with cache hit/miss), then a final
+        "done" (same body as /analyze) or "error".
+        """
+        stream = EventStream()
+        
+        async def run_analysis():
+            try:
+                result = await perform_analysis_async(payload, on_event=stream.emit)
+                stream.emit("done", result)
+            except (SystemExit, Exception) as exc:
+                stream.emit("error", {"detail": str(exc)})
+            finally:
+                stream.close()
+        
+        async def event_source():
+            task = asyncio.create_task(run_analysis())
+            try:
+                async for frame in stream.sse():
+                    yield frame
+            finally:
+                # Client went away: stop paying for the LLM run
+                if not task.done():
+                    task.cancel()
+        
+        return StreamingResponse(
+            event_source(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/analyze/batch")
+    async def analyze_batch_via_api(payload: BatchAnalysisRequest):
+        """
+        Analyze many companies with shared options, streaming NDJSON results.
+        
+        Each line is {"company", "status": "ok"|"error", ...} and is written as
+        soon as that company finishes, in completion order.
+        """
+        max_companies, fetch_limit, search_limit, llm_limit = get_batch_config()
+        companies = [c.strip() for c in payload.companies if c and c.strip()]
+        if not companies:
+            raise HTTPException(status_code=400, detail="No companies provided")
+        if len(companies) > max_companies:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many companies ({len(companies)}); the limit is {max_companies}",
+            )
+        options = payload.model_dump(exclude={"companies"})
+        try:
+            validate_batch_options(options)
+        except SystemExit as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        limits = ConcurrencyLimits(fetch=fetch_limit, search=search_limit, llm=llm_limit)
+
+        async def ndjson_lines():
+            async for record in perform_batch_analysis(companies, options, limits):
+                yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+    @app.post("/jobs", status_code=202)
+    def create_job(payload: AnalysisRequest):
+        """Queue an analysis and return its job id immediately."""
+        if job_pool is None:
+            raise HTTPException(status_code=503, detail="Job queue is not running")
+        job_id = job_pool.submit(payload.model_dump())
+        return {"id": job_id, "status": "queued"}
+
+    @app.get("/jobs/{job_id}")
+    def get_job(job_id: str):
+        """Report the status of a queued analysis, including its result once finished."""
+        if job_pool is None:
+            raise HTTPException(status_code=503, detail="Job queue is not running")
+        job = job_pool.store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+        return job
 
     @app.get("/health")
     def healthcheck():
         """Simple readiness probe."""
         return {"status": "ok"}
 
+    @app.get("/stats/llm-clients")
+    def get_llm_client_stats():
+        """Shared LLM clients and their connection pools."""
+        return pool_stats()
+
+    @app.get("/stats/search-cache")
+    def get_search_cache_stats():
+        """Search cache hit/miss/eviction counters, coalesced searches and provider latencies."""
+        cache = get_search_cache()
+        stats = cache.stats() if cache is not None else {"enabled": False}
+        return {**stats, "singleflight": singleflight_stats(), "providers": provider_stats()}
+
     @app.get("/prompts")
     def get_available_prompts():
         """List all available analysis prompts."""
@@ -1,16 +1,60 @@
 """Analysis service orchestration logic."""
 
+import asyncio
 import os
 import sys
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
-from constants import DEFAULT_MAX_CONTEXT, DEFAULT_MAX_QUARTERS, DEFAULT_MAX_YEARS, VALID_SECTIONS
-from config import get_search_config
-from html_extractor import extract_financial_data
-from llm_client import analyze_with_llm, estimate_tokens
+from constants import (
+    DEFAULT_MAX_CONTEXT,
+    DEFAULT_MAX_QUARTERS,
+    DEFAULT_MAX_YEARS,
+    DEFAULT_OUTPUT_FORMAT,
+    VALID_SECTIONS,
+)
+from cache import ResultCache, content_digest, result_cache_key
+from config import (
+    get_context_fit_config,
+    get_gap_detection_config,
+    get_observation_budget_config,
+    get_result_cache_config,
+    get_search_config,
+)
+from context_fitter import FitCandidate, fit_to_context, message_tokens
+from financial_tables import OUTPUT_FORMATS, merge_views
+from gap_detector import detect_gaps
+from html_extractor import extract_financial_tables
+from llm_client import agent_overhead_tokens, analyze_with_llm, analyze_with_llm_async, prefetch_searches_async
 from prompts import DEFAULT_PROMPT, get_prompt
-from screener_client import fetch_company_html
+from screener_client import (
+    fetch_company_page,
+    fetch_company_page_async,
+    fetch_company_views,
+    fetch_company_views_async,
+)
+from token_counter import prompt_token_count, tokenizer_name
+
+if TYPE_CHECKING:
+    from batch_service import ConcurrencyLimits
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide LLM result cache."""
+    global _result_cache
+    if _result_cache is None:
+        enabled, ttl_hours, max_entries, max_mb = get_result_cache_config()
+        _result_cache = ResultCache(
+            ttl_hours=ttl_hours,
+            max_entries=max_entries,
+            max_bytes=max_mb * 1024 * 1024,
+            enabled=enabled,
+        )
+    return _result_cache
 
 
 def load_html_from_file(file_path: Path) -> str:
@@ -61,82 +105,207 @@ def _print_context_reduction_tips(params, include_sections: Optional[list]) -> N
             "  5. Increase context limit: --max-context <new_limit>",
         ]
     )
+    if _output_format(params) == "html":
+        suggestions.append("  6. Use a compact data format: --output-format compact")
     for line in suggestions:
         print(line, file=sys.stderr)
 
 
-def perform_analysis(params) -> Dict[str, Any]:
+def _output_format(params) -> str:
+    """Return the requested financial data format."""
+    return getattr(params, "output_format", None) or DEFAULT_OUTPUT_FORMAT
+
+
+def validate_output_format(output_format: Optional[str]) -> str:
     """
-    Core analysis workflow used by the FastAPI entrypoint (reusable elsewhere).
+    Validate the financial data output format.
     
-    Params should expose the same attributes defined in AnalysisRequest.
-    Returns a dictionary containing analysis output and metadata.
+    Raises:
+        SystemExit: If the format is unknown
     """
-    # Determine HTML source (file, inline, or Screener fetch)
-    html_content: Optional[str] = None
-    html_source_desc: Optional[str] = None
-    cookie_header = getattr(params, "cookie_header", None) or os.getenv("SCREENER_COOKIE_HEADER")
+    output_format = output_format or DEFAULT_OUTPUT_FORMAT
+    if output_format not in OUTPUT_FORMATS:
+        message = f"Invalid output format '{output_format}'. Valid formats: {', '.join(OUTPUT_FORMATS)}"
+        print(f"Error: {message}", file=sys.stderr)
+        raise SystemExit(message)
+    return output_format
+
+
+def parse_sections(sections_arg: Optional[Union[str, List[str]]]) -> Optional[List[str]]:
+    """
+    Parse and validate the sections parameter.
+    
+    Args:
+        sections_arg: Comma-separated string or list of section ids (or None)
+        
+    Returns:
+        List of section ids, or None to include all sections
+        
+    Raises:
+        SystemExit: If the value has the wrong type or names an unknown section
+    """
+    if not sections_arg:
+        return None
+    if isinstance(sections_arg, str):
+        include_sections = [s.strip() for s in sections_arg.split(',')]
+    elif isinstance(sections_arg, (list, tuple)):
+        include_sections = [str(s).strip() for s in sections_arg]
+    else:
+        message = "sections must be a comma-separated string or list."
+        print(f"Error: --{message}", file=sys.stderr)
+        raise SystemExit(message)
+    invalid = [s for s in include_sections if s not in VALID_SECTIONS]
+    if invalid:
+        message = f"Invalid sections: {', '.join(invalid)}. Valid sections: {', '.join(VALID_SECTIONS)}"
+        print(f"Error: {message}", file=sys.stderr)
+        raise SystemExit(message)
+    return include_sections
+
+
+def _resolve_search_settings(params) -> tuple[bool, str, Optional[str]]:
+    """
+    Resolve search settings, falling back to the configured defaults.
+    
+    Returns:
+        Tuple of (enable_search, search_provider, search_api_key)
+    """
+    default_enable_search, default_provider, default_search_key = get_search_config()
+    print(f"Default search config: enable={default_enable_search}, provider={default_provider}", file=sys.stderr)
+    
+    # Handle None explicitly - if enable_search is None, use the default
+    enable_search_param = getattr(params, "enable_search", None)
+    enable_search = enable_search_param if enable_search_param is not None else default_enable_search
+    
+    search_provider_param = getattr(params, "search_provider", None)
+    search_provider = search_provider_param if search_provider_param is not None else default_provider
+    
+    search_api_key_param = getattr(params, "search_api_key", None)
+    search_api_key = search_api_key_param if search_api_key_param is not None else default_search_key
+    
+    print(f"Final search config: enable={enable_search}, provider={search_provider}, has_api_key={bool(search_api_key)}", file=sys.stderr)
+    return enable_search, search_provider, search_api_key
+
+
+def _load_local_html(params) -> tuple[Optional[str], Optional[str]]:
+    """
+    Load HTML supplied directly via html_file or html_content.
     
+    Returns:
+        Tuple of (html_content, html_source_desc); both None when the HTML
+        must be fetched from Screener for params.company.
+    """
     html_file_param = getattr(params, "html_file", None)
     if html_file_param:
         html_path = html_file_param if isinstance(html_file_param, Path) else Path(html_file_param)
-        html_content = load_html_from_file(html_path)
-        html_source_desc = f"file: {html_path}"
-    elif getattr(params, "html_content", None):
-        html_content = params.html_content
-        html_source_desc = "inline --html-content"
-    elif getattr(params, "company", None):
-        if not cookie_header:
-            print(
-                "⚠️  No Screener cookies provided; attempting anonymous fetch (may fail for some users).",
-                file=sys.stderr
-            )
-        html_content = fetch_company_html(params.company, cookie_header=cookie_header)
-        html_source_desc = f"screener company {params.company.strip().upper()}"
-    else:
-        print("Error: Provide HTML input via html_file, html_content, or company parameter.", file=sys.stderr)
-        raise SystemExit(1)
+        return load_html_from_file(html_path), f"file: {html_path}"
+    if getattr(params, "html_content", None):
+        return params.html_content, "inline --html-content"
+    if getattr(params, "company", None):
+        return None, None
+    message = "Provide HTML input via html_file, html_content, or company parameter."
+    print(f"Error: {message}", file=sys.stderr)
+    raise SystemExit(message)
+
+
+def _resolve_cookie_header(params) -> Optional[str]:
+    """Return the Screener cookie header, warning when none is configured."""
+    cookie_header = getattr(params, "cookie_header", None) or os.getenv("SCREENER_COOKIE_HEADER")
+    if not cookie_header:
+        print(
+            "⚠️  No Screener cookies provided; attempting anonymous fetch (may fail for some users).",
+            file=sys.stderr
+        )
+    return cookie_header
+
+
+def _merge_view_pages(
+    pages: Dict[str, Tuple[str, Dict[str, Any]]]
+) -> Tuple[Union[str, Dict[str, str]], Dict[str, Any]]:
+    """
+    Split fetch_company_views output into page HTML and screener_cache metadata.
+    
+    A single remaining view is handled like a plain fetch.
+    """
+    if len(pages) == 1:
+        return next(iter(pages.values()))
+    return (
+        {view: html for view, (html, _) in pages.items()},
+        {"views": {view: metadata for view, (_, metadata) in pages.items()}},
+    )
+
+
+def _screener_source_desc(company: str, html_content: Union[str, Dict[str, str]]) -> str:
+    desc = f"screener company {company.strip().upper()}"
+    if isinstance(html_content, dict):
+        desc += f" ({' + '.join(html_content)} views)"
+    return desc
+
+
+def _prepare_analysis(
+    params,
+    html_content: Union[str, Dict[str, str]],
+    html_source_desc: str,
+    screener_cache: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Extract financial data, check token budgets and resolve LLM/search settings.
     
+    Shared by perform_analysis and perform_analysis_async. This step is CPU-bound
+    (HTML parsing) and never performs network I/O.
+    
+    Args:
+        params: Object exposing the AnalysisRequest attributes
+        html_content: Raw page HTML, or view -> HTML when several Screener
+                      views were fetched (their tables are merged, labelled
+                      with the view)
+        html_source_desc: Human-readable description of the HTML source
+        screener_cache: Screener cache metadata when the HTML was fetched
+                        (per view under "views" for several views)
+    
+    Returns:
+        Dictionary with either a "response" key (preview mode, returned as-is)
+        or "llm_kwargs", "include_sections" and "context_fit" for the LLM call.
+        
+    Raises:
+        SystemExit: If the request cannot be made to fit max_context
+    """
     print(f"HTML source: {html_source_desc}", file=sys.stderr)
     
     # Parse sections if provided
-    include_sections = None
-    sections_arg = getattr(params, "sections", None)
-    if sections_arg:
-        if isinstance(sections_arg, str):
-            include_sections = [s.strip() for s in sections_arg.split(',')]
-        elif isinstance(sections_arg, (list, tuple)):
-            include_sections = [str(s).strip() for s in sections_arg]
-        else:
-            print("Error: --sections must be a comma-separated string or list.", file=sys.stderr)
-            raise SystemExit(1)
-        invalid = [s for s in include_sections if s not in VALID_SECTIONS]
-        if invalid:
-            print(f"Error: Invalid sections: {', '.join(invalid)}", file=sys.stderr)
-            print(f"Valid sections: {', '.join(VALID_SECTIONS)}", file=sys.stderr)
-            raise SystemExit(1)
-    
-    # Extract company name from HTML or params
-    company_name = None
+    include_sections = parse_sections(getattr(params, "sections", None))
+    output_format = validate_output_format(_output_format(params))
+    
+    # Extract financial data (the page is parsed once; its <h1> gives the company name)
+    print("Extracting financial data from HTML...", file=sys.stderr)
+    max_years = getattr(params, "max_years", DEFAULT_MAX_YEARS)
+    max_quarters = getattr(params, "max_quarters", DEFAULT_MAX_QUARTERS)
+    aggressive = getattr(params, "aggressive", False)
+    view_pages = html_content if isinstance(html_content, dict) else {None: html_content}
+    view_cache = screener_cache.get("views", {}) if screener_cache else {}
+    tables = merge_views({
+        view: extract_financial_tables(
+            page,
+            max_years=max_years,
+            max_quarters=max_quarters,
+            include_sections=include_sections,
+            aggressive=aggressive,
+            content_hash=(view_cache.get(view) or screener_cache or {}).get("sha256")
+        )
+        for view, page in view_pages.items()
+    })
+    html_size = sum(len(page) for page in view_pages.values())
+    
+    # Company name from params, falling back to the page heading
+    company_name = tables.company_name
     if getattr(params, "company", None):
         company_name = params.company.strip().upper()
-    else:
-        # Try to extract from HTML
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
-        h1 = soup.find('h1')
-        if h1:
-            company_name = h1.get_text(strip=True)
-    
-    # Extract financial data
-    print("Extracting financial data from HTML...", file=sys.stderr)
-    financial_data = extract_financial_data(
-        html_content,
-        max_years=getattr(params, "max_years", DEFAULT_MAX_YEARS),
-        max_quarters=getattr(params, "max_quarters", DEFAULT_MAX_QUARTERS),
-        include_sections=include_sections,
-        aggressive=getattr(params, "aggressive", False)
-    )
+    
+    # Search settings decide whether room is kept for tool output and whether gaps are searched for
+    enable_search, search_provider, search_api_key = _resolve_search_settings(params)
+    search_gaps = None
+    if enable_search and get_gap_detection_config()[0]:
+        search_gaps = detect_gaps(tables, include_sections)
+        print(f"Data gaps: {', '.join(gap.name for gap in search_gaps) or 'none'}", file=sys.stderr)
     
     # Get prompt based on prompt_name
     prompt_name = getattr(params, "prompt_name", DEFAULT_PROMPT)
@@ -144,15 +313,53 @@ def perform_analysis(params) -> Dict[str, Any]:
         prompt = get_prompt(prompt_name)
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
-        raise SystemExit(1)
+        raise SystemExit(str(e))
     
-    # Estimate token count (conservative for HTML content)
-    system_tokens = estimate_tokens(prompt, conservative=False)
-    data_tokens = estimate_tokens(financial_data, conservative=True)
-    total_tokens = system_tokens + data_tokens
+    # Count tokens with the model's tokenizer (prompt counts are memoized)
+    model = getattr(params, "model", "gpt-4o-mini")
+    token_method = tokenizer_name(model)
+    system_tokens = prompt_token_count(prompt_name, model)
     
-    # Warn if user-set context may exceed server limits
+    conversation_history = getattr(params, "conversation_history", None)
+    
+    # Reserve room for everything else, then fit the financial data into the rest
     max_context = getattr(params, "max_context", DEFAULT_MAX_CONTEXT)
+    default_auto_fit, tool_reserve = get_context_fit_config()
+    auto_fit_param = getattr(params, "auto_fit", None)
+    auto_fit = auto_fit_param if auto_fit_param is not None else default_auto_fit
+    # With search, the agent adds its instructions and tool schema, and search results
+    # (prefetched and agent calls alike) need at least tool_reserve tokens
+    search_budget = get_observation_budget_config()[1]
+    search_reserve = max(1, min(tool_reserve, search_budget or tool_reserve)) if enable_search else 0
+    reserved = {
+        "system": system_tokens,
+        "history": message_tokens(conversation_history, model),
+        "agent": agent_overhead_tokens(company_name, model) if enable_search else 0,
+        "search_results": search_reserve,
+    }
+    requested = FitCandidate(
+        max_years=max_years,
+        max_quarters=max_quarters,
+        sections=tuple(dict.fromkeys(section.section_id for section in tables.sections)),
+        aggressive=aggressive,
+    )
+    fit = fit_to_context(
+        tables, requested, output_format, max_context - sum(reserved.values()), model, auto_fit
+    )
+    financial_data = fit.financial_data
+    data_tokens = fit.data_tokens
+    observation_tokens = None
+    if enable_search:
+        # Search results get what the rest of the request left of max_context, at least the
+        # reserve and at most the observation budget (0 = none); the analysis runs with
+        # exactly this budget, so they cannot overflow the context
+        context_left_for_search = max_context - (sum(reserved.values()) - search_reserve) - data_tokens
+        observation_tokens = max(search_reserve, min(context_left_for_search, search_budget or max_context))
+        reserved["search_results"] = observation_tokens
+    context_tokens = sum(reserved.values()) + data_tokens
+    context_fit = fit.as_metadata(reserved)
+    
+    # Warn if user-set context may exceed server limits
     if max_context > 4096:
         print(
             f"⚠️  Note: --max-context {max_context} specified, but many LLM servers cap at 4096 tokens.",
@@ -163,32 +370,50 @@ def perform_analysis(params) -> Dict[str, Any]:
     
     # Show HTML size statistics if requested
     if getattr(params, "show_stats", False):
-        reduction_pct = ((len(html_content) - len(financial_data)) / len(html_content) * 100) if html_content else 0
+        reduction_pct = ((html_size - len(financial_data)) / html_size * 100) if html_size else 0
         print(f"\nHTML Size Statistics:", file=sys.stderr)
-        print(f"  Original: {len(html_content):,} characters", file=sys.stderr)
+        print(f"  Original: {html_size:,} characters", file=sys.stderr)
         print(f"  Cleaned:  {len(financial_data):,} characters", file=sys.stderr)
         print(f"  Reduction: {reduction_pct:.1f}%", file=sys.stderr)
         print(file=sys.stderr)
     
     # Always show token estimates (critical for context management)
-    print(f"Token Estimates:", file=sys.stderr)
+    print(f"Token Estimates ({token_method}):", file=sys.stderr)
     print(f"  System prompt: ~{system_tokens:,} tokens", file=sys.stderr)
-    print(f"  Financial data: ~{data_tokens:,} tokens", file=sys.stderr)
-    print(f"  Total: ~{total_tokens:,} tokens", file=sys.stderr)
+    if reserved["history"]:
+        print(f"  Conversation history: ~{reserved['history']:,} tokens", file=sys.stderr)
+    if enable_search:
+        print(f"  Agent instructions and tool schema: ~{reserved['agent']:,} tokens", file=sys.stderr)
+        print(f"  Reserved for search results: {reserved['search_results']:,} tokens", file=sys.stderr)
+    print(f"  Financial data: ~{data_tokens:,} tokens ({output_format})", file=sys.stderr)
+    print(f"  Total: ~{context_tokens:,} tokens", file=sys.stderr)
     print(f"  Context limit: {max_context:,} tokens", file=sys.stderr)
     
-    # Pre-flight validation
-    if total_tokens > max_context:
-        print(
-            f"\n⚠️  WARNING: Estimated tokens ({total_tokens:,}) exceed context limit ({max_context:,})",
-            file=sys.stderr
+    # Pre-flight validation: never send a request that is known not to fit
+    if not fit.fits:
+        smallest = "requested payload" if not auto_fit else "smallest payload"
+        message = (
+            f"Request does not fit the context limit: the {smallest} needs ~{context_tokens:,} tokens "
+            f"and max_context is {max_context:,}"
         )
+        print(f"\n❌ ERROR: {message}", file=sys.stderr)
         print(f"\nSuggestions to reduce size:", file=sys.stderr)
         _print_context_reduction_tips(params, include_sections)
-        print(f"\nProceeding anyway... (may fail)\n", file=sys.stderr)
-    elif total_tokens > max_context * 0.9:
+        if not getattr(params, "preview", False):
+            raise SystemExit(message)
+        print(file=sys.stderr)
+    elif fit.applied:
         print(
-            f"\n⚠️  WARNING: Approaching context limit ({total_tokens:,} / {max_context:,} tokens)",
+            f"\n✂️  Auto-fit: financial data reduced from ~{fit.requested_tokens:,} to ~{data_tokens:,} tokens "
+            f"(years={context_fit['max_years']}, quarters={context_fit['max_quarters']}, "
+            f"aggressive={context_fit['aggressive']}, sections={','.join(context_fit['sections'])}; "
+            f"{context_fit['candidates_evaluated']} candidates checked)",
+            file=sys.stderr
+        )
+        print(file=sys.stderr)
+    elif context_tokens > max_context * 0.9:
+        print(
+            f"\n⚠️  WARNING: Approaching context limit ({context_tokens:,} / {max_context:,} tokens)",
             file=sys.stderr
         )
         print(file=sys.stderr)
@@ -199,83 +424,271 @@ def perform_analysis(params) -> Dict[str, Any]:
     # Preview mode
     if getattr(params, "preview", False):
         print("=" * 80)
-        print("Preview of cleaned HTML (first 2000 characters):")
+        print(f"Preview of cleaned financial data ({output_format}, first 2000 characters):")
         print("=" * 80)
         print(financial_data[:2000])
         if len(financial_data) > 2000:
             print(f"\n... (truncated, total length: {len(financial_data):,} characters)")
-        return {
+        response = {
             "preview": financial_data[:2000],
             "html_source": html_source_desc,
             "token_estimates": {
                 "system": system_tokens,
                 "financial": data_tokens,
-                "total": total_tokens,
+                "total": context_tokens,
                 "context_limit": max_context,
-            }
+                "output_format": output_format,
+                "method": token_method,
+            },
+            "context_fit": context_fit,
         }
+        if screener_cache:
+            response["screener_cache"] = screener_cache
+        return {"response": response}
     
     api_key = resolve_api_key(getattr(params, "api_key", None))
     
-    # Get search configuration
-    default_enable_search, default_provider, default_search_key = get_search_config()
-    print(f"Default search config: enable={default_enable_search}, provider={default_provider}", file=sys.stderr)
+    print("Sending to LLM for analysis...", file=sys.stderr)
+    print(f"Search configuration: enable_search={enable_search}, provider={search_provider}", file=sys.stderr)
+    if enable_search:
+        print(f"Agentic mode enabled with {search_provider} search", file=sys.stderr)
+    else:
+        print("Agentic mode DISABLED - search will not be used", file=sys.stderr)
     
-    # Handle None explicitly - if enable_search is None, use the default
-    enable_search_param = getattr(params, "enable_search", None)
-    enable_search = enable_search_param if enable_search_param is not None else default_enable_search
+    return {
+        "include_sections": include_sections,
+        "context_fit": context_fit,
+        "token_estimates": {
+            "system": system_tokens,
+            "financial": data_tokens,
+            "total": context_tokens,
+            "context_limit": max_context,
+            "output_format": output_format,
+            "method": token_method,
+        },
+        "llm_kwargs": {
+            "financial_data": financial_data,
+            "prompt": prompt,
+            "base_url": getattr(params, "base_url", None),
+            "model": getattr(params, "model", "gpt-4o-mini"),
+            "api_key": api_key,
+            "enable_search": enable_search,
+            "search_provider": search_provider,
+            "search_api_key": search_api_key,
+            "conversation_history": conversation_history,
+            "company_name": company_name,
+            "search_gaps": search_gaps,
+            "observation_tokens": observation_tokens,
+        },
+    }
+
+
+def _report_llm_error(params, include_sections: Optional[list], error: Exception) -> None:
+    """Print troubleshooting hints for a failed LLM call."""
+    error_str = str(error)
+    print(f"Error during LLM analysis: {error}", file=sys.stderr)
     
-    search_provider_param = getattr(params, "search_provider", None)
-    search_provider = search_provider_param if search_provider_param is not None else default_provider
+    # Check for context size errors
+    if 'context' in error_str.lower() or 'exceed' in error_str.lower() or '400' in error_str:
+        print(f"\n❌ Context size error detected!", file=sys.stderr)
+        print(f"\nThe data is too large for the LLM's context window.", file=sys.stderr)
+        print(f"\nTry these options to reduce size:", file=sys.stderr)
+        _print_context_reduction_tips(params, include_sections)
+    else:
+        print("\nCheck your OpenAI credentials and network connectivity.", file=sys.stderr)
+        print("  - Verify that the API key is valid and has access to the selected model.", file=sys.stderr)
+        if not getattr(params, "base_url", None):
+            print("  - If you are using the public OpenAI API, check https://status.openai.com/", file=sys.stderr)
+        else:
+            print(f"  - Custom endpoint: {getattr(params, 'base_url')}", file=sys.stderr)
+
+
+def _lookup_result_cache(params, prepared: Dict[str, Any]) -> tuple[Optional[str], Optional[Dict[str, Any]], str]:
+    """
+    Check the result cache before calling the LLM.
     
-    search_api_key_param = getattr(params, "search_api_key", None)
-    search_api_key = search_api_key_param if search_api_key_param is not None else default_search_key
+    The key covers everything that shapes the answer: prompt (name and
+    text), model, endpoint, the exact financial data sent, the company and
+    the search settings.
     
-    print(f"Final search config: enable={enable_search}, provider={search_provider}, has_api_key={bool(search_api_key)}", file=sys.stderr)
+    Returns:
+        Tuple of (key, cached response or None, status). status is "hit",
+        "miss", "bypass" (bypass_cache set), "disabled" or "skipped"
+        (conversation follow-ups are never cached); key is None when the
+        result must not be stored.
+    """
+    cache = get_result_cache()
+    if not cache.enabled:
+        return None, None, "disabled"
+    llm_kwargs = prepared["llm_kwargs"]
+    if llm_kwargs.get("conversation_history"):
+        return None, None, "skipped"
     
-    # Get conversation history if provided
-    conversation_history = getattr(params, "conversation_history", None)
+    enable_search = bool(llm_kwargs["enable_search"])
+    key = result_cache_key(
+        prompt_name=getattr(params, "prompt_name", DEFAULT_PROMPT),
+        prompt_sha256=content_digest(llm_kwargs["prompt"]),
+        model=llm_kwargs["model"],
+        base_url=llm_kwargs["base_url"],
+        data_sha256=content_digest(llm_kwargs["financial_data"]),
+        company=llm_kwargs["company_name"],
+        enable_search=enable_search,
+        search_provider=llm_kwargs["search_provider"] if enable_search else None,
+        search_has_api_key=bool(llm_kwargs["search_api_key"]) if enable_search else None,
+        observation_tokens=llm_kwargs["observation_tokens"],
+    )
+    if getattr(params, "bypass_cache", False):
+        return key, None, "bypass"
+    
+    cached = cache.get(key)
+    if cached is None:
+        return key, None, "miss"
+    analysis, metadata, created_at = cached
+    age_seconds = time.time() - created_at
+    print(f"✓ Analysis cache HIT ({age_seconds / 60:.0f} minutes old)", file=sys.stderr)
+    metadata["cache_age_seconds"] = round(age_seconds)
+    return key, {"analysis": analysis, "metadata": metadata}, "hit"
+
+
+def _finish_result(
+    prepared: Dict[str, Any],
+    analysis: str,
+    metadata: Dict[str, Any],
+    cache_key: Optional[str],
+    cache_status: str,
+    screener_cache: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Store a fresh result in the result cache and attach per-request metadata.
+    
+    A fallback answer (the agent failed, no tools were used) is not cached,
+    so the next identical request tries the agent again.
+    """
+    if cache_key is not None and cache_status != "hit" and not metadata.get("fallback"):
+        get_result_cache().put(cache_key, analysis, metadata)
+    metadata["cache"] = cache_status
+    metadata["context_fit"] = prepared["context_fit"]
+    if screener_cache:
+        metadata["screener_cache"] = screener_cache
+    return {
+        "analysis": analysis,
+        "metadata": metadata
+    }
+
+
+def perform_analysis(params) -> Dict[str, Any]:
+    """
+    Core analysis workflow used by the CLI and other synchronous callers.
+    
+    Params should expose the same attributes defined in AnalysisRequest.
+    Returns a dictionary containing analysis output and metadata.
+    """
+    # Determine HTML source (file, inline, or Screener fetch)
+    screener_cache = None
+    html_content, html_source_desc = _load_local_html(params)
+    if html_content is None:
+        cookie_header = _resolve_cookie_header(params)
+        if getattr(params, "both_views", False):
+            html_content, screener_cache = _merge_view_pages(
+                fetch_company_views(params.company, cookie_header=cookie_header)
+            )
+        else:
+            html_content, screener_cache = fetch_company_page(params.company, cookie_header=cookie_header)
+        html_source_desc = _screener_source_desc(params.company, html_content)
+    
+    prepared = _prepare_analysis(params, html_content, html_source_desc, screener_cache)
+    if "response" in prepared:
+        return prepared["response"]
+    
+    cache_key, cached, cache_status = _lookup_result_cache(params, prepared)
+    if cached is not None:
+        return _finish_result(prepared, cached["analysis"], cached["metadata"], cache_key, cache_status, screener_cache)
     
     # Run analysis
-    print("Sending to LLM for analysis...", file=sys.stderr)
-    print(f"Search configuration: enable_search={enable_search}, provider={search_provider}", file=sys.stderr)
-    if enable_search:
-        print(f"Agentic mode enabled with {search_provider} search", file=sys.stderr)
-    else:
-        print("Agentic mode DISABLED - search will not be used", file=sys.stderr)
     try:
-        analysis, metadata = analyze_with_llm(
-            financial_data,
-            prompt=prompt,
-            base_url=getattr(params, "base_url", None),
-            model=getattr(params, "model", "gpt-4o-mini"),
-            api_key=api_key,
-            enable_search=enable_search,
-            search_provider=search_provider,
-            search_api_key=search_api_key,
-            conversation_history=conversation_history,
-            company_name=company_name
-        )
-        return {
-            "analysis": analysis,
-            "metadata": metadata
-        }
+        analysis, metadata = analyze_with_llm(**prepared["llm_kwargs"])
+        return _finish_result(prepared, analysis, metadata, cache_key, cache_status, screener_cache)
     except Exception as e:
-        error_str = str(e)
-        print(f"Error during LLM analysis: {e}", file=sys.stderr)
-        
-        # Check for context size errors
-        if 'context' in error_str.lower() or 'exceed' in error_str.lower() or '400' in error_str:
-            print(f"\n❌ Context size error detected!", file=sys.stderr)
-            print(f"\nThe data is too large for the LLM's context window.", file=sys.stderr)
-            print(f"\nTry these options to reduce size:", file=sys.stderr)
-            _print_context_reduction_tips(params, include_sections)
-        else:
-            print("\nCheck your OpenAI credentials and network connectivity.", file=sys.stderr)
-            print("  - Verify that the API key is valid and has access to the selected model.", file=sys.stderr)
-            if not getattr(params, "base_url", None):
-                print("  - If you are using the public OpenAI API, check https://status.openai.com/", file=sys.stderr)
-            else:
-                print(f"  - Custom endpoint: {getattr(params, 'base_url')}", file=sys.stderr)
+        _report_llm_error(params, prepared["include_sections"], e)
         raise
 
+
+async def perform_analysis_async(
+    params,
+    on_event: Optional[Callable[[str, dict], None]] = None,
+    limits: Optional["ConcurrencyLimits"] = None
+) -> Dict[str, Any]:
+    """
+    Async analysis workflow used by the FastAPI entrypoints.
+    
+    Same contract as perform_analysis. Network I/O (Screener, LLM, search) is
+    awaited and HTML extraction runs in a worker thread, so the event loop can
+    hold many in-flight analyses at once.
+    
+    Args:
+        params: Object exposing the AnalysisRequest attributes
+        on_event: Optional callback receiving (event, data) progress events;
+                  enables token streaming from the LLM
+        limits: Optional shared concurrency limits for the Screener fetch,
+                search and LLM stages (used by batch analysis)
+    """
+    def emit(event: str, data: dict) -> None:
+        if on_event:
+            on_event(event, data)
+    
+    screener_cache = None
+    html_content, html_source_desc = _load_local_html(params)
+    if html_content is None:
+        cookie_header = _resolve_cookie_header(params)
+        emit("status", {"stage": "fetch", "message": f"Fetching Screener page for {params.company.strip().upper()}"})
+        async with limits.fetch if limits else nullcontext():
+            if getattr(params, "both_views", False):
+                html_content, screener_cache = _merge_view_pages(
+                    await fetch_company_views_async(params.company, cookie_header=cookie_header)
+                )
+            else:
+                html_content, screener_cache = await fetch_company_page_async(params.company, cookie_header=cookie_header)
+        html_source_desc = _screener_source_desc(params.company, html_content)
+    
+    emit("status", {"stage": "extract", "message": "Extracting financial data"})
+    prepared = await asyncio.to_thread(_prepare_analysis, params, html_content, html_source_desc, screener_cache)
+    if "response" in prepared:
+        return prepared["response"]
+    
+    cache_key, cached, cache_status = _lookup_result_cache(params, prepared)
+    if cached is not None:
+        emit("status", {"stage": "cache", "message": "Serving cached analysis"})
+        return _finish_result(prepared, cached["analysis"], cached["metadata"], cache_key, cache_status, screener_cache)
+    
+    # Searches for data gaps only start on a cache miss, and before an LLM slot is taken
+    llm_kwargs = prepared["llm_kwargs"]
+    prefetched = None
+    if llm_kwargs["search_gaps"]:
+        emit("status", {"stage": "search", "message": "Searching for data missing from the page"})
+        prefetched = await prefetch_searches_async(
+            llm_kwargs["search_gaps"],
+            llm_kwargs["company_name"],
+            llm_kwargs["search_provider"],
+            llm_kwargs["search_api_key"],
+            on_event=on_event,
+            search_semaphore=limits.search if limits else None
+        )
+    
+    emit("status", {
+        "stage": "llm",
+        "message": "Running analysis",
+        "token_estimates": prepared["token_estimates"],
+        "context_fit": prepared["context_fit"],
+    })
+    try:
+        async with limits.llm if limits else nullcontext():
+            analysis, metadata = await analyze_with_llm_async(
+                **llm_kwargs,
+                on_event=on_event,
+                search_semaphore=limits.search if limits else None,
+                prefetched_searches=prefetched
+            )
+        return _finish_result(prepared, analysis, metadata, cache_key, cache_status, screener_cache)
+    except Exception as e:
+        _report_llm_error(params, prepared["include_sections"], e)
+        raise
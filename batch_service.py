@@ -0,0 +1,85 @@
+"""Batch analysis of many companies with bounded per-stage concurrency."""
+
+import asyncio
+import sys
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List
+
+from analysis_service import parse_sections, perform_analysis_async, validate_output_format
+from prompts import DEFAULT_PROMPT, get_prompt
+
+
+class ConcurrencyLimits:
+    """Semaphores shared by every analysis in a batch, one per pipeline stage."""
+    
+    def __init__(self, fetch: int, search: int, llm: int):
+        """
+        Args:
+            fetch: Maximum concurrent Screener fetches
+            search: Maximum concurrent internet search provider calls
+            llm: Maximum concurrent LLM analyses
+        """
+        self.fetch = asyncio.Semaphore(max(1, fetch))
+        self.search = asyncio.Semaphore(max(1, search))
+        self.llm = asyncio.Semaphore(max(1, llm))
+
+
+def validate_batch_options(options: Dict[str, Any]) -> None:
+    """
+    Validate options shared by every company once, before any work starts.
+    
+    Raises:
+        SystemExit: If the prompt, sections or output format are invalid
+    """
+    parse_sections(options.get("sections"))
+    validate_output_format(options.get("output_format"))
+    try:
+        get_prompt(options.get("prompt_name") or DEFAULT_PROMPT)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(str(e))
+
+
+async def _analyze_company(company: str, options: Dict[str, Any], limits: ConcurrencyLimits) -> Dict[str, Any]:
+    """Run one company's analysis, converting failures into an error record."""
+    params = SimpleNamespace(**options, company=company)
+    try:
+        result = await perform_analysis_async(params, limits=limits)
+    except SystemExit as exc:
+        # The validation helpers raise SystemExit with the reason as the message
+        reason = exc.code if isinstance(exc.code, str) else f"Invalid request (exit code {exc.code})"
+        return {"company": company, "status": "error", "error": reason}
+    except Exception as exc:
+        print(f"Batch analysis failed for {company}: {exc}", file=sys.stderr)
+        return {"company": company, "status": "error", "error": str(exc) or exc.__class__.__name__}
+    return {"company": company, "status": "ok", **result}
+
+
+async def perform_batch_analysis(
+    companies: List[str],
+    options: Dict[str, Any],
+    limits: ConcurrencyLimits
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze many companies concurrently, yielding each result as it finishes.
+    
+    Args:
+        companies: Screener tickers to analyze
+        options: Shared AnalysisRequest fields (prompt_name, model, sections, ...)
+        limits: Per-stage concurrency limits shared by the whole batch
+        
+    Yields:
+        One record per company: {"company", "status": "ok"|"error", ...}
+    """
+    tasks = [
+        asyncio.create_task(_analyze_company(company, options, limits))
+        for company in companies
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client disconnected or the batch was cancelled: stop outstanding work
+        for task in tasks:
+            if not task.done():
+                task.cancel()
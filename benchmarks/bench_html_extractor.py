@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML extraction across parser backends.
+
+Usage:
+    python benchmarks/bench_html_extractor.py saved/TCS.html saved/INFY.html
+    python benchmarks/bench_html_extractor.py --repeat 20 --sections quarters,ratios saved/*.html
+
+Every backend's output is checked byte for byte against the original BeautifulSoup
+extractor (benchmarks/legacy_html_extractor.py); the script exits with status 1 on
+any mismatch.
+
+Save pages with e.g. `curl -s https://www.screener.in/company/TCS/ > saved/TCS.html`.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from html_extractor import extract_financial_tables, parse_company_page  # noqa: E402
+from html_parsers import AUTO_BACKEND_ORDER, _is_available, get_parser_backend  # noqa: E402
+from legacy_html_extractor import extract_financial_data  # noqa: E402
+
+
+def _legacy_pipeline(html: str, sections, max_years: int, max_quarters: int, aggressive: bool):
+    """The old request path: an html.parser pass for the <h1>, then the original extractor."""
+    h1 = BeautifulSoup(html, "html.parser").find("h1")
+    name = h1.get_text(strip=True) if h1 else None
+    data = extract_financial_data(html, max_years, max_quarters, sections, aggressive)
+    return name, data
+
+
+def _time(func, repeat: int) -> float:
+    """Median wall time of func() in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="+", help="Saved Screener HTML pages")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per page and backend (default: 10)")
+    parser.add_argument("--years", type=int, default=5, help="max_years passed to the extractor")
+    parser.add_argument("--quarters", type=int, default=8, help="max_quarters passed to the extractor")
+    parser.add_argument("--sections", help="Comma-separated sections (default: all)")
+    parser.add_argument("--aggressive", action="store_true", help="Extract in aggressive mode")
+    parser.add_argument("--full", action="store_true", help="Parse whole pages instead of only the sections read")
+    args = parser.parse_args()
+    
+    sections = [s.strip() for s in args.sections.split(",")] if args.sections else None
+    backends = [name for name in AUTO_BACKEND_ORDER if _is_available(name)]
+    
+    print(
+        f"{'page':<24}{'KB':>8}{'legacy':>10}" + "".join(f"{name:>14}" for name in backends)
+        + f"{'cached':>14}  match"
+    )
+    mismatched = []
+    for page in args.pages:
+        html = Path(page).read_text(encoding="utf-8")
+        legacy = lambda: _legacy_pipeline(  # noqa: E731
+            html, sections, args.years, args.quarters, args.aggressive
+        )
+        expected = legacy()
+        legacy_ms = _time(legacy, args.repeat)
+        
+        cells = []
+        matches = []
+        for name in backends:
+            backend = get_parser_backend(name)
+            run = lambda: parse_company_page(  # noqa: E731
+                html, args.years, args.quarters, sections, args.aggressive,
+                backend=backend, partial=not args.full, use_cache=False
+            )
+            name, data = run()
+            matches.append(name == expected[0] and data.encode("utf-8") == expected[1].encode("utf-8"))
+            ms = _time(run, args.repeat)
+            cells.append(f"{ms:8.1f}ms {legacy_ms / ms:3.0f}x")
+        
+        # Extraction cache hit (includes hashing the page)
+        cached = lambda: extract_financial_tables(  # noqa: E731
+            html, args.years, args.quarters, sections, args.aggressive
+        )
+        cached()
+        ms = _time(cached, args.repeat)
+        cells.append(f"{ms:8.3f}ms {legacy_ms / ms:3.0f}x")
+        
+        print(
+            f"{Path(page).name[:23]:<24}{len(html) / 1024:>8.0f}{legacy_ms:>8.1f}ms"
+            + "".join(f"{cell:>14}" for cell in cells)
+            + f"  {'yes' if all(matches) else 'NO'}"
+        )
+        if not all(matches):
+            mismatched.extend(f"{Path(page).name} ({name})" for name, ok in zip(backends, matches) if not ok)
+    
+    if mismatched:
+        print(f"Output differs from the original extractor: {', '.join(mismatched)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,19 @@
-"""Cache package for search results."""
+"""Cache package for search results, Screener pages, extracted data and analyses."""
 
+from .extraction_cache import ExtractionCache, content_digest
+from .html_cache import HtmlCache
+from .result_cache import ResultCache, result_cache_key
 from .search_cache import SearchCache, normalize_company_name
+from .snippet_index import Snippet, SnippetIndex
 
-__all__ = ["SearchCache", "normalize_company_name"]
-
+__all__ = [
+    "ExtractionCache",
+    "HtmlCache",
+    "ResultCache",
+    "SearchCache",
+    "Snippet",
+    "SnippetIndex",
+    "content_digest",
+    "normalize_company_name",
+    "result_cache_key",
+]
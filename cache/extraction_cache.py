@@ -0,0 +1,221 @@
+"""Memoized results of HTML extraction, keyed by page content and extraction options."""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from financial_tables import FinancialTables
+
+# Bump when extraction output changes so stale disk entries are ignored
+EXTRACTION_CACHE_VERSION = 1
+
+
+def content_digest(html: str) -> str:
+    """SHA-256 of the page body (same digest the Screener HTML cache stores)."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Two-tier cache of FinancialTables.
+    
+    The memory tier is an LRU bounded by entry count and by the encoded size
+    of its entries; a hit is a dict lookup. The optional disk tier keeps
+    gzip-compressed JSON under <cache_dir>/extraction/ so results survive
+    restarts and are shared between worker processes; it is pruned oldest
+    first (by access time) when it grows past its size limit.
+    
+    Cached tables are shared between callers and must be treated as
+    read-only (use FinancialTables.trimmed or dataclasses.replace to derive
+    variants).
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        enabled: bool = True
+    ):
+        """
+        Initialize the extraction cache.
+        
+        Args:
+            max_entries: Maximum entries kept in memory
+            max_bytes: Maximum encoded size of the entries kept in memory
+            cache_dir: Base cache directory for the disk tier (None disables it)
+            disk_max_bytes: Maximum size of the disk tier
+            enabled: Whether caching is enabled (default: True)
+        """
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, Tuple[FinancialTables, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        
+        self.disk_dir = Path(cache_dir) / "extraction" if cache_dir and enabled else None
+        self._disk_bytes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+    
+    @staticmethod
+    def make_key(
+        digest: str,
+        max_years: int,
+        max_quarters: int,
+        sections: Sequence[str]
+    ) -> str:
+        """
+        Build the cache key for a page and the options that change extraction.
+        
+        Args:
+            digest: content_digest() of the page
+            max_years: Years kept for annual sections
+            max_quarters: Quarters kept for the quarterly results
+            sections: Section ids, in the requested order
+            
+        Returns:
+            Hex key, safe to use as a file name
+        """
+        options = f"v{EXTRACTION_CACHE_VERSION}|{max_years}|{max_quarters}|{','.join(sections)}"
+        return hashlib.sha256(f"{digest}|{options}".encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[FinancialTables]:
+        """Return the cached tables for a key, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+        
+        tables, size = self._read_disk(key)
+        with self._lock:
+            if tables is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._insert(key, tables, size)
+        return tables
+    
+    def put(self, key: str, tables: FinancialTables) -> None:
+        """Store freshly extracted tables."""
+        if not self.enabled:
+            return
+        encoded = json.dumps(tables.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._insert(key, tables, len(encoded))
+        if self.disk_dir is not None:
+            self._write_disk(key, encoded)
+    
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "disk_bytes": self._disk_bytes if self.disk_dir is not None else None,
+            }
+    
+    def _insert(self, key: str, tables: FinancialTables, size: int) -> None:
+        # Caller holds the lock
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        if size > self.max_bytes:
+            return  # Larger than the whole memory tier
+        self._entries[key] = (tables, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats["evictions"] += 1
+    
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json.gz"
+    
+    def _disk_files(self):
+        """Yield (path, size, access time) for every disk entry."""
+        for path in self.disk_dir.glob("*/*.json.gz"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+    
+    def _read_disk(self, key: str) -> Tuple[Optional[FinancialTables], int]:
+        if self.disk_dir is None:
+            return None, 0
+        path = self._disk_path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                raw = f.read()
+            tables = FinancialTables.from_dict(json.loads(raw))
+        except FileNotFoundError:
+            return None, 0
+        except (OSError, EOFError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable extraction cache entry {path}: {e}", file=sys.stderr)
+            return None, 0
+        try:
+            os.utime(path)  # Recently used entries survive pruning
+        except OSError:
+            pass
+        return tables, len(raw)
+    
+    def _write_disk(self, key: str, encoded: bytes) -> None:
+        path = self._disk_path(key)
+        data = gzip.compress(encoded, compresslevel=6)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            temp_path.replace(path)
+        except OSError as e:
+            print(f"Warning: Failed to write extraction cache file {path}: {e}", file=sys.stderr)
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._disk_bytes += len(data)
+            over_limit = self._disk_bytes > self.disk_max_bytes
+        if over_limit:
+            self._prune_disk()
+    
+    def _prune_disk(self) -> None:
+        """Delete least recently used files until the disk tier is at 90% of its limit."""
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,216 @@
+"""Content-addressed, gzip-compressed store for Screener HTML pages."""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Unreferenced objects are removed by a sweep run at most this often (from store)
+SWEEP_INTERVAL_SECONDS = 3600
+
+# Objects younger than this are never swept: a concurrent store may not have written its ref yet
+SWEEP_GRACE_SECONDS = 300
+
+
+class HtmlCache:
+    """
+    Disk cache of Screener pages keyed by ticker.
+
+    Page bodies are stored once per content hash under objects/, compressed
+    with gzip; refs/<TICKER>.json points at the current body and keeps the
+    ETag/Last-Modified validators needed to revalidate it after the TTL.
+    Several refs may share an object (e.g. identical pages), so a replaced
+    object is only deleted by sweep_unreferenced once no ref points at it.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_minutes: int = 60,
+        enabled: bool = True
+    ):
+        """
+        Initialize the HTML cache.
+
+        Args:
+            cache_dir: Base cache directory (default: ./cache)
+            ttl_minutes: Minutes a page is served without revalidation (default: 60)
+            enabled: Whether caching is enabled (default: True)
+        """
+        self.enabled = enabled
+        self.ttl_seconds = ttl_minutes * 60
+
+        base_dir = Path(cache_dir) if cache_dir else Path(__file__).parent.parent / "cache"
+        self.root = base_dir / "screener"
+        self.objects_dir = self.root / "objects"
+        self.refs_dir = self.root / "refs"
+        self._last_sweep = time.time()
+        self._sweep_lock = threading.Lock()
+        if self.enabled:
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            self.refs_dir.mkdir(parents=True, exist_ok=True)
+
+    def _ref_path(self, key: str) -> Path:
+        safe_key = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in key)
+        return self.refs_dir / f"{safe_key}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.html.gz"
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cache entry for a ticker.
+
+        Args:
+            key: Ticker (e.g., "TCS")
+
+        Returns:
+            Entry dict (sha256, fetched_at, etag, last_modified, size, fresh)
+            or None if nothing is cached
+        """
+        if not self.enabled:
+            return None
+        ref_path = self._ref_path(key)
+        try:
+            with open(ref_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Warning: Ignoring unreadable HTML cache entry {ref_path}: {e}", file=sys.stderr)
+            return None
+        entry["fresh"] = (time.time() - entry.get("fetched_at", 0)) < self.ttl_seconds
+        return entry
+
+    def read(self, entry: Dict[str, Any]) -> Optional[str]:
+        """
+        Load the page body for an entry.
+
+        Returns:
+            HTML string, or None if the stored object is missing or corrupt
+        """
+        try:
+            with gzip.open(self._object_path(entry["sha256"]), "rb") as f:
+                return f.read().decode("utf-8")
+        except (OSError, EOFError, KeyError) as e:
+            print(f"Warning: HTML cache object unavailable: {e}", file=sys.stderr)
+            return None
+
+    def store(
+        self,
+        key: str,
+        html: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a freshly downloaded page and point the ticker at it.
+
+        Args:
+            key: Ticker
+            html: Page body
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+
+        Returns:
+            The new cache entry
+        """
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        entry = {
+            "sha256": digest,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": len(raw),
+        }
+        if not self.enabled:
+            return entry
+
+        object_path = self._object_path(digest)
+        try:
+            # A reused object counts as new, so a running sweep leaves it alone
+            os.utime(object_path)
+        except OSError:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            self._atomic_write(object_path, gzip.compress(raw, compresslevel=6))
+
+        previous = self.lookup(key)
+        self._write_ref(key, entry)
+        if previous and previous.get("sha256") != digest and time.time() - self._last_sweep >= SWEEP_INTERVAL_SECONDS:
+            self.sweep_unreferenced()
+        return entry
+
+    def touch(self, key: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark an entry as fresh again after a 304 Not Modified response."""
+        entry = {k: v for k, v in entry.items() if k != "fresh"}
+        entry["fetched_at"] = time.time()
+        if self.enabled:
+            self._write_ref(key, entry)
+        return entry
+
+    def invalidate(self, key: str) -> None:
+        """Forget the cached page for a ticker."""
+        try:
+            self._ref_path(key).unlink()
+        except OSError:
+            pass
+
+    def sweep_unreferenced(self) -> int:
+        """
+        Delete objects no ref points at (best-effort).
+
+        Objects younger than SWEEP_GRACE_SECONDS are kept, since a store in
+        another thread or process may be about to point a ref at them.
+
+        Returns:
+            Number of objects deleted
+        """
+        if not self.enabled or not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._last_sweep = time.time()
+            referenced = set()
+            for ref_path in self.refs_dir.glob("*.json"):
+                try:
+                    with open(ref_path, "r", encoding="utf-8") as f:
+                        referenced.add(json.load(f).get("sha256"))
+                except (json.JSONDecodeError, OSError):
+                    continue
+            removed = 0
+            cutoff = time.time() - SWEEP_GRACE_SECONDS
+            for object_path in self.objects_dir.glob("*/*.html.gz"):
+                digest = object_path.name[:-len(".html.gz")]
+                try:
+                    if digest in referenced or object_path.stat().st_mtime > cutoff:
+                        continue
+                    object_path.unlink()
+                    removed += 1
+                except OSError:
+                    pass  # Removed concurrently, or not removable: try again next sweep
+            return removed
+        finally:
+            self._sweep_lock.release()
+
+    def _write_ref(self, key: str, entry: Dict[str, Any]) -> None:
+        data = {k: v for k, v in entry.items() if k != "fresh"}
+        self._atomic_write(self._ref_path(key), json.dumps(data).encode("utf-8"))
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            temp_path.replace(path)
+        except OSError as e:
+            print(f"Warning: Failed to write HTML cache file {path}: {e}", file=sys.stderr)
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
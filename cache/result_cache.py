@@ -0,0 +1,115 @@
+"""In-memory cache of finished LLM analyses."""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def result_cache_key(**parts: Any) -> str:
+    """
+    Build a cache key from everything that determines an analysis.
+    
+    Args:
+        **parts: JSON-serializable values (prompt hash, model, data hash, ...)
+        
+    Returns:
+        Hex digest of the parts
+    """
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of (analysis, metadata) with a TTL.
+    
+    Bounded by entry count and by the total size of the cached analysis
+    text; expired entries are dropped when they are looked up or reach the
+    LRU end.
+    """
+    
+    def __init__(
+        self,
+        ttl_hours: float = 24,
+        max_entries: int = 512,
+        max_bytes: int = 32 * 1024 * 1024,
+        enabled: bool = True
+    ):
+        """
+        Initialize the result cache.
+        
+        Args:
+            ttl_hours: Hours a result is served after it was produced (default: 24)
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum total size of the cached analysis text
+            enabled: Whether caching is enabled (default: True)
+        """
+        self.enabled = enabled
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+    
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, Any], float]]:
+        """
+        Look up a result.
+        
+        Returns:
+            Tuple of (analysis, metadata copy, created_at timestamp), or None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] >= self.ttl_seconds:
+                self._remove(key)
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            created_at, analysis, metadata, _ = entry
+        return analysis, copy.deepcopy(metadata), created_at
+    
+    def put(self, key: str, analysis: str, metadata: Dict[str, Any]) -> None:
+        """Store a finished analysis (metadata is copied)."""
+        if not self.enabled:
+            return
+        size = len(analysis.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        entry = (time.time(), analysis, copy.deepcopy(metadata), size)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+    
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+    
+    def _remove(self, key: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
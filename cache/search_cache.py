@@ -1,13 +1,17 @@
 """Search results cache with 24-hour TTL."""
 
 import json
-import os
+import sqlite3
 import sys
+import threading
 import time
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
-import fcntl  # For file locking on Unix
+from typing import Any, Optional, Dict, List
+
+from .snippet_index import Snippet, SnippetIndex, select_snippets, tokenize
 
 
 def normalize_company_name(company_name: str) -> str:
@@ -30,14 +34,69 @@ def normalize_company_name(company_name: str) -> str:
     return normalized.strip()
 
 
+# One row per (company, query); the primary key doubles as the company index.
+# A company's results expire together, so the refresh time is kept once per
+# company (indexed for expiry) and the TTL is applied when reading.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_results (
+    company TEXT NOT NULL,
+    query TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (company, query)
+);
+CREATE TABLE IF NOT EXISTS search_companies (
+    company TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_companies_refreshed ON search_companies (refreshed_at);
+"""
+
+# Seconds a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT_SECONDS = 5.0
+
+# Hot tier entries are reloaded after this long so writes from other processes show up
+HOT_TIER_REFRESH_SECONDS = 60.0
+
+
+@dataclass
+class _HotEntry:
+    """A company's cached results held in memory."""
+    
+    refreshed_at: float
+    loaded_at: float
+    queries: Dict[str, str]
+    index: Optional[SnippetIndex] = None
+    version: int = 0  # Bumped by writes; an index built from an older version is discarded
+
+
 class SearchCache:
-    """File-based cache for search results with TTL."""
+    """
+    SQLite-backed cache for search results with TTL.
+    
+    Entries are stored one row per (company, query) in a WAL-mode database,
+    so a write touches only its own rows and concurrent readers and
+    writers (threads or processes) never overwrite each other. As before,
+    a company's results expire together: storing a result refreshes the
+    TTL of every result of that company.
+    
+    Companies read recently are kept in a bounded in-memory LRU (the hot
+    tier), so repeated lookups skip the database. Reads only filter out
+    expired entries; deleting them is left to sweep_expired, which
+    start_sweeper runs periodically on a background thread.
+    
+    One instance is meant to be shared by the whole process (it is
+    thread-safe).
+    """
     
     def __init__(
         self,
         cache_dir: Optional[str] = None,
         ttl_hours: int = 24,
-        enabled: bool = True
+        enabled: bool = True,
+        hot_max_entries: int = 256,
+        snippet_top_k: int = 5,
+        snippet_max_tokens: int = 800
     ):
         """
         Initialize search cache.
@@ -46,9 +105,24 @@ class SearchCache:
             cache_dir: Directory for cache file (default: ./cache)
             ttl_hours: Time-to-live in hours (default: 24)
             enabled: Whether caching is enabled (default: True)
+            hot_max_entries: Companies kept in the in-memory hot tier (0 disables it)
+            snippet_top_k: Snippets returned by search_snippets (default: 5)
+            snippet_max_tokens: Token budget of the snippets returned by search_snippets
         """
         self.enabled = enabled
         self.ttl_hours = ttl_hours
+        self.hot_max_entries = max(0, hot_max_entries)
+        self.snippet_top_k = snippet_top_k
+        self.snippet_max_tokens = snippet_max_tokens
+        
+        self._hot: "OrderedDict[str, _HotEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "hot_hits": 0, "misses": 0, "writes": 0,
+            "evictions": 0, "expired": 0, "sweeps": 0, "errors": 0,
+        }
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
         
         if cache_dir:
             self.cache_dir = Path(cache_dir)
@@ -56,94 +130,114 @@ class SearchCache:
             # Default to ./cache relative to project root
             self.cache_dir = Path(__file__).parent.parent / "cache"
         
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "search_cache.json"
-        self.lock_file = self.cache_dir / "search_cache.lock"
+        self.db_path = self.cache_dir / "search_cache.db"
+        # Previous JSON storage, imported once into the database
+        self.legacy_file = self.cache_dir / "search_cache.json"
+        self._local = threading.local()
         
-        # Load existing cache on initialization
-        self._cache_data: Dict[str, Any] = {}
         if self.enabled:
-            self._load_cache()
-            self._cleanup_expired_entries()
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._import_legacy_file()
     
-    def _load_cache(self) -> None:
-        """Load cache from file."""
-        if not self.cache_file.exists():
-            self._cache_data = {}
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 connections are not thread-safe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable enough for a cache; far fewer fsyncs
+            self._local.conn = conn
+        return conn
+    
+    def _import_legacy_file(self) -> None:
+        """Move entries of the old search_cache.json into the database (once)."""
+        if not self.legacy_file.exists():
             return
         
         try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
-                self._cache_data = json.load(f)
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy_data = json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Warning: Failed to load cache file: {e}", file=sys.stderr)
-            print("Starting with empty cache.", file=sys.stderr)
-            self._cache_data = {}
-    
-    def _save_cache(self) -> None:
-        """Save cache to file with atomic write and locking."""
-        if not self.enabled:
+            print(f"Warning: Failed to load legacy cache file: {e}", file=sys.stderr)
             return
         
+        companies = []
+        rows = []
+        for company, company_data in legacy_data.items():
+            try:
+                timestamp = datetime.fromisoformat(company_data["timestamp"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            companies.append((company, timestamp))
+            for query, result in company_data.get("searches", {}).items():
+                rows.append((company, query, result, timestamp))
+        
+        conn = self._connection()
         try:
-            # Create backup of existing cache
-            if self.cache_file.exists():
-                backup_file = self.cache_file.with_suffix('.json.bak')
-                try:
-                    import shutil
-                    shutil.copy2(self.cache_file, backup_file)
-                except Exception:
-                    pass  # Backup failure is not critical
-            
-            # Write to temporary file first (atomic write)
-            temp_file = self.cache_file.with_suffix('.json.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self._cache_data, f, indent=2, ensure_ascii=False)
-            
-            # Atomic rename
-            temp_file.replace(self.cache_file)
-            
-            # Remove backup if write succeeded
-            backup_file = self.cache_file.with_suffix('.json.bak')
-            if backup_file.exists():
-                try:
-                    backup_file.unlink()
-                except Exception:
-                    pass
-            
-        except IOError as e:
-            print(f"Warning: Failed to save cache file: {e}", file=sys.stderr)
+            # Existing rows win: another process may have imported the file already
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO search_companies (company, refreshed_at) VALUES (?, ?)",
+                    companies,
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO search_results (company, query, result, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            self.legacy_file.replace(self.legacy_file.with_suffix('.json.migrated'))
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: Failed to import legacy cache file: {e}", file=sys.stderr)
+            return
+        print(f"Imported {len(rows)} cached searches from {self.legacy_file.name}", file=sys.stderr)
     
-    def _acquire_lock(self):
-        """Acquire file lock for cache operations."""
-        if not self.lock_file.exists():
-            self.lock_file.touch()
-        return open(self.lock_file, 'w')
+    def _cutoff(self) -> float:
+        """Refresh time before which a company's results are expired."""
+        return time.time() - self.ttl_hours * 3600
     
-    def _is_cache_valid(self, timestamp_str: str) -> bool:
-        """
-        Check if cache entry is still valid.
-        
-        Args:
-            timestamp_str: ISO format timestamp string
-            
-        Returns:
-            True if cache is valid (less than TTL hours old)
-        """
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-            age = datetime.now() - timestamp
-            return age < timedelta(hours=self.ttl_hours)
-        except (ValueError, TypeError):
-            return False
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+    
+    def _hot_entry(self, company: str, cutoff: float) -> Optional[_HotEntry]:
+        """Return a company's valid hot tier entry, or None (caller holds the lock)."""
+        entry = self._hot.get(company)
+        if entry is None:
+            return None
+        if entry.refreshed_at <= cutoff or entry.loaded_at <= time.time() - HOT_TIER_REFRESH_SECONDS:
+            del self._hot[company]
+            return None
+        self._hot.move_to_end(company)
+        return entry
     
-    def get_cached_result(self, company_name: str, query: str) -> Optional[str]:
+    def _hot_get(self, company: str, cutoff: float) -> Optional[Dict[str, str]]:
+        """Return a copy of a company's results from the hot tier, or None."""
+        with self._lock:
+            entry = self._hot_entry(company, cutoff)
+            return dict(entry.queries) if entry is not None else None
+    
+    def _hot_put(self, company: str, refreshed_at: float, queries: Dict[str, str]) -> None:
+        if not self.hot_max_entries:
+            return
+        with self._lock:
+            self._hot[company] = _HotEntry(refreshed_at, time.time(), queries)
+            self._hot.move_to_end(company)
+            while len(self._hot) > self.hot_max_entries:
+                self._hot.popitem(last=False)
+                self._stats["evictions"] += 1
+    
+    def get_cached_result(self, company_name: str, query: str, record_stats: bool = True) -> Optional[str]:
         """
         Get cached search result if available and valid.
         
         Args:
             company_name: Normalized company name
             query: Search query string
+            record_stats: Count the lookup as a hit or miss; callers combining
+                          several reads into one lookup count it with record_lookup
             
         Returns:
             Cached result if found and valid, None otherwise
@@ -155,25 +249,27 @@ class SearchCache:
         if not normalized_company:
             return None
         
-        if normalized_company not in self._cache_data:
-            return None
-        
-        company_data = self._cache_data[normalized_company]
+        cutoff = self._cutoff()
+        queries = self._hot_get(normalized_company, cutoff)
+        if queries is not None and query in queries:
+            self._count("hot_hits")
+            if record_stats:
+                self._count("hits")
+            return queries[query]
         
-        # Check if cache entry is still valid
-        timestamp_str = company_data.get("timestamp")
-        if not timestamp_str or not self._is_cache_valid(timestamp_str):
-            # Cache expired, remove it
-            del self._cache_data[normalized_company]
-            self._save_cache()
+        try:
+            row = self._connection().execute(
+                "SELECT r.result FROM search_results r JOIN search_companies c ON c.company = r.company "
+                "WHERE r.company = ? AND r.query = ? AND c.refreshed_at > ?",
+                (normalized_company, query, cutoff),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to read search cache: {e}", file=sys.stderr)
+            self._count("errors")
             return None
-        
-        # Check if this specific query is cached
-        searches = company_data.get("searches", {})
-        if query in searches:
-            return searches[query]
-        
-        return None
+        if record_stats:
+            self._count("hits" if row else "misses")
+        return row[0] if row else None
     
     def set_cached_result(self, company_name: str, query: str, result: str) -> None:
         """
@@ -191,46 +287,123 @@ class SearchCache:
         if not normalized_company:
             return
         
-        # Initialize company entry if it doesn't exist
-        if normalized_company not in self._cache_data:
-            self._cache_data[normalized_company] = {
-                "timestamp": datetime.now().isoformat(),
-                "searches": {}
-            }
-        
-        # Update timestamp to now (refresh TTL)
-        self._cache_data[normalized_company]["timestamp"] = datetime.now().isoformat()
-        
-        # Store the search result
-        self._cache_data[normalized_company]["searches"][query] = result
+        now = time.time()
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # Results of a company that expired but was not swept yet must not come back to life
+                conn.execute(
+                    "DELETE FROM search_results WHERE company = ? AND company IN "
+                    "(SELECT company FROM search_companies WHERE company = ? AND refreshed_at <= ?)",
+                    (normalized_company, normalized_company, self._cutoff()),
+                )
+                conn.execute(
+                    "INSERT INTO search_results (company, query, result, created_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (company, query) DO UPDATE SET result = excluded.result",
+                    (normalized_company, query, result, now),
+                )
+                # Refresh the TTL of the whole company
+                conn.execute(
+                    "INSERT INTO search_companies (company, refreshed_at) VALUES (?, ?) "
+                    "ON CONFLICT (company) DO UPDATE SET refreshed_at = excluded.refreshed_at",
+                    (normalized_company, now),
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to save search cache entry: {e}", file=sys.stderr)
+            self._count("errors")
+            return
         
-        # Save cache
-        self._save_cache()
+        with self._lock:
+            self._stats["writes"] += 1
+            entry = self._hot.get(normalized_company)
+            if entry is not None:
+                if entry.refreshed_at <= now - self.ttl_hours * 3600:
+                    del self._hot[normalized_company]  # Its old results were just deleted
+                else:
+                    entry.queries[query] = result
+                    entry.refreshed_at = now
+                    entry.index = None
+                    entry.version += 1
     
-    def _cleanup_expired_entries(self) -> None:
-        """Remove expired cache entries."""
+    def sweep_expired(self) -> int:
+        """
+        Delete expired entries from the database and the hot tier.
+        
+        Returns:
+            Number of search results deleted
+        """
         if not self.enabled:
-            return
+            return 0
         
-        expired_companies = []
-        for company_name, company_data in self._cache_data.items():
-            timestamp_str = company_data.get("timestamp")
-            if not timestamp_str or not self._is_cache_valid(timestamp_str):
-                expired_companies.append(company_name)
+        cutoff = self._cutoff()
+        with self._lock:
+            for company in [c for c, entry in self._hot.items() if entry.refreshed_at <= cutoff]:
+                del self._hot[company]
         
-        for company in expired_companies:
-            del self._cache_data[company]
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                deleted = conn.execute(
+                    "DELETE FROM search_results WHERE company IN "
+                    "(SELECT company FROM search_companies WHERE refreshed_at <= ?)",
+                    (cutoff,),
+                ).rowcount
+                conn.execute("DELETE FROM search_companies WHERE refreshed_at <= ?", (cutoff,))
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to clean up search cache: {e}", file=sys.stderr)
+            self._count("errors")
+            return 0
         
-        if expired_companies:
-            print(f"Cleaned up {len(expired_companies)} expired cache entries", file=sys.stderr)
-            self._save_cache()
+        with self._lock:
+            self._stats["expired"] += deleted
+            self._stats["sweeps"] += 1
+        if deleted:
+            print(f"Cleaned up {deleted} expired cache entries", file=sys.stderr)
+        return deleted
     
-    def get_all_cached_queries(self, company_name: str) -> Dict[str, str]:
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """
+        Run sweep_expired now and then every interval_seconds on a daemon thread.
+        
+        Does nothing if the cache is disabled, the interval is not positive
+        or the sweeper is already running.
+        """
+        if not self.enabled or interval_seconds <= 0 or self._sweeper is not None:
+            return
+        self._stop_sweeper.clear()
+        self._sweeper = threading.Thread(
+            target=self._sweep_loop,
+            args=(interval_seconds,),
+            name="search-cache-sweeper",
+            daemon=True,
+        )
+        self._sweeper.start()
+    
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper (if running)."""
+        sweeper = self._sweeper
+        if sweeper is None:
+            return
+        self._stop_sweeper.set()
+        sweeper.join(timeout=BUSY_TIMEOUT_SECONDS + 1)
+        self._sweeper = None
+    
+    def _sweep_loop(self, interval_seconds: float) -> None:
+        while True:
+            self.sweep_expired()
+            if self._stop_sweeper.wait(interval_seconds):
+                break
+        self.close()
+    
+    def get_all_cached_queries(self, company_name: str, record_stats: bool = True) -> Dict[str, str]:
         """
         Get all cached queries for a company (if cache is valid).
         
         Args:
             company_name: Normalized company name
+            record_stats: Count the lookup as a hit or miss
             
         Returns:
             Dictionary of query -> result for valid cache entries
@@ -239,14 +412,130 @@ class SearchCache:
             return {}
         
         normalized_company = normalize_company_name(company_name)
-        if normalized_company not in self._cache_data:
-            return {}
+        cutoff = self._cutoff()
+        queries = self._hot_get(normalized_company, cutoff)
+        if queries is not None:
+            self._count("hot_hits")
+            if record_stats:
+                self._count("hits")
+            return queries
         
-        company_data = self._cache_data[normalized_company]
-        timestamp_str = company_data.get("timestamp")
+        try:
+            rows = self._connection().execute(
+                "SELECT c.refreshed_at, r.query, r.result FROM search_results r "
+                "JOIN search_companies c ON c.company = r.company "
+                "WHERE r.company = ? AND c.refreshed_at > ? ORDER BY r.created_at, r.rowid",
+                (normalized_company, cutoff),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to read search cache: {e}", file=sys.stderr)
+            self._count("errors")
+            return {}
         
-        if not timestamp_str or not self._is_cache_valid(timestamp_str):
+        if not rows:
+            # Misses are not remembered: another process may fill the entry any time
+            if record_stats:
+                self._count("misses")
             return {}
+        queries = {query: result for _, query, result in rows}
+        self._hot_put(normalized_company, rows[0][0], queries)
+        if record_stats:
+            self._count("hits")
+        return dict(queries)
+    
+    def record_lookup(self, hit: bool) -> None:
+        """Count one logical lookup made of reads with record_stats=False."""
+        self._count("hits" if hit else "misses")
+    
+    def search_snippets(
+        self,
+        company_name: str,
+        query: str,
+        top_k: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        record_stats: bool = True
+    ) -> List[Snippet]:
+        """
+        Find the cached snippets of a company most relevant to a query.
         
-        return company_data.get("searches", {}).copy()
-
+        Snippets of all valid cached results of the company are ranked with
+        BM25 (terms of the company name are ignored). The index is built
+        once per company and kept with its hot tier entry until the next
+        write.
+        
+        Args:
+            company_name: Company name
+            query: New search query
+            top_k: Maximum snippets (default: snippet_top_k)
+            max_tokens: Token budget of the snippets (default: snippet_max_tokens)
+            record_stats: Count the lookup as a hit (snippets found) or miss
+            
+        Returns:
+            Matching snippets, best first; empty if nothing relevant is cached
+        """
+        if not self.enabled:
+            return []
+        
+        normalized_company = normalize_company_name(company_name)
+        index = self._snippet_index(normalized_company)
+        snippets = []
+        if index is not None:
+            ranked = index.search(query, ignore_terms=tokenize(normalized_company))
+            snippets = select_snippets(
+                ranked,
+                top_k if top_k is not None else self.snippet_top_k,
+                max_tokens if max_tokens is not None else self.snippet_max_tokens,
+            )
+        if record_stats:
+            self.record_lookup(bool(snippets))
+        return snippets
+    
+    def _snippet_index(self, company: str) -> Optional[SnippetIndex]:
+        cutoff = self._cutoff()
+        entry = None
+        with self._lock:
+            entry = self._hot_entry(company, cutoff)
+            if entry is not None:
+                self._stats["hot_hits"] += 1
+                if entry.index is not None:
+                    return entry.index
+                queries, version = dict(entry.queries), entry.version
+        
+        if entry is None:
+            queries = self.get_all_cached_queries(company, record_stats=False)  # Loads the hot tier entry
+            if not queries:
+                return None
+            with self._lock:
+                entry = self._hot_entry(company, cutoff)
+                if entry is not None:
+                    queries, version = dict(entry.queries), entry.version
+        
+        index = SnippetIndex(queries)
+        with self._lock:
+            # Keep it unless a write changed the results while it was built
+            if entry is not None and self._hot.get(company) is entry and entry.version == version:
+                entry.index = index
+        return index
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss/eviction counters and hot tier size.
+        
+        hits and misses count lookups; hot_hits counts reads served by the
+        in-memory tier, of which one lookup may make several.
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "hot_entries": len(self._hot),
+                "hot_max_entries": self.hot_max_entries,
+                "ttl_hours": self.ttl_hours,
+                "sweeper_running": self._sweeper is not None,
+            }
+    
+    def close(self) -> None:
+        """Close the calling thread's database connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,168 @@
+"""BM25 index over cached search result snippets."""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from token_counter import count_tokens
+
+# Results written by older versions that concatenated other cached results
+AGGREGATE_PREFIX = "=== Cached: "
+
+# Snippets longer than this are split at sentence boundaries
+MAX_SNIPPET_WORDS = 80
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# A snippet must contain more than this share of the query terms to count as relevant
+MIN_TERM_COVERAGE = 0.5
+
+_TERM_RE = re.compile(r"[a-z0-9]+(?:[./&][a-z0-9]+)*")
+_PART_SPLIT_RE = re.compile(r"[/&]")
+_ENTRY_SPLIT_RE = re.compile(r"\n\s*\n|\n(?=\d+\.\s)")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or the this to was were what with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase search terms of a text.
+    
+    Tokens like "p/e" and "3.5" are kept whole; "debt/equity" also yields
+    "debt" and "equity".
+    """
+    terms = []
+    for token in _TERM_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if "/" in token or "&" in token:
+            terms.extend(part for part in _PART_SPLIT_RE.split(token) if len(part) > 1 and part not in _STOPWORDS)
+    return terms
+
+
+def split_snippets(result: str) -> List[str]:
+    """
+    Split one search result into snippets.
+    
+    Tavily results split into the answer and one snippet per numbered
+    hit; long unstructured text (DuckDuckGo) is cut at sentence
+    boundaries into pieces of at most MAX_SNIPPET_WORDS words.
+    """
+    snippets = []
+    for block in _ENTRY_SPLIT_RE.split(result):
+        block = block.strip()
+        if not block:
+            continue
+        if len(block.split()) <= MAX_SNIPPET_WORDS:
+            snippets.append(block)
+            continue
+        piece: List[str] = []
+        words = 0
+        for sentence in _SENTENCE_SPLIT_RE.split(block):
+            sentence_words = len(sentence.split())
+            if piece and words + sentence_words > MAX_SNIPPET_WORDS:
+                snippets.append(" ".join(piece))
+                piece, words = [], 0
+            piece.append(sentence)
+            words += sentence_words
+        if piece:
+            snippets.append(" ".join(piece))
+    return snippets
+
+
+@dataclass(frozen=True)
+class Snippet:
+    """A ranked snippet and the cached query it came from."""
+    
+    query: str
+    text: str
+    score: float
+
+
+class SnippetIndex:
+    """Inverted index of the snippets of one company's cached search results."""
+    
+    def __init__(self, results: Dict[str, str]):
+        """
+        Build the index.
+        
+        Args:
+            results: Cached query -> search result (aggregated results from
+                     older versions are skipped)
+        """
+        self._snippets: List[Tuple[str, str]] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        seen = set()
+        for query, result in results.items():
+            if result.startswith(AGGREGATE_PREFIX):
+                continue
+            for text in split_snippets(result):
+                if text in seen:
+                    continue
+                seen.add(text)
+                terms = Counter(tokenize(text))
+                if not terms:
+                    continue
+                doc_id = len(self._snippets)
+                self._snippets.append((query, text))
+                self._lengths.append(sum(terms.values()))
+                for term, frequency in terms.items():
+                    self._postings.setdefault(term, []).append((doc_id, frequency))
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+    
+    def __len__(self) -> int:
+        return len(self._snippets)
+    
+    def search(self, query: str, ignore_terms: Iterable[str] = ()) -> List[Snippet]:
+        """
+        Rank snippets against a query with BM25.
+        
+        Args:
+            query: Search query
+            ignore_terms: Query terms that carry no relevance (e.g. the company name)
+            
+        Returns:
+            Snippets containing more than MIN_TERM_COVERAGE of the query
+            terms, best first
+        """
+        ignored = set(ignore_terms)
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term not in ignored]
+        count = len(self._snippets)
+        scores: Dict[int, float] = {}
+        matched: Counter = Counter()
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / self._average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                matched[doc_id] += 1
+        ranked = sorted(
+            ((doc_id, score) for doc_id, score in scores.items() if matched[doc_id] > MIN_TERM_COVERAGE * len(terms)),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return [Snippet(*self._snippets[doc_id], score=score) for doc_id, score in ranked]
+
+
+def select_snippets(ranked: Sequence[Snippet], top_k: int, max_tokens: int) -> List[Snippet]:
+    """Take the best snippets, at most top_k and within max_tokens in total."""
+    selected: List[Snippet] = []
+    used = 0
+    for snippet in ranked:
+        if len(selected) >= top_k:
+            break
+        tokens = count_tokens(snippet.text)
+        if used + tokens > max_tokens:
+            continue
+        selected.append(snippet)
+        used += tokens
+    return selected
@@ -57,6 +57,17 @@ def get_env_int(var_name: str, default: int) -> int:
         return default
 
 
+def get_env_float(var_name: str, default: float) -> float:
+    """Read float values from environment variables."""
+    value = os.getenv(var_name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
 def get_env_str(var_name: str, default: Optional[str] = None) -> Optional[str]:
     """Read string values from environment variables."""
     return os.getenv(var_name, default)
@@ -65,11 +76,83 @@ def get_env_str(var_name: str, default: Optional[str] = None) -> Optional[str]:
 # Search configuration defaults
 DEFAULT_ENABLE_INTERNET_SEARCH = True
 DEFAULT_SEARCH_PROVIDER = "tavily"  # Falls back to "duckduckgo" if Tavily API key not available
+# Per-analysis search limits of the async agent (concurrent provider calls, total time waiting for searches)
+DEFAULT_SEARCH_MAX_PARALLEL = 4
+DEFAULT_SEARCH_DEADLINE_SECONDS = 30.0
+# Per-provider timeouts, and hedging (fire the other provider when the first is slower than its p90)
+DEFAULT_TAVILY_TIMEOUT_SECONDS = 15.0
+DEFAULT_DUCKDUCKGO_TIMEOUT_SECONDS = 10.0
+DEFAULT_SEARCH_HEDGE = False
+DEFAULT_SEARCH_HEDGE_DELAY_SECONDS = 2.0
+# Token budget of search results shown to the agent (per call, per analysis; 0 = no limit)
+DEFAULT_SEARCH_OBSERVATION_TOKENS = 500
+DEFAULT_SEARCH_OBSERVATION_BUDGET_TOKENS = 2000
+# Search for data missing from the page before the LLM call (skipping the agent when nothing is missing)
+DEFAULT_ENABLE_GAP_DETECTION = True
+DEFAULT_SEARCH_PREFETCH_MAX_QUERIES = 6
 
 # Cache configuration defaults
 DEFAULT_ENABLE_CACHE = True
 DEFAULT_CACHE_TTL_HOURS = 24
 DEFAULT_CACHE_DIR = "./cache"
+DEFAULT_SCREENER_CACHE_TTL_MINUTES = 60
+
+# Search cache in-memory hot tier and expiry sweeper
+DEFAULT_SEARCH_CACHE_HOT_ENTRIES = 256
+DEFAULT_SEARCH_CACHE_SWEEP_MINUTES = 10
+# Cached snippets returned for a query not searched before (count and token budget)
+DEFAULT_SEARCH_CACHE_TOP_K = 5
+DEFAULT_SEARCH_CACHE_MAX_TOKENS = 800
+
+# LLM result cache defaults
+DEFAULT_RESULT_CACHE_TTL_HOURS = 24
+DEFAULT_RESULT_CACHE_MAX_ENTRIES = 512
+DEFAULT_RESULT_CACHE_MAX_MB = 32
+
+# Extraction cache defaults (memory LRU, optional disk tier under CACHE_DIR/extraction)
+DEFAULT_EXTRACTION_CACHE_MAX_ENTRIES = 256
+DEFAULT_EXTRACTION_CACHE_MAX_MB = 64
+DEFAULT_EXTRACTION_CACHE_DISK = False
+DEFAULT_EXTRACTION_CACHE_DISK_MAX_MB = 256
+
+# Screener client defaults
+DEFAULT_SCREENER_RATE_PER_SECOND = 1.0
+DEFAULT_SCREENER_RATE_BURST = 3
+DEFAULT_SCREENER_MAX_RETRIES = 3
+DEFAULT_SCREENER_BREAKER_THRESHOLD = 5
+DEFAULT_SCREENER_BREAKER_RESET_SECONDS = 60
+
+
+# LLM connection pool defaults (shared OpenAI clients, see llm_clients.py)
+DEFAULT_LLM_POOL_MAX_CONNECTIONS = 100
+DEFAULT_LLM_POOL_MAX_KEEPALIVE = 20
+DEFAULT_LLM_POOL_KEEPALIVE_SECONDS = 120.0
+DEFAULT_LLM_WARMUP = True
+
+# Tokenizer used for models tiktoken does not know (e.g. local models)
+DEFAULT_TOKENIZER_ENCODING = "o200k_base"
+
+# Context fitting: shrink the financial data to fit max_context, keeping at least this room for search results
+DEFAULT_CONTEXT_AUTO_FIT = True
+DEFAULT_CONTEXT_TOOL_RESERVE_TOKENS = 512
+
+# HTML parser backend: "auto", "selectolax", "lxml" or "html.parser"
+DEFAULT_HTML_PARSER_BACKEND = "auto"
+DEFAULT_HTML_PARTIAL_PARSE = True
+
+# Job queue defaults
+DEFAULT_JOBS_DB_PATH = "./cache/jobs.db"
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_POLL_SECONDS = 1
+# Heartbeat lease of a worker process, and runs of a job before it is given up
+DEFAULT_JOB_LEASE_SECONDS = 60
+DEFAULT_JOB_MAX_ATTEMPTS = 3
+
+# Batch analysis defaults
+DEFAULT_BATCH_MAX_COMPANIES = 500
+DEFAULT_BATCH_FETCH_CONCURRENCY = 4
+DEFAULT_BATCH_SEARCH_CONCURRENCY = 8
+DEFAULT_BATCH_LLM_CONCURRENCY = 8
 
 
 def get_search_config() -> tuple[bool, str, Optional[str]]:
@@ -86,6 +169,60 @@ def get_search_config() -> tuple[bool, str, Optional[str]]:
     return enable_search, provider, api_key
 
 
+def get_search_limits_config() -> tuple[int, float]:
+    """
+    Get per-analysis search limits.
+    
+    Returns:
+        Tuple of (max_parallel, deadline_seconds)
+    """
+    max_parallel = get_env_int("SEARCH_MAX_PARALLEL", DEFAULT_SEARCH_MAX_PARALLEL)
+    deadline_seconds = get_env_float("SEARCH_DEADLINE_SECONDS", DEFAULT_SEARCH_DEADLINE_SECONDS)
+    
+    return max_parallel, deadline_seconds
+
+
+def get_search_provider_config() -> tuple[float, float, bool, float]:
+    """
+    Get search provider timeouts and hedging configuration.
+    
+    Returns:
+        Tuple of (tavily_timeout, duckduckgo_timeout, hedge, hedge_delay_seconds)
+    """
+    tavily_timeout = get_env_float("TAVILY_TIMEOUT_SECONDS", DEFAULT_TAVILY_TIMEOUT_SECONDS)
+    duckduckgo_timeout = get_env_float("DUCKDUCKGO_TIMEOUT_SECONDS", DEFAULT_DUCKDUCKGO_TIMEOUT_SECONDS)
+    hedge = get_env_bool("SEARCH_HEDGE", DEFAULT_SEARCH_HEDGE)
+    hedge_delay = get_env_float("SEARCH_HEDGE_DELAY_SECONDS", DEFAULT_SEARCH_HEDGE_DELAY_SECONDS)
+    
+    return tavily_timeout, duckduckgo_timeout, hedge, hedge_delay
+
+
+def get_observation_budget_config() -> tuple[int, int]:
+    """
+    Get the token budget of search results shown to the agent.
+    
+    Returns:
+        Tuple of (per_call_tokens, request_tokens)
+    """
+    per_call_tokens = get_env_int("SEARCH_OBSERVATION_TOKENS", DEFAULT_SEARCH_OBSERVATION_TOKENS)
+    request_tokens = get_env_int("SEARCH_OBSERVATION_BUDGET_TOKENS", DEFAULT_SEARCH_OBSERVATION_BUDGET_TOKENS)
+    
+    return per_call_tokens, request_tokens
+
+
+def get_gap_detection_config() -> tuple[bool, int]:
+    """
+    Get gap detection and search prefetch configuration.
+    
+    Returns:
+        Tuple of (enabled, max_prefetch_queries)
+    """
+    enabled = get_env_bool("ENABLE_GAP_DETECTION", DEFAULT_ENABLE_GAP_DETECTION)
+    max_queries = get_env_int("SEARCH_PREFETCH_MAX_QUERIES", DEFAULT_SEARCH_PREFETCH_MAX_QUERIES)
+    
+    return enabled, max_queries
+
+
 def get_cache_config() -> tuple[bool, str, int]:
     """
     Get cache configuration.
@@ -100,6 +237,162 @@ def get_cache_config() -> tuple[bool, str, int]:
     return enabled, cache_dir, ttl_hours
 
 
+def get_search_cache_config() -> tuple[int, float, int, int]:
+    """
+    Get search cache hot tier, sweeper and snippet retrieval configuration.
+    
+    Returns:
+        Tuple of (hot_max_entries, sweep_minutes, snippet_top_k, snippet_max_tokens)
+    """
+    hot_max_entries = get_env_int("SEARCH_CACHE_HOT_ENTRIES", DEFAULT_SEARCH_CACHE_HOT_ENTRIES)
+    sweep_minutes = get_env_float("SEARCH_CACHE_SWEEP_MINUTES", DEFAULT_SEARCH_CACHE_SWEEP_MINUTES)
+    snippet_top_k = get_env_int("SEARCH_CACHE_TOP_K", DEFAULT_SEARCH_CACHE_TOP_K)
+    snippet_max_tokens = get_env_int("SEARCH_CACHE_MAX_TOKENS", DEFAULT_SEARCH_CACHE_MAX_TOKENS)
+    
+    return hot_max_entries, sweep_minutes, snippet_top_k, snippet_max_tokens
+
+
+def get_screener_cache_config() -> tuple[bool, str, int]:
+    """
+    Get Screener HTML cache configuration.
+    
+    Returns:
+        Tuple of (enabled, cache_dir, ttl_minutes)
+    """
+    enabled = get_env_bool("ENABLE_SCREENER_CACHE", DEFAULT_ENABLE_CACHE)
+    cache_dir = get_env_str("CACHE_DIR", DEFAULT_CACHE_DIR) or DEFAULT_CACHE_DIR
+    ttl_minutes = get_env_int("SCREENER_CACHE_TTL_MINUTES", DEFAULT_SCREENER_CACHE_TTL_MINUTES)
+    
+    return enabled, cache_dir, ttl_minutes
+
+
+def get_result_cache_config() -> tuple[bool, float, int, int]:
+    """
+    Get LLM result cache configuration.
+    
+    Returns:
+        Tuple of (enabled, ttl_hours, max_entries, max_mb)
+    """
+    enabled = get_env_bool("ENABLE_RESULT_CACHE", DEFAULT_ENABLE_CACHE)
+    ttl_hours = get_env_float("RESULT_CACHE_TTL_HOURS", DEFAULT_RESULT_CACHE_TTL_HOURS)
+    max_entries = get_env_int("RESULT_CACHE_MAX_ENTRIES", DEFAULT_RESULT_CACHE_MAX_ENTRIES)
+    max_mb = get_env_int("RESULT_CACHE_MAX_MB", DEFAULT_RESULT_CACHE_MAX_MB)
+    
+    return enabled, ttl_hours, max_entries, max_mb
+
+
+def get_extraction_cache_config() -> tuple[bool, int, int, Optional[str], int]:
+    """
+    Get extraction cache configuration.
+    
+    Returns:
+        Tuple of (enabled, max_entries, max_mb, disk_cache_dir, disk_max_mb);
+        disk_cache_dir is None when the disk tier is disabled
+    """
+    enabled = get_env_bool("ENABLE_EXTRACTION_CACHE", DEFAULT_ENABLE_CACHE)
+    max_entries = get_env_int("EXTRACTION_CACHE_MAX_ENTRIES", DEFAULT_EXTRACTION_CACHE_MAX_ENTRIES)
+    max_mb = get_env_int("EXTRACTION_CACHE_MAX_MB", DEFAULT_EXTRACTION_CACHE_MAX_MB)
+    disk_cache_dir = None
+    if get_env_bool("EXTRACTION_CACHE_DISK", DEFAULT_EXTRACTION_CACHE_DISK):
+        disk_cache_dir = get_env_str("CACHE_DIR", DEFAULT_CACHE_DIR) or DEFAULT_CACHE_DIR
+    disk_max_mb = get_env_int("EXTRACTION_CACHE_DISK_MAX_MB", DEFAULT_EXTRACTION_CACHE_DISK_MAX_MB)
+    
+    return enabled, max_entries, max_mb, disk_cache_dir, disk_max_mb
+
+
+def get_screener_client_config() -> tuple[float, int, int, int, float]:
+    """
+    Get Screener HTTP client configuration.
+    
+    Returns:
+        Tuple of (rate_per_second, burst, max_retries, breaker_threshold, breaker_reset_seconds)
+    """
+    rate = get_env_float("SCREENER_RATE_PER_SECOND", DEFAULT_SCREENER_RATE_PER_SECOND)
+    burst = get_env_int("SCREENER_RATE_BURST", DEFAULT_SCREENER_RATE_BURST)
+    max_retries = get_env_int("SCREENER_MAX_RETRIES", DEFAULT_SCREENER_MAX_RETRIES)
+    breaker_threshold = get_env_int("SCREENER_BREAKER_THRESHOLD", DEFAULT_SCREENER_BREAKER_THRESHOLD)
+    breaker_reset = get_env_float("SCREENER_BREAKER_RESET_SECONDS", DEFAULT_SCREENER_BREAKER_RESET_SECONDS)
+    
+    return rate, burst, max_retries, breaker_threshold, breaker_reset
+
+
+def get_llm_pool_config() -> tuple[int, int, float, bool]:
+    """
+    Get LLM connection pool configuration.
+    
+    Returns:
+        Tuple of (max_connections, max_keepalive_connections, keepalive_seconds, warmup)
+    """
+    max_connections = get_env_int("LLM_POOL_MAX_CONNECTIONS", DEFAULT_LLM_POOL_MAX_CONNECTIONS)
+    max_keepalive = get_env_int("LLM_POOL_MAX_KEEPALIVE", DEFAULT_LLM_POOL_MAX_KEEPALIVE)
+    keepalive_seconds = get_env_float("LLM_POOL_KEEPALIVE_SECONDS", DEFAULT_LLM_POOL_KEEPALIVE_SECONDS)
+    warmup = get_env_bool("LLM_WARMUP", DEFAULT_LLM_WARMUP)
+    
+    return max_connections, max_keepalive, keepalive_seconds, warmup
+
+
+def get_html_parser_config() -> tuple[str, bool]:
+    """
+    Get HTML parsing configuration.
+    
+    Returns:
+        Tuple of (backend_name, partial_parse)
+    """
+    backend = get_env_str("HTML_PARSER_BACKEND", DEFAULT_HTML_PARSER_BACKEND) or DEFAULT_HTML_PARSER_BACKEND
+    partial = get_env_bool("HTML_PARTIAL_PARSE", DEFAULT_HTML_PARTIAL_PARSE)
+    
+    return backend, partial
+
+
+def get_tokenizer_encoding() -> str:
+    """Get the fallback tiktoken encoding name for unknown models."""
+    return get_env_str("TOKENIZER_ENCODING", DEFAULT_TOKENIZER_ENCODING) or DEFAULT_TOKENIZER_ENCODING
+
+
+def get_context_fit_config() -> tuple[bool, int]:
+    """
+    Get context fitting configuration.
+    
+    Returns:
+        Tuple of (auto_fit, tool_reserve_tokens)
+    """
+    auto_fit = get_env_bool("CONTEXT_AUTO_FIT", DEFAULT_CONTEXT_AUTO_FIT)
+    tool_reserve = max(0, get_env_int("CONTEXT_TOOL_RESERVE_TOKENS", DEFAULT_CONTEXT_TOOL_RESERVE_TOKENS))
+    
+    return auto_fit, tool_reserve
+
+
+def get_jobs_config() -> tuple[str, int, int, int, int]:
+    """
+    Get background job queue configuration.
+    
+    Returns:
+        Tuple of (db_path, workers, poll_seconds, lease_seconds, max_attempts)
+    """
+    db_path = get_env_str("JOBS_DB_PATH", DEFAULT_JOBS_DB_PATH) or DEFAULT_JOBS_DB_PATH
+    workers = get_env_int("JOB_WORKERS", DEFAULT_JOB_WORKERS)
+    poll_seconds = get_env_int("JOB_POLL_SECONDS", DEFAULT_JOB_POLL_SECONDS)
+    lease_seconds = get_env_int("JOB_LEASE_SECONDS", DEFAULT_JOB_LEASE_SECONDS)
+    max_attempts = get_env_int("JOB_MAX_ATTEMPTS", DEFAULT_JOB_MAX_ATTEMPTS)
+    
+    return db_path, workers, poll_seconds, lease_seconds, max_attempts
+
+
+def get_batch_config() -> tuple[int, int, int, int]:
+    """
+    Get batch analysis limits.
+    
+    Returns:
+        Tuple of (max_companies, fetch_concurrency, search_concurrency, llm_concurrency)
+    """
+    max_companies = get_env_int("BATCH_MAX_COMPANIES", DEFAULT_BATCH_MAX_COMPANIES)
+    fetch_concurrency = get_env_int("BATCH_FETCH_CONCURRENCY", DEFAULT_BATCH_FETCH_CONCURRENCY)
+    search_concurrency = get_env_int("BATCH_SEARCH_CONCURRENCY", DEFAULT_BATCH_SEARCH_CONCURRENCY)
+    llm_concurrency = get_env_int("BATCH_LLM_CONCURRENCY", DEFAULT_BATCH_LLM_CONCURRENCY)
+    
+    return max_companies, fetch_concurrency, search_concurrency, llm_concurrency
+
+
 # Load environment variables on module import
 load_environment()
 
@@ -12,6 +12,9 @@ DEFAULT_REQUEST_TIMEOUT = 20  # seconds for HTTP requests
 CHARS_PER_TOKEN_CONSERVATIVE = 2.5  # For HTML content
 CHARS_PER_TOKEN_PLAIN_TEXT = 4.0  # For plain text
 
+# Financial data output formats (see financial_tables.OUTPUT_FORMATS)
+DEFAULT_OUTPUT_FORMAT = "html"
+
 # Valid sections for HTML extraction
 VALID_SECTIONS = [
     "quarters",
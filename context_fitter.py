@@ -0,0 +1,184 @@
+"""Shrink the financial data payload until the request fits the model's context window."""
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from financial_tables import FinancialTables, serialize
+from token_counter import count_tokens
+
+# Sections dropped first when years/quarters cuts are not enough (least useful first).
+# The last remaining section is never dropped.
+SECTION_DROP_ORDER = ("shareholding", "cash-flow", "quarters", "balance-sheet", "ratios", "profit-loss")
+
+# Years and quarters are cut down to these before any section is dropped
+SOFT_MIN_YEARS = 3
+SOFT_MIN_QUARTERS = 4
+
+# Per-message framing tokens added by chat templates (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass(frozen=True)
+class FitCandidate:
+    """One set of extraction options the fitter may pick."""
+    
+    max_years: int
+    max_quarters: int
+    sections: Tuple[str, ...]
+    aggressive: bool
+
+
+@dataclass
+class ContextFit:
+    """The payload chosen for a request and how it was chosen."""
+    
+    candidate: FitCandidate
+    tables: FinancialTables
+    financial_data: str
+    data_tokens: int
+    budget: int
+    applied: bool
+    candidates_evaluated: int
+    requested_tokens: int = 0
+    
+    @property
+    def fits(self) -> bool:
+        return self.data_tokens <= self.budget
+    
+    def as_metadata(self, reserved: Dict[str, int]) -> Dict[str, Any]:
+        """Summary for the response metadata (context_fit)."""
+        return {
+            "fits": self.fits,
+            "applied": self.applied,
+            "max_years": self.candidate.max_years,
+            "max_quarters": self.candidate.max_quarters,
+            "sections": list(self.candidate.sections),
+            "aggressive": self.candidate.aggressive,
+            "data_tokens": self.data_tokens,
+            "requested_tokens": self.requested_tokens,
+            "data_budget": self.budget,
+            "reserved": reserved,
+            "candidates_evaluated": self.candidates_evaluated,
+        }
+
+
+def message_tokens(messages: Optional[List[Dict[str, str]]], model: Optional[str] = None) -> int:
+    """
+    Count the tokens a list of chat messages adds to the context.
+    
+    Args:
+        messages: Messages with "role" and "content" keys (e.g. conversation history)
+        model: Model name used to select the tokenizer
+        
+    Returns:
+        Token count including per-message framing
+    """
+    return sum(
+        count_tokens(message.get("content") or "", model) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages or []
+    )
+
+
+def candidate_ladder(requested: FitCandidate, output_format: str) -> List[FitCandidate]:
+    """
+    List the payload options from richest (the request itself) to leanest.
+    
+    Each step removes content from the previous one, so token counts only
+    go down along the list. Order: aggressive mode (HTML only, it drops
+    empty cells), quarters/years down to SOFT_MIN_*, sections in
+    SECTION_DROP_ORDER, then quarters/years down to 1.
+    """
+    ladder = [requested]
+    
+    def push(**changes) -> None:
+        ladder.append(replace(ladder[-1], **changes))
+    
+    def shrink_periods(min_years: int, min_quarters: int) -> None:
+        if "quarters" not in ladder[-1].sections:
+            min_quarters = ladder[-1].max_quarters  # No table uses it any more
+        while ladder[-1].max_quarters > min_quarters or ladder[-1].max_years > min_years:
+            if ladder[-1].max_quarters > min_quarters:
+                push(max_quarters=ladder[-1].max_quarters - 1)
+            if ladder[-1].max_years > min_years:
+                push(max_years=ladder[-1].max_years - 1)
+    
+    if output_format == "html" and not requested.aggressive:
+        push(aggressive=True)
+    shrink_periods(min(requested.max_years, SOFT_MIN_YEARS), min(requested.max_quarters, SOFT_MIN_QUARTERS))
+    for section_id in SECTION_DROP_ORDER:
+        sections = ladder[-1].sections
+        if section_id in sections and len(sections) > 1:
+            push(sections=tuple(s for s in sections if s != section_id))
+    shrink_periods(1, 1)
+    return ladder
+
+
+def fit_to_context(
+    tables: FinancialTables,
+    requested: FitCandidate,
+    output_format: str,
+    budget: int,
+    model: Optional[str] = None,
+    auto_fit: bool = True
+) -> ContextFit:
+    """
+    Find the richest payload whose token count is within budget.
+    
+    The page is not parsed again: candidates are cut from the already
+    extracted tables (which must have been extracted with the requested
+    options). The ladder is binary-searched, so only a handful of candidates
+    are serialized and counted.
+    
+    Args:
+        tables: Tables extracted with the requested options
+        requested: The requested options
+        output_format: Serialization format sent to the model
+        budget: Tokens available for the financial data
+        model: Model name used to select the tokenizer
+        auto_fit: If False only the requested payload is considered
+        
+    Returns:
+        The chosen payload; if nothing fits, the leanest one tried (its
+        fits property is False)
+    """
+    ladder = candidate_ladder(requested, output_format) if auto_fit else [requested]
+    evaluated: Dict[int, ContextFit] = {}
+    
+    def evaluate(index: int) -> ContextFit:
+        if index not in evaluated:
+            candidate = ladder[index]
+            trimmed = tables if index == 0 else tables.trimmed(
+                candidate.max_years, candidate.max_quarters, candidate.sections, candidate.aggressive
+            )
+            financial_data = serialize(trimmed, output_format)
+            evaluated[index] = ContextFit(
+                candidate=candidate,
+                tables=trimmed,
+                financial_data=financial_data,
+                data_tokens=count_tokens(financial_data, model),
+                budget=budget,
+                applied=index > 0,
+                candidates_evaluated=0,
+            )
+        return evaluated[index]
+    
+    # Common case first: the request fits as is
+    if evaluate(0).fits:
+        best = evaluated[0]
+    elif not evaluate(len(ladder) - 1).fits:
+        best = evaluated[len(ladder) - 1]
+    else:
+        # Invariant: ladder[high] fits, ladder[low] does not
+        low, high = 0, len(ladder) - 1
+        while high - low > 1:
+            middle = (low + high) // 2
+            if evaluate(middle).fits:
+                high = middle
+            else:
+                low = middle
+        best = evaluated[high]
+    
+    for fit in evaluated.values():
+        fit.candidates_evaluated = len(evaluated)
+        fit.requested_tokens = evaluated[0].data_tokens
+    return best
@@ -0,0 +1,63 @@
+"""Server-sent events plumbing for streaming analysis progress."""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+# Sentinel placed on the queue once the producer is finished
+_CLOSED = object()
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a single server-sent event frame.
+
+    Args:
+        event: Event name (e.g., "token", "search", "done")
+        data: JSON-serializable payload
+
+    Returns:
+        SSE frame terminated by a blank line
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class EventStream:
+    """
+    Queue of analysis events consumed by an SSE response.
+
+    emit() may be called from the event loop or from worker threads (e.g. the
+    HTML extraction step), so events are always handed to the loop safely.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(self, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Queue an event for the client."""
+        self._put((event, data if data is not None else {}))
+
+    def close(self) -> None:
+        """Signal that no more events will be emitted."""
+        self._put(_CLOSED)
+
+    def _put(self, item: Any) -> None:
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._queue.put_nowait(item)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    async def sse(self) -> AsyncIterator[str]:
+        """Yield SSE frames until the stream is closed."""
+        while True:
+            item = await self._queue.get()
+            if item is _CLOSED:
+                return
+            event, data = item
+            yield format_sse(event, data)
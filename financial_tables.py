@@ -0,0 +1,538 @@
+"""Structured financial data extracted from a company page, and its serializers."""
+
+import math
+import re
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Matches the unit note under a section heading, e.g. "Consolidated Figures in Rs. Crores / View Standalone"
+_UNIT_RE = re.compile(r"(?:Figures|Numbers) in\s*([^/]+)", re.I)
+
+# First number in free text such as "₹ 12,00,000 Cr." or "64.3 %"
+_LOOSE_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def parse_number(text: str) -> float:
+    """
+    Parse a table cell such as "1,234", "-56.7" or "23%".
+    
+    Returns:
+        The value as a float, or NaN for blank or non-numeric cells
+    """
+    cleaned = text.replace(",", "").strip().rstrip("%").strip()
+    try:
+        return float(cleaned)
+    except ValueError:
+        return math.nan
+
+
+def parse_unit(text: Optional[str]) -> Optional[str]:
+    """Extract the unit from a section's sub-heading text."""
+    if not text:
+        return None
+    match = _UNIT_RE.search(text)
+    return match.group(1).strip() if match else None
+
+
+def columns_to_keep(section_id: str, headers: Sequence[str], max_years: int, max_quarters: int) -> List[int]:
+    """
+    Pick the header indexes to keep for a section's data table.
+    
+    Applying this to a table that was already cut down with larger limits
+    gives the same columns as cutting the original table, so payloads can be
+    shrunk without parsing the page again.
+    
+    Args:
+        section_id: Section the table belongs to (e.g. "quarters")
+        headers: Header cell texts, row-label column first
+        max_years: Years kept for annual sections (plus TTM)
+        max_quarters: Quarters kept for the quarterly results
+        
+    Returns:
+        Sorted column indexes, always including the row labels (0)
+    """
+    if section_id == 'quarters':
+        # Keep first column (row labels) + last N quarters
+        return [0] + list(range(max(1, len(headers) - max_quarters), len(headers)))
+    if section_id in ['profit-loss', 'balance-sheet', 'cash-flow', 'ratios']:
+        # Keep first column (row labels) + TTM + last N years
+        # TTM is typically the last column before the years
+        ttm_index = next((i for i, header in enumerate(headers) if header.upper() == 'TTM'), None)
+        columns = [0] if ttm_index is None else [0, ttm_index]
+        # Add last N years (excluding TTM)
+        year_cols = [i for i in range(1, len(headers)) if i != ttm_index]
+        columns.extend(year_cols[-max_years:])
+        return sorted(set(columns))
+    # For shareholding and other sections, keep all columns
+    return list(range(len(headers)))
+
+
+@dataclass
+class KeyRatio:
+    """A headline ratio from the top of the page (e.g. "Stock P/E": "28.1")."""
+    
+    name: str
+    text: str
+    
+    @property
+    def value(self) -> float:
+        """Numeric value, or NaN if the text has no number."""
+        match = _LOOSE_NUMBER_RE.search(self.text.replace(",", ""))
+        return float(match.group()) if match else math.nan
+    
+    @property
+    def is_percent(self) -> bool:
+        return self.text.rstrip().endswith("%")
+
+
+@dataclass
+class DataTable:
+    """
+    One financial table restricted to the kept columns.
+    
+    headers and rows keep the cell text exactly as extracted (row label
+    first); values holds the numbers aligned to periods.
+    """
+    
+    headers: Optional[List[str]]
+    rows: Optional[List[List[str]]]
+    values: np.ndarray = field(default_factory=lambda: np.empty((0, 0)))
+    percent_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    
+    @classmethod
+    def from_cells(cls, headers: Optional[List[str]], rows: Optional[List[List[str]]]) -> "DataTable":
+        """Build a table from cell text, parsing the numeric columns."""
+        periods = len(headers) - 1 if headers else 0
+        body = rows or []
+        values = np.full((len(body), periods), np.nan, dtype=np.float64)
+        percent_rows = np.zeros(len(body), dtype=bool)
+        for r, row in enumerate(body):
+            cells = row[1:periods + 1]
+            values[r, :len(cells)] = [parse_number(cell) for cell in cells]
+            percent_rows[r] = bool(row) and ("%" in row[0] or any(cell.endswith("%") for cell in cells))
+        return cls(headers=headers, rows=rows, values=values, percent_rows=percent_rows)
+    
+    @property
+    def periods(self) -> List[str]:
+        """Column headers after the row-label column (e.g. "Mar 2024", "TTM")."""
+        return self.headers[1:] if self.headers else []
+    
+    @property
+    def row_labels(self) -> List[str]:
+        """Row labels without Screener's expand marker (e.g. "Sales+" -> "Sales")."""
+        return [row[0].rstrip("+").strip() if row else "" for row in self.rows or []]
+    
+    def series(self, label: str) -> Optional[np.ndarray]:
+        """Values for the first row with the given label, or None."""
+        try:
+            return self.values[self.row_labels.index(label)]
+        except ValueError:
+            return None
+    
+    def select_columns(self, columns: Sequence[int]) -> "DataTable":
+        """Return a table with only the given column indexes (0 is the row label)."""
+        if self.headers is None:
+            return self
+        headers = [self.headers[i] for i in columns if i < len(self.headers)]
+        rows = None
+        if self.rows is not None:
+            rows = [[row[i] for i in columns if i < len(row)] for row in self.rows]
+        return DataTable.from_cells(headers, rows)
+
+
+@dataclass
+class GrowthTable:
+    """A small growth/returns table such as "Compounded Sales Growth"."""
+    
+    rows: List[List[str]]
+    
+    @property
+    def title(self) -> Optional[str]:
+        return self.rows[0][0] if self.rows and len(self.rows[0]) == 1 else None
+    
+    @property
+    def ranges(self) -> Dict[str, float]:
+        """Period -> value, e.g. {"10 Years": 11.0, "TTM": 7.0}."""
+        return {
+            row[0].rstrip(":").strip(): parse_number(row[1])
+            for row in self.rows
+            if len(row) == 2
+        }
+
+
+@dataclass
+class FinancialSection:
+    """One <section> of the page (quarters, profit-loss, ...)."""
+    
+    section_id: str
+    title: Optional[str] = None
+    unit: Optional[str] = None
+    tables: List[DataTable] = field(default_factory=list)
+    growth_tables: List[GrowthTable] = field(default_factory=list)
+    view: Optional[str] = None  # Screener view the section came from, set when views are merged
+    
+    @property
+    def label(self) -> Optional[str]:
+        """Title with the view, e.g. "Profit & Loss (Consolidated)"."""
+        if self.view is None:
+            return self.title
+        return f"{self.title or self.section_id} ({self.view.capitalize()})"
+
+
+@dataclass
+class FinancialTables:
+    """
+    Everything extracted from a company page.
+    
+    Optional fields are None when the page has no such element (as opposed
+    to an empty list when the element exists but is empty).
+    """
+    
+    company_name: Optional[str] = None
+    key_ratios: Optional[List[KeyRatio]] = None
+    about: Optional[str] = None
+    pros: Optional[List[str]] = None
+    cons: Optional[List[str]] = None
+    sections: List[FinancialSection] = field(default_factory=list)
+    aggressive: bool = False
+    
+    def section(self, section_id: str) -> Optional[FinancialSection]:
+        """Return the section with the given id, or None."""
+        return next((s for s in self.sections if s.section_id == section_id), None)
+    
+    def trimmed(
+        self,
+        max_years: int,
+        max_quarters: int,
+        sections: Optional[Sequence[str]] = None,
+        aggressive: Optional[bool] = None
+    ) -> "FinancialTables":
+        """
+        Return a smaller copy, as if the page had been extracted with these options.
+        
+        Limits larger than the ones used at extraction have no effect; the
+        summary fields are shared with this instance.
+        
+        Args:
+            max_years: Years kept for annual sections
+            max_quarters: Quarters kept for the quarterly results
+            sections: Section ids to keep (None keeps all)
+            aggressive: Aggressive rendering flag (None keeps the current one)
+        """
+        kept = []
+        for section in self.sections:
+            if sections is not None and section.section_id not in sections:
+                continue
+            kept.append(replace(section, tables=[
+                table.select_columns(
+                    columns_to_keep(section.section_id, table.headers, max_years, max_quarters)
+                ) if table.headers is not None else table
+                for table in section.tables
+            ]))
+        return replace(
+            self,
+            sections=kept,
+            aggressive=self.aggressive if aggressive is None else aggressive,
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain JSON-compatible form (numeric values are rebuilt from the cell text)."""
+        return {
+            "company_name": self.company_name,
+            "key_ratios": None if self.key_ratios is None else [[r.name, r.text] for r in self.key_ratios],
+            "about": self.about,
+            "pros": self.pros,
+            "cons": self.cons,
+            "aggressive": self.aggressive,
+            "sections": [
+                {
+                    "section_id": section.section_id,
+                    "title": section.title,
+                    "unit": section.unit,
+                    "view": section.view,
+                    "tables": [{"headers": table.headers, "rows": table.rows} for table in section.tables],
+                    "growth_tables": [growth.rows for growth in section.growth_tables],
+                }
+                for section in self.sections
+            ],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FinancialTables":
+        """Inverse of to_dict."""
+        key_ratios = data.get("key_ratios")
+        return cls(
+            company_name=data.get("company_name"),
+            key_ratios=None if key_ratios is None else [KeyRatio(name, text) for name, text in key_ratios],
+            about=data.get("about"),
+            pros=data.get("pros"),
+            cons=data.get("cons"),
+            aggressive=data.get("aggressive", False),
+            sections=[
+                FinancialSection(
+                    section_id=section["section_id"],
+                    title=section.get("title"),
+                    unit=section.get("unit"),
+                    tables=[DataTable.from_cells(t.get("headers"), t.get("rows")) for t in section.get("tables", [])],
+                    growth_tables=[GrowthTable(rows=rows) for rows in section.get("growth_tables", [])],
+                    view=section.get("view"),
+                )
+                for section in data.get("sections", [])
+            ],
+        )
+
+
+def to_html(tables: FinancialTables) -> str:
+    """
+    Render the model as the minimal HTML document sent to the LLM.
+    
+    In aggressive mode empty cells are dropped from table rows.
+    
+    Returns:
+        Cleaned HTML string containing only financial data
+    """
+    html_parts = ['<html><body>']
+    
+    if tables.company_name is not None:
+        html_parts.append(f'<h1>{tables.company_name}</h1>')
+    
+    if tables.key_ratios is not None:
+        html_parts.append('<h2>Key Ratios</h2><ul>')
+        for ratio in tables.key_ratios:
+            html_parts.append(f'<li>{ratio.name}: {ratio.text}</li>')
+        html_parts.append('</ul>')
+    
+    if tables.about is not None:
+        html_parts.append('<h2>About</h2>')
+        html_parts.append(f'<p>{tables.about}</p>')
+    
+    if tables.pros is not None or tables.cons is not None:
+        html_parts.append('<h2>Analysis</h2>')
+        for heading, items in (('Pros', tables.pros), ('Cons', tables.cons)):
+            if items is not None:
+                html_parts.append(f'<h3>{heading}</h3><ul>')
+                for item in items:
+                    html_parts.append(f'<li>{item}</li>')
+                html_parts.append('</ul>')
+    
+    for section in tables.sections:
+        if section.label is not None:
+            html_parts.append(f'<h2>{section.label}</h2>')
+        
+        for table in section.tables:
+            html_parts.append('<table>')
+            if table.headers is not None:
+                html_parts.append('<thead><tr>')
+                for header in table.headers:
+                    html_parts.append(f'<th>{header}</th>')
+                html_parts.append('</tr></thead>')
+                if table.rows is not None:
+                    html_parts.append('<tbody>')
+                    for row in table.rows:
+                        html_parts.append('<tr>')
+                        for cell in row:
+                            # Skip empty cells in aggressive mode
+                            if not (tables.aggressive and not cell):
+                                html_parts.append(f'<td>{cell}</td>')
+                        html_parts.append('</tr>')
+                    html_parts.append('</tbody>')
+            html_parts.append('</table>')
+        
+        if section.growth_tables:
+            html_parts.append('<h3>Growth Metrics</h3>')
+            for growth in section.growth_tables:
+                html_parts.append('<table>')
+                for row in growth.rows:
+                    html_parts.append('<tr>')
+                    for cell in row:
+                        html_parts.append(f'<td>{cell}</td>')
+                    html_parts.append('</tr>')
+                html_parts.append('</table>')
+    
+    html_parts.append('</body></html>')
+    
+    return ''.join(html_parts)
+
+
+def _summary_lines(tables: FinancialTables, level: int = 1) -> List[str]:
+    """Company name, key ratios, about and pros/cons as text lines with markdown-style headings."""
+    def heading(depth: int, text: str) -> str:
+        hashes = "#" * (level + depth - 1)
+        return f"{hashes} {text}" if hashes else text
+    
+    lines = []
+    if tables.company_name is not None:
+        lines.append(heading(1, tables.company_name))
+    if tables.key_ratios is not None:
+        lines.append(heading(2, "Key Ratios"))
+        lines.extend(f"- {ratio.name}: {ratio.text}" for ratio in tables.key_ratios)
+    if tables.about is not None:
+        lines.append(heading(2, "About"))
+        lines.append(tables.about)
+    if tables.pros is not None or tables.cons is not None:
+        lines.append(heading(2, "Analysis"))
+        for label, items in (("Pros", tables.pros), ("Cons", tables.cons)):
+            if items is not None:
+                lines.append(heading(3, label))
+                lines.extend(f"- {item}" for item in items)
+    return lines
+
+
+def _section_heading(section: FinancialSection) -> str:
+    title = section.label if section.label is not None else section.section_id
+    return f"{title} ({section.unit})" if section.unit else title
+
+
+def _growth_line(growth: GrowthTable) -> str:
+    cells = ["".join(row) if len(row) != 2 else f"{row[0].rstrip(':')}: {row[1]}" for row in growth.rows]
+    title = growth.title
+    if title is not None:
+        return f"{title}: " + "; ".join(cells[1:])
+    return "; ".join(cells)
+
+
+def to_markdown(tables: FinancialTables) -> str:
+    """Render the model as markdown with pipe-delimited tables."""
+    lines = _summary_lines(tables)
+    for section in tables.sections:
+        lines.append(f"## {_section_heading(section)}")
+        for table in section.tables:
+            if table.headers is None:
+                continue
+            lines.append("| " + " | ".join(table.headers) + " |")
+            lines.append("|" + "---|" * len(table.headers))
+            for label, row in zip(table.row_labels, table.rows or []):
+                lines.append("| " + " | ".join([label] + row[1:]) + " |")
+        if section.growth_tables:
+            lines.append("### Growth Metrics")
+            lines.extend(f"- {_growth_line(growth)}" for growth in section.growth_tables)
+    return "\n".join(lines)
+
+
+def to_tsv(tables: FinancialTables) -> str:
+    """Render the model with tab-separated tables."""
+    lines = _summary_lines(tables)
+    for section in tables.sections:
+        lines.append(f"## {_section_heading(section)}")
+        for table in section.tables:
+            if table.headers is None:
+                continue
+            lines.append("\t".join(table.headers))
+            for label, row in zip(table.row_labels, table.rows or []):
+                lines.append("\t".join([label] + row[1:]))
+        if section.growth_tables:
+            lines.append("### Growth Metrics")
+            lines.extend(_growth_line(growth) for growth in section.growth_tables)
+    return "\n".join(lines)
+
+
+def _compact_value(value: float) -> str:
+    if math.isnan(value):
+        return ""
+    # int() raises on inf, so only finite values are checked for being whole
+    return f"{value:.0f}" if math.isfinite(value) and value == int(value) else f"{value:g}"
+
+
+def to_compact(tables: FinancialTables) -> str:
+    """
+    Render the model as "label: v1,v2,..." series, one row per line.
+    
+    Numbers lose thousands separators and "%" signs (percentage rows are
+    marked once in the label), which is where most tokens go in the other
+    formats.
+    """
+    lines = ["Format: each row is 'label: values' in the order of the periods line; empty = not reported."]
+    lines.extend(_summary_lines(tables, level=0))
+    for section in tables.sections:
+        lines.append(f"# {_section_heading(section)}")
+        for table in section.tables:
+            if table.headers is None:
+                continue
+            lines.append("periods: " + ",".join(table.periods))
+            for label, values, is_percent in zip(table.row_labels, table.values, table.percent_rows):
+                if is_percent and "%" not in label:
+                    label += " %"
+                lines.append(f"{label}: " + ",".join(_compact_value(v) for v in values))
+        for growth in section.growth_tables:
+            lines.append(_growth_line(growth))
+    return "\n".join(lines)
+
+
+def _section_content(section: FinancialSection) -> tuple:
+    return (
+        section.title,
+        section.unit,
+        [(table.headers, table.rows) for table in section.tables],
+        [growth.rows for growth in section.growth_tables],
+    )
+
+
+def merge_views(views: Dict[str, FinancialTables]) -> FinancialTables:
+    """
+    Combine the extractions of several Screener views of one company.
+    
+    Sections are grouped by section id (in page order) and labelled with
+    the view they came from; a section identical in every view that has
+    it (e.g. shareholding) is kept once, unlabelled. Company name, about
+    and pros/cons come from the first view, as do the key ratios; key
+    ratios that differ in a later view are added with the view in their
+    name (e.g. "ROCE (Standalone)").
+    
+    Args:
+        views: View name -> extracted tables, first view first
+        
+    Returns:
+        Merged tables (the only view's tables unchanged if there is one)
+    """
+    if len(views) == 1:
+        return next(iter(views.values()))
+    names = list(views)
+    first = views[names[0]]
+    
+    key_ratios = list(first.key_ratios) if first.key_ratios is not None else None
+    for name in names[1:]:
+        known = {(ratio.name, ratio.text) for ratio in key_ratios or []}
+        for ratio in views[name].key_ratios or []:
+            if (ratio.name, ratio.text) not in known:
+                key_ratios = key_ratios or []
+                key_ratios.append(KeyRatio(name=f"{ratio.name} ({name.capitalize()})", text=ratio.text))
+    
+    section_ids = list(dict.fromkeys(
+        section.section_id for tables in views.values() for section in tables.sections
+    ))
+    sections = []
+    for section_id in section_ids:
+        present = [(name, views[name].section(section_id)) for name in names if views[name].section(section_id)]
+        if len({repr(_section_content(section)) for _, section in present}) == 1:
+            sections.append(present[0][1])
+        else:
+            sections.extend(replace(section, view=name) for name, section in present)
+    
+    return replace(first, key_ratios=key_ratios, sections=sections)
+
+
+# Serializers selectable with the output_format request parameter
+OUTPUT_FORMATS = {
+    "html": to_html,
+    "markdown": to_markdown,
+    "tsv": to_tsv,
+    "compact": to_compact,
+}
+
+
+def serialize(tables: FinancialTables, output_format: str = "html") -> str:
+    """
+    Render the model in one of OUTPUT_FORMATS.
+    
+    Raises:
+        ValueError: If the format is unknown
+    """
+    try:
+        serializer = OUTPUT_FORMATS[output_format]
+    except KeyError:
+        raise ValueError(
+            f"Unknown output format '{output_format}'. Valid formats: {', '.join(OUTPUT_FORMATS)}"
+        ) from None
+    return serializer(tables)
@@ -2,8 +2,9 @@ import { useState, useEffect } from 'react'
 import DOMPurify from 'dompurify'
 import { marked } from 'marked'
 import './App.css'
-import { API_URL, PROMPTS_URL, REQUEST_TIMEOUT_MS, DEFAULT_PROMPT } from './constants'
+import { STREAM_URL, PROMPTS_URL, REQUEST_TIMEOUT_MS, DEFAULT_PROMPT } from './constants'
 import { toSections } from './utils/formatting'
+import { readSseStream } from './utils/sse'
 
 function App() {
   const [company, setCompany] = useState('')
@@ -13,6 +14,8 @@ function App() {
   const [meta, setMeta] = useState({})
   const [error, setError] = useState('')
   const [isLoading, setIsLoading] = useState(false)
+  const [statusMessage, setStatusMessage] = useState('')
+  const [searches, setSearches] = useState([])
 
   // Fetch available prompts on component mount
   useEffect(() => {
@@ -47,13 +50,15 @@ function App() {
     setError('')
     setSections([])
     setMeta({})
+    setStatusMessage('')
+    setSearches([])
+
+    // Create an AbortController for timeout handling
+    const controller = new AbortController()
+    const timeoutId = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS)
 
     try {
-      // Create an AbortController for timeout handling
-      const controller = new AbortController()
-      const timeoutId = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS)
-      
-      const response = await fetch(API_URL, {
+      const response = await fetch(STREAM_URL, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -62,19 +67,41 @@ function App() {
         }),
         signal: controller.signal,
       })
-      
-      clearTimeout(timeoutId)
 
       if (!response.ok) {
         const message = await response.text()
         throw new Error(message || 'Analysis failed')
       }
 
-      const data = await response.json()
-      setSections(toSections(data?.analysis || data))
-      if (data && typeof data === 'object') {
-        const { analysis, ...rest } = data
-        setMeta(rest)
+      // Render sections progressively as tokens arrive
+      let streamedText = ''
+      let streamError = null
+      await readSseStream(response, (event, data) => {
+        if (event === 'status') {
+          setStatusMessage(data?.message || '')
+          if (data?.stage === 'fallback') {
+            // The agent failed mid-answer; the retry streams a fresh answer
+            streamedText = ''
+            setSections([])
+          }
+        } else if (event === 'search') {
+          setSearches((previous) => [...previous, data])
+        } else if (event === 'token') {
+          streamedText += data?.text || ''
+          setSections(toSections(streamedText))
+        } else if (event === 'done') {
+          setSections(toSections(data?.analysis || data?.preview || data))
+          if (data && typeof data === 'object') {
+            const { analysis, ...rest } = data
+            setMeta(rest)
+          }
+          setStatusMessage('')
+        } else if (event === 'error') {
+          streamError = data?.detail || 'Analysis failed'
+        }
+      })
+      if (streamError) {
+        throw new Error(streamError)
       }
     } catch (err) {
       if (err.name === 'AbortError') {
@@ -85,6 +112,7 @@ function App() {
         setError(err.message || 'Something went wrong')
       }
     } finally {
+      clearTimeout(timeoutId)
       setIsLoading(false)
     }
   }
@@ -139,6 +167,19 @@ function App() {
           </div>
         </form>
         {error && <p className="status error">{error}</p>}
+        {isLoading && statusMessage && <p className="status">{statusMessage}…</p>}
+        {searches.length > 0 && (
+          <ul className="search-events">
+            {searches.map((search, index) => (
+              <li key={`${search.query}-${index}`}>
+                <span className={`badge ${search.cache === 'hit' ? '' : 'subtle'}`}>
+                  {search.cache === 'hit' ? 'cached' : 'searching'}
+                </span>
+                {search.query}
+              </li>
+            ))}
+          </ul>
+        )}
 
         <section className="analysis-block">
           <header>
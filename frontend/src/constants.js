@@ -2,6 +2,7 @@
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 export const API_URL = `${API_BASE_URL}/analyze`
+export const STREAM_URL = `${API_BASE_URL}/analyze/stream`
 export const PROMPTS_URL = `${API_BASE_URL}/prompts`
 
 // Request timeout in milliseconds (5 minutes)
@@ -0,0 +1,52 @@
+/** Helpers for reading server-sent events from a fetch() response. */
+
+/**
+ * Parse a single SSE frame into its event name and JSON payload.
+ * @param {string} frame - Raw frame text (without the trailing blank line)
+ * @returns {{event: string, data: *}|null} Parsed event, or null for comments/empty frames
+ */
+export const parseSseFrame = (frame) => {
+  let event = 'message'
+  const dataLines = []
+  frame.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim()
+    } else if (line.startsWith('data:')) {
+      dataLines.push(line.slice(5).trimStart())
+    }
+  })
+  if (dataLines.length === 0) return null
+  const raw = dataLines.join('\n')
+  try {
+    return { event, data: JSON.parse(raw) }
+  } catch {
+    return { event, data: raw }
+  }
+}
+
+/**
+ * Read an SSE response body, invoking onEvent for every complete frame.
+ * EventSource only supports GET, so POST streams are read manually.
+ * @param {Response} response - fetch() response with a streaming body
+ * @param {(event: string, data: *) => void} onEvent - Callback per event
+ * @returns {Promise<void>} Resolves when the stream ends
+ */
+export const readSseStream = async (response, onEvent) => {
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, '\n')
+
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const parsed = parseSseFrame(buffer.slice(0, boundary))
+      buffer = buffer.slice(boundary + 2)
+      if (parsed) onEvent(parsed.event, parsed.data)
+      boundary = buffer.indexOf('\n\n')
+    }
+  }
+}
@@ -0,0 +1,132 @@
+"""Find the data a company page is missing, so it can be searched for before the LLM call."""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from constants import VALID_SECTIONS
+from financial_tables import FinancialSection, FinancialTables
+
+# Headline ratios every analysis relies on (names as shown in Screener's #top-ratios)
+EXPECTED_KEY_RATIOS = ("Market Cap", "Current Price", "Stock P/E", "Book Value", "Dividend Yield", "ROCE", "ROE")
+
+# Search phrasing for a gap (the company name is prepended); the gap name is used otherwise
+KEY_RATIO_SEARCH_TERMS = {
+    "Market Cap": "market capitalization",
+    "Current Price": "share price",
+    "Stock P/E": "P/E ratio",
+    "Book Value": "book value per share",
+    "ROCE": "ROCE ratio",
+    "ROE": "ROE ratio",
+}
+SECTION_SEARCH_TERMS = {
+    "quarters": "quarterly results",
+    "profit-loss": "profit and loss statement",
+    "balance-sheet": "balance sheet",
+    "cash-flow": "cash flow statement",
+    "ratios": "financial ratios",
+    "shareholding": "shareholding pattern",
+}
+
+# Prompt wording asking for data no company page holds, so the agent must be able to search
+_EXTERNAL_DATA_RE = re.compile(
+    r"\b(?:peers?|peer multiples|industry benchmarks?|industry averages?|sector averages?|competitors?|"
+    r"competitive advantages?|recent news|news|management quality)\b",
+    re.IGNORECASE,
+)
+
+# Cell text that means "no value"
+_EMPTY_VALUES = frozenset({"", "-", "--", "—", "n/a", "na", "not available"})
+
+
+@dataclass(frozen=True)
+class Gap:
+    """One missing piece of data: a headline ratio or a whole section."""
+    
+    kind: str  # "key_ratio" or "section"
+    name: str
+    reason: str  # "missing" (not on the page) or "empty" (present without a value)
+    
+    @property
+    def search_term(self) -> str:
+        terms = KEY_RATIO_SEARCH_TERMS if self.kind == "key_ratio" else SECTION_SEARCH_TERMS
+        return terms.get(self.name, self.name)
+    
+    def as_metadata(self) -> Dict[str, str]:
+        return {"kind": self.kind, "name": self.name, "reason": self.reason}
+
+
+def _is_empty(text: str) -> bool:
+    return text.strip().lower() in _EMPTY_VALUES
+
+
+def _section_is_empty(section: FinancialSection) -> bool:
+    """True when no data table of the section has a single value."""
+    for table in section.tables:
+        if table.values.size and not all(math.isnan(value) for value in table.values.flat):
+            return False
+    return True
+
+
+def detect_gaps(tables: FinancialTables, include_sections: Optional[Sequence[str]] = None) -> List[Gap]:
+    """
+    List the headline ratios and sections a page is missing.
+    
+    Deterministic and cheap: it only looks at the extracted tables. A key
+    ratio is a gap when it is absent from #top-ratios or has no value; a
+    requested section is a gap when the page lacks it or none of its data
+    tables has a value.
+    
+    Args:
+        tables: Tables extracted from the page
+        include_sections: Requested section ids (None = all sections)
+        
+    Returns:
+        Gaps, key ratios first, in page order
+    """
+    gaps: List[Gap] = []
+    if tables.key_ratios is None:
+        gaps.extend(Gap("key_ratio", name, "missing") for name in EXPECTED_KEY_RATIOS)
+    else:
+        present = {ratio.name for ratio in tables.key_ratios}
+        for ratio in tables.key_ratios:
+            if _is_empty(ratio.text) or math.isnan(ratio.value):
+                gaps.append(Gap("key_ratio", ratio.name, "empty"))
+        gaps.extend(Gap("key_ratio", name, "missing") for name in EXPECTED_KEY_RATIOS if name not in present)
+    
+    for section_id in include_sections or VALID_SECTIONS:
+        section = tables.section(section_id)
+        if section is None:
+            gaps.append(Gap("section", section_id, "missing"))
+        elif _section_is_empty(section):
+            gaps.append(Gap("section", section_id, "empty"))
+    return gaps
+
+
+def gap_queries(gaps: Sequence[Gap], company_name: Optional[str], max_queries: int) -> List[str]:
+    """
+    Build one search query per gap.
+    
+    Args:
+        gaps: Gaps from detect_gaps
+        company_name: Company the queries are about (no queries without one)
+        max_queries: Maximum number of queries (0 = no limit)
+        
+    Returns:
+        Queries like "TCS ROE ratio", in gap order
+    """
+    if not company_name:
+        return []
+    queries = [f"{company_name} {gap.search_term}" for gap in gaps]
+    return queries[:max_queries] if max_queries else queries
+
+
+def prompt_needs_search(prompt: str) -> bool:
+    """
+    Whether a prompt asks for data beyond the company page (peers, industry benchmarks, news, ...).
+    
+    Such data is never a gap detect_gaps can find, so a page without gaps
+    still needs the agent and its search tool.
+    """
+    return bool(_EXTERNAL_DATA_RE.search(prompt or ""))
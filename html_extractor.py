@@ -1,10 +1,48 @@
 """HTML extraction and financial data parsing."""
 
+from dataclasses import replace
 from typing import Optional
 
-from bs4 import BeautifulSoup
-
+from cache.extraction_cache import ExtractionCache, content_digest
+from config import get_extraction_cache_config, get_html_parser_config
 from constants import DEFAULT_SECTIONS
+from financial_tables import (
+    DataTable,
+    FinancialSection,
+    FinancialTables,
+    GrowthTable,
+    KeyRatio,
+    columns_to_keep,
+    parse_unit,
+    to_html,
+)
+from html_parsers import HtmlParserBackend, get_parser_backend, slice_elements
+
+# Page elements read outside the financial <section>s: (tag, id, class)
+PAGE_SUMMARY_ELEMENTS = [
+    ("h1", None, None),
+    ("ul", "top-ratios", None),
+    ("div", None, "about"),
+    ("div", None, "pros"),
+    ("div", None, "cons"),
+]
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Return the process-wide extraction cache."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        enabled, max_entries, max_mb, disk_cache_dir, disk_max_mb = get_extraction_cache_config()
+        _extraction_cache = ExtractionCache(
+            max_entries=max_entries,
+            max_bytes=max_mb * 1024 * 1024,
+            cache_dir=disk_cache_dir,
+            disk_max_bytes=disk_max_mb * 1024 * 1024,
+            enabled=enabled,
+        )
+    return _extraction_cache
 
 
 def extract_financial_data(
@@ -29,130 +67,196 @@ def extract_financial_data(
     Returns:
         Cleaned HTML string containing only financial data
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    return to_html(extract_financial_tables(
+        html_content,
+        max_years=max_years,
+        max_quarters=max_quarters,
+        include_sections=include_sections,
+        aggressive=aggressive
+    ))
+
+
+def parse_company_page(
+    html_content: str,
+    max_years: int = 5,
+    max_quarters: int = 8,
+    include_sections: Optional[list] = None,
+    aggressive: bool = False,
+    backend: Optional[HtmlParserBackend] = None,
+    partial: Optional[bool] = None,
+    use_cache: bool = True
+) -> tuple[Optional[str], str]:
+    """
+    Parse a company page once, returning its name and the extracted data.
+    
+    Args:
+        html_content: Raw HTML content from screener.in or similar source
+        max_years: Maximum number of years of historical data to include (default: 5)
+        max_quarters: Maximum number of quarters to include (default: 8)
+        include_sections: List of section IDs to include. If None, includes all sections.
+        aggressive: If True, summarize older data instead of full tables
+        backend: Parser backend (default: HTML_PARSER_BACKEND, "auto")
+        partial: Parse only the elements that are read (default: HTML_PARTIAL_PARSE, True)
+        use_cache: Reuse an earlier extraction of the same page and options
+        
+    Returns:
+        Tuple of (company_name from the <h1> or None, cleaned HTML string)
+    """
+    tables = extract_financial_tables(
+        html_content,
+        max_years=max_years,
+        max_quarters=max_quarters,
+        include_sections=include_sections,
+        aggressive=aggressive,
+        backend=backend,
+        partial=partial,
+        use_cache=use_cache
+    )
+    return tables.company_name, to_html(tables)
+
+
+def extract_financial_tables(
+    html_content: str,
+    max_years: int = 5,
+    max_quarters: int = 8,
+    include_sections: Optional[list] = None,
+    aggressive: bool = False,
+    backend: Optional[HtmlParserBackend] = None,
+    partial: Optional[bool] = None,
+    use_cache: bool = True,
+    content_hash: Optional[str] = None
+) -> FinancialTables:
+    """
+    Parse a company page into the structured FinancialTables model.
     
+    Results are memoized by page content and max_years/max_quarters/sections
+    (see get_extraction_cache); the returned tables may be shared and must
+    not be modified.
+    
+    Args:
+        html_content: Raw HTML content from screener.in or similar source
+        max_years: Maximum number of years of historical data to include (default: 5)
+        max_quarters: Maximum number of quarters to include (default: 8)
+        include_sections: List of section IDs to include. If None, includes all sections.
+        aggressive: If True, summarize older data instead of full tables
+        backend: Parser backend (default: HTML_PARSER_BACKEND, "auto")
+        partial: Parse only the elements that are read (default: HTML_PARTIAL_PARSE, True)
+        use_cache: Reuse an earlier extraction of the same page and options
+        content_hash: content_digest() of html_content if already known
+                      (e.g. from the Screener cache), to skip hashing the page
+        
+    Returns:
+        FinancialTables with the company name, key ratios, about text,
+        pros/cons and the kept columns of each section's tables
+    """
     # Default sections to keep
     sections_to_keep = include_sections if include_sections is not None else DEFAULT_SECTIONS
     
-    # Build minimal HTML structure
-    html_parts = ['<html><body>']
+    cache = get_extraction_cache() if use_cache else None
+    if cache is None or not cache.enabled:
+        return _parse_financial_tables(
+            html_content, max_years, max_quarters, sections_to_keep, aggressive, backend, partial
+        )
+    
+    key = cache.make_key(content_hash or content_digest(html_content), max_years, max_quarters, sections_to_keep)
+    tables = cache.get(key)
+    if tables is None:
+        # aggressive only changes rendering, so entries are shared by both modes
+        tables = _parse_financial_tables(
+            html_content, max_years, max_quarters, sections_to_keep, False, backend, partial
+        )
+        cache.put(key, tables)
+    return replace(tables, aggressive=True) if aggressive else tables
+
+
+def _parse_financial_tables(
+    html_content: str,
+    max_years: int,
+    max_quarters: int,
+    sections_to_keep: list,
+    aggressive: bool,
+    backend: Optional[HtmlParserBackend],
+    partial: Optional[bool]
+) -> FinancialTables:
+    """Parse the page (no caching); see extract_financial_tables."""
+    backend_name, partial_default = get_html_parser_config()
+    p = backend or get_parser_backend(backend_name)
+    
+    # Skip building DOM for everything the extractor never reads
+    fragment = None
+    if partial if partial is not None else partial_default:
+        targets = PAGE_SUMMARY_ELEMENTS + [("section", section_id, None) for section_id in sections_to_keep]
+        fragment = slice_elements(html_content, targets)
+    soup = p.parse(fragment if fragment is not None else html_content)
+    
+    result = FinancialTables(aggressive=aggressive)
     
     # Company name
-    h1 = soup.find('h1')
-    if h1:
-        html_parts.append(f'<h1>{h1.get_text(strip=True)}</h1>')
+    h1 = p.find(soup, 'h1')
+    if h1 is not None:
+        result.company_name = p.text(h1)
     
     # Key ratios
-    ratios_ul = soup.find('ul', id='top-ratios')
-    if ratios_ul:
-        html_parts.append('<h2>Key Ratios</h2><ul>')
-        for li in ratios_ul.find_all('li'):
-            name = li.find('span', class_='name')
-            value = li.find('span', class_='value')
-            if name and value:
-                html_parts.append(f'<li>{name.get_text(strip=True)}: {value.get_text(strip=True)}</li>')
-        html_parts.append('</ul>')
+    ratios_ul = p.find(soup, 'ul', id='top-ratios')
+    if ratios_ul is not None:
+        result.key_ratios = []
+        for li in p.find_all(ratios_ul, 'li'):
+            name = p.find(li, 'span', class_='name')
+            value = p.find(li, 'span', class_='value')
+            if name is not None and value is not None:
+                result.key_ratios.append(KeyRatio(name=p.text(name), text=p.text(value)))
     
     # About section
-    about = soup.find('div', class_='about')
-    if about:
-        html_parts.append('<h2>About</h2>')
-        html_parts.append(f'<p>{about.get_text(strip=True)}</p>')
+    about = p.find(soup, 'div', class_='about')
+    if about is not None:
+        result.about = p.text(about)
     
     # Pros and Cons
-    pros = soup.find('div', class_='pros')
-    cons = soup.find('div', class_='cons')
-    if pros or cons:
-        html_parts.append('<h2>Analysis</h2>')
-        if pros:
-            html_parts.append('<h3>Pros</h3><ul>')
-            for li in pros.find_all('li'):
-                html_parts.append(f'<li>{li.get_text(strip=True)}</li>')
-            html_parts.append('</ul>')
-        if cons:
-            html_parts.append('<h3>Cons</h3><ul>')
-            for li in cons.find_all('li'):
-                html_parts.append(f'<li>{li.get_text(strip=True)}</li>')
-            html_parts.append('</ul>')
+    pros = p.find(soup, 'div', class_='pros')
+    if pros is not None:
+        result.pros = [p.text(li) for li in p.find_all(pros, 'li')]
+    cons = p.find(soup, 'div', class_='cons')
+    if cons is not None:
+        result.cons = [p.text(li) for li in p.find_all(cons, 'li')]
     
     # Extract financial tables with filtering
     for section_id in sections_to_keep:
-        section = soup.find('section', id=section_id)
-        if section:
-            h2 = section.find('h2')
-            if h2:
-                html_parts.append(f'<h2>{h2.get_text(strip=True)}</h2>')
-            
-            # Extract tables
-            tables = section.find_all('table', class_='data-table')
-            for table in tables:
-                html_parts.append('<table>')
-                # Headers
-                thead = table.find('thead')
-                if thead:
-                    html_parts.append('<thead><tr>')
-                    ths = thead.find_all('th')
-                    
-                    # Filter columns based on section type
-                    if section_id == 'quarters':
-                        # Keep first column (row labels) + last N quarters
-                        columns_to_keep = [0] + list(range(max(1, len(ths) - max_quarters), len(ths)))
-                    elif section_id in ['profit-loss', 'balance-sheet', 'cash-flow', 'ratios']:
-                        # Keep first column (row labels) + TTM + last N years
-                        # TTM is typically the last column before the years
-                        columns_to_keep = [0]  # Always keep first column
-                        # Find TTM column if exists
-                        ttm_index = None
-                        for i, th in enumerate(ths):
-                            if th.get_text(strip=True).upper() == 'TTM':
-                                ttm_index = i
-                                break
-                        if ttm_index is not None:
-                            columns_to_keep.append(ttm_index)
-                        # Add last N years (excluding TTM)
-                        year_cols = [i for i in range(1, len(ths)) if i != ttm_index]
-                        columns_to_keep.extend(year_cols[-max_years:])
-                        columns_to_keep = sorted(set(columns_to_keep))
-                    else:
-                        # For shareholding and other sections, keep all columns
-                        columns_to_keep = list(range(len(ths)))
-                    
-                    for i in columns_to_keep:
-                        if i < len(ths):
-                            html_parts.append(f'<th>{ths[i].get_text(strip=True)}</th>')
-                    html_parts.append('</tr></thead>')
-                    
-                    # Body - filter rows to match filtered columns
-                    tbody = table.find('tbody')
-                    if tbody:
-                        html_parts.append('<tbody>')
-                        for tr in tbody.find_all('tr'):
-                            html_parts.append('<tr>')
-                            tds = tr.find_all(['td', 'th'])
-                            for i in columns_to_keep:
-                                if i < len(tds):
-                                    cell_text = tds[i].get_text(strip=True)
-                                    # Skip empty cells in aggressive mode
-                                    if not (aggressive and not cell_text):
-                                        html_parts.append(f'<td>{cell_text}</td>')
-                            html_parts.append('</tr>')
-                        html_parts.append('</tbody>')
-                html_parts.append('</table>')
-            
-            # Growth tables (ranges-table) - keep all, they're small
-            growth_tables = section.find_all('table', class_='ranges-table')
-            if growth_tables:
-                html_parts.append('<h3>Growth Metrics</h3>')
-                for table in growth_tables:
-                    html_parts.append('<table>')
-                    for tr in table.find_all('tr'):
-                        html_parts.append('<tr>')
-                        for td in tr.find_all(['td', 'th']):
-                            html_parts.append(f'<td>{td.get_text(strip=True)}</td>')
-                        html_parts.append('</tr>')
-                    html_parts.append('</table>')
-    
-    html_parts.append('</body></html>')
+        section = p.find(soup, 'section', id=section_id)
+        if section is None:
+            continue
+        h2 = p.find(section, 'h2')
+        sub = p.find(section, 'p', class_='sub')
+        parsed = FinancialSection(
+            section_id=section_id,
+            title=p.text(h2) if h2 is not None else None,
+            unit=parse_unit(p.text(sub)) if sub is not None else None,
+        )
+        
+        for table in p.find_all(section, 'table', class_='data-table'):
+            headers = None
+            rows = None
+            thead = p.find(table, 'thead')
+            if thead is not None:
+                ths = [p.text(th) for th in p.find_all(thead, 'th')]
+                columns = columns_to_keep(section_id, ths, max_years, max_quarters)
+                headers = [ths[i] for i in columns if i < len(ths)]
+                
+                # Body - filter rows to match filtered columns
+                tbody = p.find(table, 'tbody')
+                if tbody is not None:
+                    rows = []
+                    for tr in p.find_all(tbody, 'tr'):
+                        tds = p.find_all(tr, ['td', 'th'])
+                        rows.append([p.text(tds[i]) for i in columns if i < len(tds)])
+            parsed.tables.append(DataTable.from_cells(headers, rows))
+        
+        # Growth tables (ranges-table) - keep all, they're small
+        for table in p.find_all(section, 'table', class_='ranges-table'):
+            parsed.growth_tables.append(GrowthTable(rows=[
+                [p.text(td) for td in p.find_all(tr, ['td', 'th'])]
+                for tr in p.find_all(table, 'tr')
+            ]))
+        
+        result.sections.append(parsed)
     
-    return ''.join(html_parts)
-
+    return result
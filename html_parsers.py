@@ -0,0 +1,311 @@
+"""Pluggable HTML parser backends used by the financial data extractor."""
+
+import re
+import sys
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional
+    LexborHTMLParser = None  # type: ignore
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree
+except ImportError:  # lxml is optional
+    lxml_html = None  # type: ignore
+    etree = None  # type: ignore
+
+# Backends tried in order when HTML_PARSER_BACKEND is "auto"
+AUTO_BACKEND_ORDER = ("selectolax", "lxml", "html.parser")
+
+# Elements whose text BeautifulSoup's get_text() leaves out
+_NON_TEXT_TAGS = {"script", "style", "template"}
+
+# Starts of regions whose contents are not markup (tag-like text inside them must be ignored).
+# Case-sensitive alternatives keep this scan on the regex engine's fast path.
+_OPAQUE_START_RE = re.compile(
+    r"<(!--|(?:script|style|template|textarea|SCRIPT|STYLE|TEMPLATE|TEXTAREA)(?=[\s>/]))"
+)
+
+# One attribute inside an opening tag: name, then a double-, single- or un-quoted value
+_ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+
+
+class HtmlParserBackend:
+    """
+    Minimal DOM interface the extractor is written against.
+    
+    Every backend must produce the same text as BeautifulSoup's
+    get_text(strip=True): each text node stripped, empty ones dropped, the
+    rest joined without a separator.
+    """
+    
+    name = "base"
+    
+    def parse(self, html_content: str) -> Any:
+        """Parse a document and return its root node."""
+        raise NotImplementedError
+    
+    def find(self, node: Any, tag: str, id: Optional[str] = None, class_: Optional[str] = None) -> Optional[Any]:
+        """Return the first descendant matching tag (and id/class), or None."""
+        raise NotImplementedError
+    
+    def find_all(self, node: Any, tags: Union[str, Sequence[str]], class_: Optional[str] = None) -> List[Any]:
+        """Return all descendants matching any of tags (and class) in document order."""
+        raise NotImplementedError
+    
+    def text(self, node: Any) -> str:
+        """Return the stripped text content of a node."""
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(HtmlParserBackend):
+    """BeautifulSoup with the pure-Python html.parser (always available)."""
+    
+    name = "html.parser"
+    
+    def parse(self, html_content: str) -> Any:
+        return BeautifulSoup(html_content, "html.parser")
+    
+    def find(self, node, tag, id=None, class_=None):
+        attrs = {}
+        if id is not None:
+            attrs["id"] = id
+        if class_ is not None:
+            attrs["class_"] = class_
+        return node.find(tag, **attrs)
+    
+    def find_all(self, node, tags, class_=None):
+        if class_ is not None:
+            return node.find_all(tags, class_=class_)
+        return node.find_all(tags)
+    
+    def text(self, node):
+        return node.get_text(strip=True)
+
+
+def _css_selector(tags: Union[str, Sequence[str]], id: Optional[str] = None, class_: Optional[str] = None) -> str:
+    tags = [tags] if isinstance(tags, str) else list(tags)
+    suffix = (f"#{id}" if id is not None else "") + (f".{class_}" if class_ is not None else "")
+    return ", ".join(f"{tag}{suffix}" for tag in tags)
+
+
+class SelectolaxBackend(HtmlParserBackend):
+    """selectolax's Lexbor engine (C, HTML5-compliant); the fastest option."""
+    
+    name = "selectolax"
+    
+    def parse(self, html_content: str) -> Any:
+        return LexborHTMLParser(html_content)
+    
+    def find(self, node, tag, id=None, class_=None):
+        return node.css_first(_css_selector(tag, id, class_))
+    
+    def find_all(self, node, tags, class_=None):
+        return node.css(_css_selector(tags, class_=class_))
+    
+    def text(self, node):
+        return node.text(deep=True, separator="", strip=True)
+
+
+@lru_cache(maxsize=64)
+def _compiled_xpath(tags: tuple, id: Optional[str], class_: Optional[str]):
+    predicates = ""
+    if id is not None:
+        predicates += f"[@id='{id}']"
+    if class_ is not None:
+        predicates += f"[contains(concat(' ', normalize-space(@class), ' '), ' {class_} ')]"
+    return etree.XPath(" | ".join(f"descendant::{tag}{predicates}" for tag in tags))
+
+
+class LxmlBackend(HtmlParserBackend):
+    """lxml's libxml2 HTML parser queried with precompiled XPath."""
+    
+    name = "lxml"
+    
+    def parse(self, html_content: str) -> Any:
+        return lxml_html.document_fromstring(html_content)
+    
+    def find(self, node, tag, id=None, class_=None):
+        matches = _compiled_xpath((tag,), id, class_)(node)
+        return matches[0] if matches else None
+    
+    def find_all(self, node, tags, class_=None):
+        tags = (tags,) if isinstance(tags, str) else tuple(tags)
+        return _compiled_xpath(tags, None, class_)(node)
+    
+    def text(self, node):
+        parts: List[str] = []
+        self._collect_text(node, parts, is_root=True)
+        return "".join(part.strip() for part in parts)
+    
+    def _collect_text(self, element, parts: List[str], is_root: bool = False) -> None:
+        # Comments and processing instructions have a non-string tag; only their tail is text
+        if isinstance(element.tag, str) and element.tag not in _NON_TEXT_TAGS:
+            if element.text:
+                parts.append(element.text)
+            for child in element:
+                self._collect_text(child, parts)
+        if not is_root and element.tail:
+            parts.append(element.tail)
+
+
+def _is_available(name: str) -> bool:
+    if name == "selectolax":
+        return LexborHTMLParser is not None
+    if name == "lxml":
+        return lxml_html is not None
+    return name == "html.parser"
+
+
+_BACKENDS = {
+    "selectolax": SelectolaxBackend,
+    "lxml": LxmlBackend,
+    "html.parser": BeautifulSoupBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_parser_backend(name: str = "auto") -> HtmlParserBackend:
+    """
+    Resolve a parser backend by name.
+    
+    Args:
+        name: "auto", "selectolax", "lxml" or "html.parser". Unknown or
+              unavailable backends fall back to "auto" with a warning.
+              
+    Returns:
+        Shared backend instance
+    """
+    name = (name or "auto").strip().lower()
+    if name != "auto":
+        if name in _BACKENDS and _is_available(name):
+            return _BACKENDS[name]()
+        print(
+            f"Warning: HTML parser backend '{name}' is not available; choosing one automatically.",
+            file=sys.stderr,
+        )
+    for candidate in AUTO_BACKEND_ORDER:
+        if _is_available(candidate):
+            return _BACKENDS[candidate]()
+    return BeautifulSoupBackend()
+
+
+ElementTarget = Tuple[str, Optional[str], Optional[str]]
+
+
+def _tag_attrs(open_tag: str) -> dict:
+    attrs = {}
+    inner = open_tag[1:-1]
+    name_end = len(inner.split(None, 1)[0])
+    for match in _ATTR_RE.finditer(inner, name_end):
+        value = next((v for v in match.group(2, 3, 4) if v is not None), "")
+        attrs.setdefault(match.group(1).lower(), value)
+    return attrs
+
+
+@lru_cache(maxsize=64)
+def _open_tag_re(tag: str, id: Optional[str], class_: Optional[str]):
+    # Pre-filter in the regex engine; matches are confirmed by parsing the attributes
+    pattern = rf"<{tag}(?=[\s>/])[^>]*"
+    if id is not None:
+        pattern += rf"""(?<=[\s"'])id\s*=\s*["']?{re.escape(id)}(?=["'\s>])[^>]*"""
+    if class_ is not None:
+        pattern += rf"""(?<=[\s"'])class\s*=\s*["']?[^"'>]*(?<![\w-]){re.escape(class_)}(?![\w-])[^>]*"""
+    return re.compile(pattern + ">", re.I)
+
+
+@lru_cache(maxsize=16)
+def _tag_boundary_re(tag: str):
+    return re.compile(rf"<(/?){tag}(?=[\s>/])", re.I)
+
+
+@lru_cache(maxsize=16)
+def _closing_tag_re(tag: str):
+    return re.compile(rf"</{tag}\s*>", re.I)
+
+
+def _opaque_spans(html_content: str) -> List[Tuple[int, int]]:
+    """Find comments and raw-text elements (script, style, ...) in document order."""
+    spans = []
+    pos = 0
+    while True:
+        start = _OPAQUE_START_RE.search(html_content, pos)
+        if start is None:
+            return spans
+        if start.group(1) == "!--":
+            end = html_content.find("-->", start.end())
+            end = len(html_content) if end < 0 else end + 3
+        else:
+            close = _closing_tag_re(start.group(1).lower()).search(html_content, start.end())
+            end = len(html_content) if close is None else close.end()
+        spans.append((start.start(), end))
+        pos = end
+
+
+def slice_elements(html_content: str, targets: Sequence[ElementTarget]) -> Optional[str]:
+    """
+    Cut the first element matching each target out of a raw document.
+    
+    Only the regex engine walks the full page; the DOM parser then sees just
+    the returned fragments, so everything else (navigation, peers, documents,
+    scripts) costs no tree building at all.
+    
+    Args:
+        html_content: Raw HTML document
+        targets: (tag, id, class) tuples; id/class may be None
+        
+    Returns:
+        The matched elements in document order wrapped in <html><body>, or
+        None if an element's end could not be found (parse the full page then)
+    """
+    opaque = _opaque_spans(html_content)
+    opaque_starts = [start for start, _ in opaque]
+    
+    def is_opaque(pos: int) -> bool:
+        i = bisect_right(opaque_starts, pos) - 1
+        return i >= 0 and pos < opaque[i][1]
+    
+    spans = []
+    for tag, id, class_ in dict.fromkeys(targets):
+        tag = tag.lower()
+        for opening in _open_tag_re(tag, id, class_).finditer(html_content):
+            if is_opaque(opening.start()):
+                continue
+            attrs = _tag_attrs(opening.group(0))
+            if id is not None and attrs.get("id") != id:
+                continue
+            if class_ is not None and class_ not in attrs.get("class", "").split():
+                continue
+            break
+        else:
+            continue  # Not on the page: the parser would not find it either
+        
+        depth = 1
+        end = None
+        for boundary in _tag_boundary_re(tag).finditer(html_content, opening.end()):
+            if is_opaque(boundary.start()):
+                continue
+            depth += -1 if boundary.group(1) else 1
+            if depth == 0:
+                end = html_content.find(">", boundary.end())
+                break
+        if end is None or end < 0:
+            return None
+        spans.append((opening.start(), end + 1))
+    
+    # Keep outermost spans only; nested targets are found inside their parent
+    fragments = []
+    last_end = -1
+    for start, end in sorted(spans):
+        if start >= last_end:
+            fragments.append(html_content[start:end])
+            last_end = end
+        elif end > last_end:
+            return None  # Overlapping but not nested: markup is malformed
+    return "<html><body>" + "".join(fragments) + "</body></html>"
@@ -0,0 +1,6 @@
+"""Background job queue for long-running analyses."""
+
+from .store import JobStore
+from .worker import JobWorkerPool
+
+__all__ = ["JobStore", "JobWorkerPool"]
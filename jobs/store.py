@@ -0,0 +1,269 @@
+"""SQLite-backed durable store for analysis jobs."""
+
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Job lifecycle states
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    Durable job table; safe to share between threads and processes.
+    
+    Every worker pool registers an owner id and heartbeats it. A running job
+    belongs to the owner that claimed it, and a queued job submitted with
+    in-memory secrets is pinned to the owner that holds them. When an
+    owner's lease expires (its process died), its running jobs are requeued,
+    or failed once they have been attempted max_attempts times, and its
+    pinned jobs are released to any worker.
+    """
+    
+    def __init__(self, db_path: str, lease_seconds: float = 60, max_attempts: int = 3):
+        """
+        Initialize the job store, creating the database if needed.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            lease_seconds: Time without a heartbeat after which an owner is considered dead
+            max_attempts: Runs of a job whose worker died before it is failed instead of requeued
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Databases created before leases were added
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a short-lived connection (sqlite3 connections are not thread-safe)."""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def enqueue(self, params: Dict[str, Any], owner: Optional[str] = None) -> str:
+        """
+        Add a new job to the queue.
+        
+        Args:
+            params: JSON-serializable analysis parameters
+            owner: Only this owner may claim the job while its lease is alive (optional)
+            
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, created_at, owner) VALUES (?, ?, ?, ?, ?)",
+                (job_id, STATUS_QUEUED, json.dumps(params), datetime.now().isoformat(), owner),
+            )
+        return job_id
+    
+    def claim_next(self, owner: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically move the oldest queued job this owner may run to running.
+        
+        Args:
+            owner: Id of the claiming worker pool
+            
+        Returns:
+            Dictionary with "id" and "params", or None if the queue is empty
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, params FROM jobs WHERE status = ? AND (owner IS NULL OR owner = ?) "
+                "ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED, owner),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (STATUS_RUNNING, owner, datetime.now().isoformat(), row["id"]),
+            )
+            conn.execute("COMMIT")
+            return {"id": row["id"], "params": json.loads(row["params"])}
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+    
+    def complete(self, job_id: str, result: Dict[str, Any], owner: Optional[str] = None) -> bool:
+        """
+        Mark a job as succeeded and store its result.
+        
+        Args:
+            job_id: Job to update
+            result: JSON-serializable analysis result
+            owner: Only update the job while this owner still holds it (optional)
+            
+        Returns:
+            False if the job was taken over by another owner in the meantime
+        """
+        return self._finish(job_id, owner, STATUS_SUCCEEDED, json.dumps(result, default=str), None)
+    
+    def fail(self, job_id: str, error: str, owner: Optional[str] = None) -> bool:
+        """
+        Mark a job as failed with an error message.
+        
+        Args:
+            job_id: Job to update
+            error: Error message reported for the job
+            owner: Only update the job while this owner still holds it (optional)
+            
+        Returns:
+            False if the job was taken over by another owner in the meantime
+        """
+        return self._finish(job_id, owner, STATUS_FAILED, None, error)
+    
+    def _finish(
+        self, job_id: str, owner: Optional[str], status: str, result: Optional[str], error: Optional[str]
+    ) -> bool:
+        """Store the outcome of a job, optionally only while owner holds it."""
+        query = "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?"
+        args = [status, result, error, datetime.now().isoformat(), job_id]
+        if owner is not None:
+            query += " AND status = ? AND owner = ?"
+            args += [STATUS_RUNNING, owner]
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(query, args)
+        if not cursor.rowcount:
+            print(f"Warning: Job {job_id} was taken over by another worker, dropping its {status} outcome",
+                  file=sys.stderr)
+        return bool(cursor.rowcount)
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job by id.
+        
+        Returns:
+            Job status dictionary, or None if the id is unknown
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, status, result, error, attempts, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+    
+    def heartbeat(self, owner: str) -> None:
+        """Renew the lease of a worker pool."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO workers (id, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (owner, time.time()),
+            )
+    
+    def requeue_expired(self) -> int:
+        """
+        Recover the jobs of owners whose lease has expired.
+        
+        Running jobs are requeued, or failed once they have been attempted
+        max_attempts times (a job that keeps killing its worker is not retried
+        forever). Queued jobs pinned to a dead owner are released to any worker.
+        
+        Returns:
+            Number of jobs requeued
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cutoff = time.time() - self.lease_seconds
+            # No live worker row: an expired lease, a released owner, or a row from before leases
+            dead_owner = "(owner IS NULL OR owner NOT IN (SELECT id FROM workers WHERE heartbeat_at >= ?))"
+            failed = conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                f"WHERE status = ? AND attempts >= ? AND {dead_owner}",
+                (
+                    STATUS_FAILED,
+                    f"Abandoned after {self.max_attempts} attempt(s): the worker running it stopped",
+                    datetime.now().isoformat(),
+                    STATUS_RUNNING,
+                    self.max_attempts,
+                    cutoff,
+                ),
+            ).rowcount
+            requeued = conn.execute(
+                f"UPDATE jobs SET status = ?, owner = NULL, started_at = NULL WHERE status = ? AND {dead_owner}",
+                (STATUS_QUEUED, STATUS_RUNNING, cutoff),
+            ).rowcount
+            conn.execute(
+                f"UPDATE jobs SET owner = NULL WHERE status = ? AND owner IS NOT NULL AND {dead_owner}",
+                (STATUS_QUEUED, cutoff),
+            )
+            conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if requeued or failed:
+            print(f"Requeued {requeued} and failed {failed} interrupted job(s)", file=sys.stderr)
+        return requeued
+    
+    def release(self, owner: str) -> int:
+        """
+        Give up the jobs of a worker pool that is shutting down.
+        
+        Its running jobs are requeued without counting the interrupted run as
+        an attempt, and its pinned jobs are released to any worker.
+        
+        Returns:
+            Number of jobs requeued
+        """
+        with closing(self._connect()) as conn:
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, started_at = NULL, attempts = attempts - 1 "
+                "WHERE status = ? AND owner = ?",
+                (STATUS_QUEUED, STATUS_RUNNING, owner),
+            ).rowcount
+            conn.execute("UPDATE jobs SET owner = NULL WHERE status = ? AND owner = ?", (STATUS_QUEUED, owner))
+            conn.execute("DELETE FROM workers WHERE id = ?", (owner,))
+        return requeued
@@ -0,0 +1,141 @@
+"""Asyncio worker pool that drains the durable job queue."""
+
+import asyncio
+import os
+import socket
+import sys
+import uuid
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .store import JobStore
+
+# Request fields that are never written to the job database. They are kept in
+# memory for the lifetime of the process, and the job is pinned to this pool
+# until it starts; a job resumed by another process or after a restart falls
+# back to the server-side configuration (e.g. OPENAI_API_KEY).
+SECRET_FIELDS = ("api_key", "search_api_key", "cookie_header")
+
+
+class JobWorkerPool:
+    """
+    Run queued analysis jobs on a fixed number of asyncio workers.
+    
+    Several pools (e.g. one per API process) may share a store: each
+    heartbeats its own owner id, and only the jobs of pools whose lease
+    has expired are taken over.
+    """
+    
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[Any], Awaitable[Dict[str, Any]]],
+        workers: int = 2,
+        poll_interval: float = 1.0
+    ):
+        """
+        Initialize the worker pool.
+        
+        Args:
+            store: Durable job store
+            handler: Coroutine function run for each job (e.g. perform_analysis_async);
+                     receives an object exposing the job parameters as attributes
+            workers: Number of jobs processed concurrently
+            poll_interval: Seconds between queue polls when idle
+        """
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._secrets: Dict[str, Dict[str, Any]] = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    
+    def submit(self, params: Dict[str, Any]) -> str:
+        """
+        Persist a job and wake an idle worker.
+        
+        Safe to call from any thread (sync FastAPI routes run in the threadpool).
+        
+        Args:
+            params: Analysis parameters (AnalysisRequest fields)
+            
+        Returns:
+            The new job id
+        """
+        secrets = {key: params[key] for key in SECRET_FIELDS if params.get(key)}
+        stored_params = {key: value for key, value in params.items() if key not in SECRET_FIELDS}
+        job_id = self.store.enqueue(stored_params, owner=self.owner if secrets else None)
+        if secrets:
+            self._secrets[job_id] = secrets
+        if self._wakeup is not None:
+            # asyncio.Event is not thread-safe: set it on the loop that owns it
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job_id
+    
+    async def start(self) -> None:
+        """Take the lease, requeue jobs of dead pools and start the workers."""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.store.heartbeat, self.owner)
+        await asyncio.to_thread(self.store.requeue_expired)
+        self._tasks = [
+            asyncio.create_task(self._run_worker(index), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._run_heartbeat(), name="job-heartbeat"))
+        print(f"Job worker pool {self.owner} started with {self.workers} worker(s)", file=sys.stderr)
+    
+    async def stop(self) -> None:
+        """Stop the workers and requeue the jobs they were running."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.store.release, self.owner)
+    
+    async def _run_heartbeat(self) -> None:
+        """Renew this pool's lease and take over the jobs of expired ones until cancelled."""
+        interval = max(0.1, self.store.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, self.owner)
+                requeued = await asyncio.to_thread(self.store.requeue_expired)
+            except Exception as exc:
+                print(f"Warning: Job heartbeat failed: {exc}", file=sys.stderr)
+                continue
+            if requeued:
+                self._wakeup.set()
+    
+    async def _run_worker(self, index: int) -> None:
+        """Claim and run jobs until cancelled."""
+        while True:
+            job = await asyncio.to_thread(self.store.claim_next, self.owner)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            job_id = job["id"]
+            params = dict(job["params"], **self._secrets.pop(job_id, {}))
+            print(f"Worker {index} running job {job_id}", file=sys.stderr)
+            try:
+                result = await self.handler(SimpleNamespace(**params))
+            except asyncio.CancelledError:
+                raise
+            except SystemExit as exc:
+                reason = exc.code if isinstance(exc.code, str) else f"Invalid request (exit code {exc.code})"
+                await asyncio.to_thread(self.store.fail, job_id, reason, self.owner)
+            except Exception as exc:
+                print(f"Job {job_id} failed: {exc}", file=sys.stderr)
+                await asyncio.to_thread(self.store.fail, job_id, str(exc) or exc.__class__.__name__, self.owner)
+            else:
+                await asyncio.to_thread(self.store.complete, job_id, result, self.owner)
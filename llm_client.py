@@ -1,28 +1,60 @@
 """LLM client for OpenAI API interactions."""
 
+import asyncio
+import json
 import sys
-from typing import Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
 
-from langchain.memory import ConversationBufferMemory
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from openai import OpenAI
-
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from constants import (
     CHARS_PER_TOKEN_CONSERVATIVE,
     CHARS_PER_TOKEN_PLAIN_TEXT,
     DEFAULT_TIMEOUT,
 )
-from tools import create_internet_search_tool
+from tools import (
+    asearch_in_context,
+    bind_search_functions,
+    create_async_internet_search_tool,
+    create_internet_search_tool,
+    search_in_context,
+)
 from cache import SearchCache
-from config import get_cache_config
+from config import (
+    get_cache_config,
+    get_gap_detection_config,
+    get_observation_budget_config,
+    get_search_cache_config,
+    get_search_limits_config,
+)
+from gap_detector import Gap, gap_queries, prompt_needs_search
+from llm_clients import event_loop_id, get_async_openai_client, get_http_clients, get_openai_client, key_fingerprint
+from observation_budget import ObservationBudget
+from token_counter import count_tokens
+
+# Distinct (prompt, model, endpoint, timeout, streaming) agents kept built
+AGENT_CACHE_SIZE = 32
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_loaded = False
+_search_cache_lock = threading.Lock()
 
 
 def estimate_tokens(text: str, conservative: bool = True) -> int:
     """
     Estimate token count. Uses more conservative estimate for HTML content.
     
+    Prefer token_counter.count_tokens, which uses the model's tokenizer.
+    
     Args:
         text: Text to estimate tokens for
         conservative: If True, use ~2.5 chars/token (better for HTML).
@@ -35,6 +67,432 @@ def estimate_tokens(text: str, conservative: bool = True) -> int:
     return int(len(text) / chars_per_token)
 
 
+class _TokenEventHandler(AsyncCallbackHandler):
+    """Forward streamed LLM tokens from the agent to an event callback."""
+    
+    def __init__(self, on_event: Callable[[str, dict], None]):
+        self._on_event = on_event
+    
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        if token:
+            self._on_event("token", {"text": token})
+
+
+def _build_messages(
+    financial_data: str,
+    prompt: str,
+    conversation_history: Optional[list] = None
+) -> list:
+    """Build the chat messages for a single (non-agentic) completion call."""
+    messages = [{"role": "system", "content": prompt}]
+    
+    # Add conversation history if provided
+    if conversation_history:
+        messages.extend(conversation_history)
+    
+    messages.append({"role": "user", "content": financial_data})
+    return messages
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """
+    Return the process-wide search cache (None when caching is disabled).
+    
+    Created on first use, which also starts its expiry sweeper.
+    """
+    global _search_cache, _search_cache_loaded
+    if _search_cache_loaded:
+        return _search_cache
+    with _search_cache_lock:
+        if not _search_cache_loaded:
+            cache_enabled, cache_dir, cache_ttl = get_cache_config()
+            if cache_enabled:
+                hot_max_entries, sweep_minutes, snippet_top_k, snippet_max_tokens = get_search_cache_config()
+                _search_cache = SearchCache(
+                    cache_dir=cache_dir,
+                    ttl_hours=cache_ttl,
+                    enabled=cache_enabled,
+                    hot_max_entries=hot_max_entries,
+                    snippet_top_k=snippet_top_k,
+                    snippet_max_tokens=snippet_max_tokens
+                )
+                _search_cache.start_sweeper(sweep_minutes * 60)
+                print(f"Cache enabled: dir={cache_dir}, ttl={cache_ttl}h", file=sys.stderr)
+            else:
+                print("Cache disabled", file=sys.stderr)
+            _search_cache_loaded = True
+    return _search_cache
+
+
+def close_search_cache() -> None:
+    """Stop the search cache sweeper (call on application shutdown)."""
+    if _search_cache is not None:
+        _search_cache.stop_sweeper()
+
+
+def _create_chat_model(
+    model: str,
+    api_key: str,
+    base_url: Optional[str],
+    timeout: float,
+    streaming: bool = False
+) -> ChatOpenAI:
+    """Create the LangChain chat model used by the agent (on the shared connection pools)."""
+    http_client, http_async_client = get_http_clients(api_key, base_url, timeout)
+    llm_kwargs = {
+        "model": model,
+        "api_key": api_key,
+        "temperature": 0,
+        "timeout": timeout,
+        "streaming": streaming,
+        "http_client": http_client,
+        "http_async_client": http_async_client
+    }
+    if base_url:
+        llm_kwargs["base_url"] = base_url
+    
+    return ChatOpenAI(**llm_kwargs)
+
+
+@lru_cache(maxsize=1)
+def _search_tool() -> StructuredTool:
+    """
+    The internet_search tool shared by every agent.
+    
+    It carries no request state: calls go to the search functions bound
+    with bind_search_functions for the request being run, and the company
+    name reaches the model through the agent input.
+    """
+    return StructuredTool.from_function(
+        func=search_in_context,
+        coroutine=asearch_in_context,
+        name="internet_search",
+        description=(
+            "CRITICAL TOOL: Search the internet for missing financial data for the company being analyzed. "
+            "You MUST use this tool whenever you see 'Not available' or missing data in the HTML. "
+            "Examples: 'CompanyName ROCE ratio', "
+            "'CompanyName debt equity ratio 2024', "
+            "'CompanyName industry P/E ratio', "
+            "'CompanyName recent news'. "
+            "Always include the company name in your search query. "
+            "This tool returns factual financial information that you should use to fill gaps in the HTML data. "
+            "Input: A search query string containing the company name and the metric you're looking for."
+        ),
+        args_schema=None  # Let LangChain infer from function signature
+    )
+
+
+def _create_agent_executor(
+    llm: ChatOpenAI,
+    tools: list,
+    prompt: str,
+    timeout: float
+) -> AgentExecutor:
+    """Create the tool-calling agent executor (conversation history is the chat_history input)."""
+    # Create agent prompt template with explicit tool usage instructions
+    enhanced_prompt = (
+        prompt + "\n\n"
+        "IMPORTANT: You have access to the internet_search tool. "
+        "Whenever you encounter missing data, 'Not available', or incomplete information in the HTML, "
+        "you MUST call the internet_search tool immediately. "
+        "Do not proceed with 'Not available' without first attempting to search for the information. "
+        "The tool is available and ready to use - make sure you use it when needed."
+    )
+    
+    agent_prompt = ChatPromptTemplate.from_messages([
+        ("system", enhanced_prompt),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad")
+    ])
+    
+    # Create agent
+    agent = create_openai_tools_agent(llm, tools, agent_prompt)
+    
+    # Create agent executor
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=True,
+        handle_parsing_errors=True,
+        max_iterations=5,
+        max_execution_time=timeout
+    )
+
+
+# Built agents by (prompt, model, api-key fingerprint, endpoint, timeout, streaming, event loop)
+_agent_executors: "OrderedDict[tuple, Tuple[tuple, AgentExecutor]]" = OrderedDict()
+_agent_executors_lock = threading.Lock()
+
+
+def get_agent_executor(
+    prompt: str,
+    model: str,
+    api_key: str,
+    base_url: Optional[str],
+    timeout: float,
+    streaming: bool = False
+) -> AgentExecutor:
+    """
+    Return the agent for a prompt and model, building it on first use.
+    
+    The prompt template, tool schema, agent and executor hold no request
+    state, so one executor serves every request with the same prompt,
+    model, endpoint and timeout. Per-request state is passed when it is
+    invoked: company and data in "input", conversation history in
+    "chat_history", and the search functions (cache, company, events) via
+    bind_search_functions.
+    
+    Args:
+        prompt: System prompt
+        model: Model name
+        api_key: OpenAI API key
+        base_url: Base URL for the OpenAI-compatible API (None => default)
+        timeout: Request timeout in seconds (also the agent's execution limit)
+        streaming: Whether the chat model streams tokens
+        
+    Returns:
+        Shared AgentExecutor
+    """
+    # The key holds a fingerprint, not the key itself; the event loop is part of it
+    # because the chat model holds that loop's async client
+    key = (prompt, model, key_fingerprint(api_key), base_url, float(timeout), streaming, event_loop_id())
+    # An agent built on clients the pool has since evicted (and will close) is rebuilt
+    http_clients = get_http_clients(api_key, base_url, timeout)
+    with _agent_executors_lock:
+        cached = _agent_executors.get(key)
+        if cached is not None and cached[0] == http_clients:
+            _agent_executors.move_to_end(key)
+            return cached[1]
+    llm = _create_chat_model(model, api_key, base_url, timeout, streaming)
+    executor = _create_agent_executor(llm, [_search_tool()], prompt, timeout)
+    with _agent_executors_lock:
+        _agent_executors[key] = (http_clients, executor)
+        _agent_executors.move_to_end(key)
+        while len(_agent_executors) > AGENT_CACHE_SIZE:
+            _agent_executors.popitem(last=False)
+    return executor
+
+
+def _history_messages(conversation_history: Optional[list]) -> list[BaseMessage]:
+    """Convert conversation history (role/content dicts) to the agent's chat_history input."""
+    messages: list[BaseMessage] = []
+    for msg in conversation_history or []:
+        if msg.get("role") == "user":
+            messages.append(HumanMessage(content=msg.get("content", "")))
+        elif msg.get("role") == "assistant":
+            messages.append(AIMessage(content=msg.get("content", "")))
+    return messages
+
+
+def _build_agent_input(financial_data: str, company_name: Optional[str], prefetched: str = "") -> str:
+    """Prepare the agent input with explicit instructions about tool usage."""
+    company_context = f"\n\nCompany Name: {company_name}\n" if company_name else ""
+    prefetched_context = (
+        f"\n\nSearch results already retrieved for data missing from the HTML "
+        f"(do not search for these again):\n\n{prefetched}"
+        if prefetched else ""
+    )
+    return (
+        f"Analyze the following financial data{company_context}"
+        f"\n\nIMPORTANT: If any data is missing or marked as 'Not available' in the HTML below, "
+        f"you MUST use the internet_search tool to find it. Do not skip searching for missing critical metrics. "
+        f"The HTML data follows:\n\n{financial_data}{prefetched_context}"
+    )
+
+
+@lru_cache(maxsize=AGENT_CACHE_SIZE)
+def _tool_schema_tokens(model: str) -> int:
+    return count_tokens(json.dumps(convert_to_openai_tool(_search_tool())), model)
+
+
+def agent_overhead_tokens(company_name: Optional[str], model: str) -> int:
+    """
+    Tokens the agent adds to a request besides the prompt, history, data and search results.
+    
+    Measures the instructions wrapped around the financial data, the header
+    introducing prefetched search results and the internet_search tool schema.
+    """
+    wrapper = _build_agent_input("", company_name, prefetched=" ")
+    return count_tokens(wrapper, model) + _tool_schema_tokens(model)
+
+
+def _gap_search_queries(search_gaps: List[Gap], company_name: Optional[str]) -> List[str]:
+    return gap_queries(search_gaps, company_name, get_gap_detection_config()[1])
+
+
+def prefetch_searches(
+    search_gaps: List[Gap],
+    company_name: Optional[str],
+    search_provider: str,
+    search_api_key: Optional[str]
+) -> List[Tuple[str, str]]:
+    """
+    Search for every data gap concurrently, before the agent runs.
+    
+    Results go through the search cache and in-flight coalescing like the
+    agent's own searches. Failed searches and searches still running
+    after SEARCH_DEADLINE_SECONDS are left out.
+    
+    Args:
+        search_gaps: Gaps from gap_detector.detect_gaps
+        company_name: Company the searches are about
+        search_provider: Search provider ("tavily" or "duckduckgo")
+        search_api_key: API key for Tavily
+        
+    Returns:
+        (query, result) pairs in gap order
+    """
+    queries = _gap_search_queries(search_gaps, company_name)
+    if not queries:
+        return []
+    search = create_internet_search_tool(
+        provider=search_provider,
+        api_key=search_api_key,
+        cache=get_search_cache(),
+        company_name=company_name
+    )
+    max_parallel, deadline_seconds = get_search_limits_config()
+    print(f"Prefetching {len(queries)} search(es) for missing data...", file=sys.stderr)
+    executor = ThreadPoolExecutor(max_workers=min(len(queries), max_parallel or len(queries)))
+    try:
+        futures = [executor.submit(search, query) for query in queries]
+        wait(futures, timeout=deadline_seconds or None)
+    finally:
+        # Searches past the deadline keep their thread but are not waited for
+        executor.shutdown(wait=False, cancel_futures=True)
+    results = []
+    for query, future in zip(queries, futures):
+        if not future.done() or future.cancelled():
+            print(f"Warning: Prefetch search did not finish in time: '{query}'", file=sys.stderr)
+        elif future.exception() is not None:
+            print(f"Warning: Prefetch search failed for '{query}': {future.exception()}", file=sys.stderr)
+        else:
+            results.append((query, future.result()))
+    return results
+
+
+async def prefetch_searches_async(
+    search_gaps: List[Gap],
+    company_name: Optional[str],
+    search_provider: str,
+    search_api_key: Optional[str],
+    on_event: Optional[Callable[[str, dict], None]] = None,
+    search_semaphore: Optional[asyncio.Semaphore] = None
+) -> List[Tuple[str, str]]:
+    """Async variant of prefetch_searches (reports ("search", {...}) events through on_event)."""
+    queries = _gap_search_queries(search_gaps, company_name)
+    if not queries:
+        return []
+    max_parallel, deadline_seconds = get_search_limits_config()
+    search = create_async_internet_search_tool(
+        provider=search_provider,
+        api_key=search_api_key,
+        cache=get_search_cache(),
+        company_name=company_name,
+        on_event=on_event,
+        semaphore=search_semaphore,
+        max_parallel=max_parallel
+    )
+    print(f"Prefetching {len(queries)} search(es) for missing data...", file=sys.stderr)
+    tasks = [asyncio.create_task(search(query)) for query in queries]
+    pending = set(tasks)
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=deadline_seconds or None)
+    finally:
+        for task in pending:
+            task.cancel()
+    results = []
+    for query, task in zip(queries, tasks):
+        if task in pending:
+            print(f"Warning: Prefetch search did not finish in time: '{query}'", file=sys.stderr)
+        elif task.exception() is not None:
+            print(f"Warning: Prefetch search failed for '{query}': {task.exception()}", file=sys.stderr)
+        else:
+            results.append((query, task.result()))
+    return results
+
+
+def _prefetched_context(prefetched: List[Tuple[str, str]], budget: ObservationBudget) -> str:
+    """Render prefetched results for the agent input, compressed like tool observations."""
+    return "\n\n".join(
+        f"=== Search: {query} ===\n{budget.compress(query, result)}"
+        for query, result in prefetched
+    )
+
+
+def _observation_budget(observation_tokens: Optional[int], model: str) -> ObservationBudget:
+    per_call_tokens, request_tokens = get_observation_budget_config()
+    if observation_tokens is not None:
+        request_tokens = observation_tokens
+    return ObservationBudget(per_call_tokens, request_tokens, model=model)
+
+
+def _skip_agent_without_gaps(
+    search_gaps: Optional[List[Gap]],
+    prompt: str,
+    conversation_history: Optional[list],
+    metadata: dict
+) -> bool:
+    """
+    True when the agent can be skipped for a single LLM call.
+    
+    Only a first-turn request whose page has no data gaps and whose prompt
+    asks for nothing beyond the page (peers, news, ...) is answered
+    without the agent. The decision is recorded in metadata["search_gaps"].
+    """
+    if search_gaps is None or search_gaps:
+        return False
+    if conversation_history:
+        reason = "follow-up turn"
+    elif prompt_needs_search(prompt):
+        reason = "prompt asks for data beyond the page"
+    else:
+        print("No data gaps detected; skipping the agent (single LLM call)", file=sys.stderr)
+        metadata["agentic"] = False
+        metadata["search_gaps"] = {"gaps": [], "prefetched": [], "agent_skipped": True, "agent_reason": "no data gaps"}
+        return True
+    print(f"No data gaps detected; keeping the agent ({reason})", file=sys.stderr)
+    metadata["search_gaps"] = {"gaps": [], "prefetched": [], "agent_skipped": False, "agent_reason": reason}
+    return False
+
+
+def _record_search_gaps(search_gaps: Optional[List[Gap]], prefetched: List[Tuple[str, str]], metadata: dict) -> None:
+    if search_gaps is not None:
+        metadata["search_gaps"] = {
+            "gaps": [gap.as_metadata() for gap in search_gaps],
+            "prefetched": [query for query, _ in prefetched],
+            "agent_skipped": False,
+            "agent_reason": metadata.get("search_gaps", {}).get("agent_reason", "data gaps"),
+        }
+
+
+def _record_agent_result(result: dict, metadata: dict) -> str:
+    """Extract tool usage from the agent result into metadata and return the output."""
+    analysis = result.get("output", "")
+    
+    # Extract tool usage information from intermediate steps
+    if "intermediate_steps" in result:
+        for step in result["intermediate_steps"]:
+            if len(step) >= 2:
+                tool_action = step[0]
+                tool_result = step[1]
+                if hasattr(tool_action, "tool"):
+                    tool_name = tool_action.tool
+                    metadata["tool_calls"].append(tool_name)
+                    if tool_name == "internet_search" and hasattr(tool_action, "tool_input"):
+                        query = tool_action.tool_input.get("query", "") if isinstance(tool_action.tool_input, dict) else str(tool_action.tool_input)
+                        metadata["search_queries"].append(query)
+    
+    print(f"Agent completed with {len(metadata['tool_calls'])} tool call(s)", file=sys.stderr)
+    if metadata['search_queries']:
+        print(f"Search queries used: {metadata['search_queries']}", file=sys.stderr)
+    else:
+        print("Warning: No search queries were executed. Tool may not have been invoked.", file=sys.stderr)
+    
+    return analysis
+
+
 def analyze_with_llm(
     financial_data: str,
     prompt: str,
@@ -46,7 +504,9 @@ def analyze_with_llm(
     search_provider: str = "tavily",
     search_api_key: Optional[str] = None,
     conversation_history: Optional[list] = None,
-    company_name: Optional[str] = None
+    company_name: Optional[str] = None,
+    search_gaps: Optional[List[Gap]] = None,
+    observation_tokens: Optional[int] = None
 ) -> tuple[str, dict]:
     """
     Send financial data to an OpenAI model for analysis.
@@ -62,9 +522,21 @@ def analyze_with_llm(
         search_provider: Search provider ("tavily" or "duckduckgo")
         search_api_key: API key for search provider (Tavily)
         conversation_history: Previous conversation messages for memory
+        company_name: Company being analyzed (search queries and cache key)
+        search_gaps: Data missing from the page (gap_detector.detect_gaps);
+                     searched for up front and given to the agent with its
+                     input. An empty list skips the agent (single LLM call)
+                     on a first turn whose prompt needs nothing beyond the
+                     page; None disables gap handling.
+        observation_tokens: Token budget of all search results given to the
+                            agent (None = SEARCH_OBSERVATION_BUDGET_TOKENS);
+                            set by context fitting to the room left in the
+                            context window
         
     Returns:
-        Tuple of (analysis_response, metadata_dict) where metadata contains tool usage info
+        Tuple of (analysis_response, metadata_dict) where metadata contains tool usage info;
+        metadata["fallback"] is True when the agent failed and the answer was
+        produced without tools
     """
     metadata = {
         "tool_calls": [],
@@ -72,24 +544,11 @@ def analyze_with_llm(
         "agentic": enable_search
     }
     
-    # If search is disabled, use simple non-agentic approach
-    if not enable_search:
-        client = OpenAI(
-            api_key=api_key,
-            base_url=base_url,
-            timeout=timeout
-        ) if base_url else OpenAI(
-            api_key=api_key,
-            timeout=timeout
-        )
-        
-        messages = [{"role": "system", "content": prompt}]
-        
-        # Add conversation history if provided
-        if conversation_history:
-            messages.extend(conversation_history)
+    # If search is disabled (or nothing needs searching), use simple non-agentic approach
+    if not enable_search or _skip_agent_without_gaps(search_gaps, prompt, conversation_history, metadata):
+        client = get_openai_client(api_key, base_url, timeout)
         
-        messages.append({"role": "user", "content": financial_data})
+        messages = _build_messages(financial_data, prompt, conversation_history)
         
         print("Sending request to LLM (non-agentic mode)...", file=sys.stderr)
         response = client.chat.completions.create(
@@ -103,30 +562,8 @@ def analyze_with_llm(
     # Agentic mode with tools and memory
     print("Initializing agentic LLM with tools and memory...", file=sys.stderr)
     
-    # Initialize cache
-    cache_enabled, cache_dir, cache_ttl = get_cache_config()
-    cache = SearchCache(
-        cache_dir=cache_dir,
-        ttl_hours=cache_ttl,
-        enabled=cache_enabled
-    ) if cache_enabled else None
-    
-    if cache:
-        print(f"Cache enabled: dir={cache_dir}, ttl={cache_ttl}h", file=sys.stderr)
-    else:
-        print("Cache disabled", file=sys.stderr)
-    
-    # Create LLM instance
-    llm_kwargs = {
-        "model": model,
-        "api_key": api_key,
-        "temperature": 0,
-        "timeout": timeout
-    }
-    if base_url:
-        llm_kwargs["base_url"] = base_url
-    
-    llm = ChatOpenAI(**llm_kwargs)
+    cache = get_search_cache()
+    agent_executor = get_agent_executor(prompt, model, api_key, base_url, timeout)
     
     # Create internet search tool with cache
     search_tool_func = create_internet_search_tool(
@@ -136,118 +573,171 @@ def analyze_with_llm(
         company_name=company_name
     )
     
-    # Wrap search function as LangChain tool
-    from langchain_core.tools import StructuredTool
+    budget = _observation_budget(observation_tokens, model)
+    prefetched = prefetch_searches(search_gaps, company_name, search_provider, search_api_key) if search_gaps else []
+    _record_search_gaps(search_gaps, prefetched, metadata)
     
-    # Create tool with proper description - make it very explicit
-    company_context = f" for {company_name}" if company_name else ""
-    search_tool = StructuredTool.from_function(
-        func=search_tool_func,
-        name="internet_search",
-        description=(
-            f"CRITICAL TOOL: Search the internet for missing financial data{company_context}. "
-            "You MUST use this tool whenever you see 'Not available' or missing data in the HTML. "
-            f"Examples: '{company_name or 'CompanyName'} ROCE ratio', "
-            f"'{company_name or 'CompanyName'} debt equity ratio 2024', "
-            f"'{company_name or 'CompanyName'} industry P/E ratio', "
-            f"'{company_name or 'CompanyName'} recent news'. "
-            "Always include the company name in your search query. "
-            "This tool returns factual financial information that you should use to fill gaps in the HTML data. "
-            "Input: A search query string containing the company name and the metric you're looking for."
-        ),
-        args_schema=None  # Let LangChain infer from function signature
-    )
+    user_input = _build_agent_input(financial_data, company_name, _prefetched_context(prefetched, budget))
     
-    tools = [search_tool]
+    print("Running agentic analysis with tool access...", file=sys.stderr)
+    if company_name:
+        print(f"Company name provided: {company_name}", file=sys.stderr)
     
-    # Create memory
-    memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True
-    )
+    try:
+        with bind_search_functions(func=budget.wrap(search_tool_func)):
+            result = agent_executor.invoke({
+                "input": user_input,
+                "chat_history": _history_messages(conversation_history)
+            })
+        analysis = _record_agent_result(result, metadata)
+        metadata["observation_budget"] = budget.as_metadata()
+        return analysis, metadata
+        
+    except Exception as e:
+        print(f"Error in agentic execution: {e}", file=sys.stderr)
+        # Fallback to non-agentic mode
+        print("Falling back to non-agentic mode...", file=sys.stderr)
+        analysis, fallback_metadata = analyze_with_llm(
+            financial_data=financial_data,
+            prompt=prompt,
+            base_url=base_url,
+            model=model,
+            api_key=api_key,
+            timeout=timeout,
+            enable_search=False,
+            conversation_history=conversation_history,
+            company_name=company_name
+        )
+        # A degraded answer: callers must not cache it under the agentic settings
+        fallback_metadata["fallback"] = True
+        return analysis, fallback_metadata
+
+
+async def analyze_with_llm_async(
+    financial_data: str,
+    prompt: str,
+    base_url: Optional[str],
+    model: str,
+    api_key: str,
+    timeout: float = DEFAULT_TIMEOUT,
+    enable_search: bool = True,
+    search_provider: str = "tavily",
+    search_api_key: Optional[str] = None,
+    conversation_history: Optional[list] = None,
+    company_name: Optional[str] = None,
+    search_gaps: Optional[List[Gap]] = None,
+    observation_tokens: Optional[int] = None,
+    on_event: Optional[Callable[[str, dict], None]] = None,
+    search_semaphore: Optional[asyncio.Semaphore] = None,
+    prefetched_searches: Optional[List[Tuple[str, str]]] = None
+) -> tuple[str, dict]:
+    """
+    Async variant of analyze_with_llm built on AsyncOpenAI and AgentExecutor.ainvoke.
     
-    # Add conversation history to memory if provided
-    if conversation_history:
-        for msg in conversation_history:
-            if msg.get("role") == "user":
-                memory.chat_memory.add_user_message(msg.get("content", ""))
-            elif msg.get("role") == "assistant":
-                memory.chat_memory.add_ai_message(msg.get("content", ""))
+    Takes the same arguments and returns the same (analysis, metadata) tuple;
+    no thread is held while waiting on the LLM or the search provider.
     
-    # Create agent prompt template with explicit tool usage instructions
-    enhanced_prompt = (
-        prompt + "\n\n"
-        "IMPORTANT: You have access to the internet_search tool. "
-        "Whenever you encounter missing data, 'Not available', or incomplete information in the HTML, "
-        "you MUST call the internet_search tool immediately. "
-        "Do not proceed with 'Not available' without first attempting to search for the information. "
-        "The tool is available and ready to use - make sure you use it when needed."
-    )
+    When on_event is given, the response is streamed: each LLM token is
+    reported as a ("token", {"text": ...}) event and every internet_search
+    call as a ("search", {...}) event. search_semaphore bounds concurrent
+    search provider calls (shared across a batch).
     
-    agent_prompt = ChatPromptTemplate.from_messages([
-        ("system", enhanced_prompt),
-        MessagesPlaceholder(variable_name="chat_history"),
-        ("human", "{input}"),
-        MessagesPlaceholder(variable_name="agent_scratchpad")
-    ])
+    Parallel internet_search calls of one agent turn run concurrently,
+    at most SEARCH_MAX_PARALLEL at a time; searches still running
+    SEARCH_DEADLINE_SECONDS after the agent starts are abandoned.
+    Search results reach the agent compressed to the observation token
+    budget, reported as metadata["observation_budget"] (both modes).
     
-    # Create agent
-    agent = create_openai_tools_agent(llm, tools, agent_prompt)
+    prefetched_searches are the results of prefetch_searches_async for
+    search_gaps when the caller already ran it; otherwise the gaps are
+    searched for here.
+    """
+    metadata = {
+        "tool_calls": [],
+        "search_queries": [],
+        "agentic": enable_search
+    }
     
-    # Create agent executor
-    agent_executor = AgentExecutor(
-        agent=agent,
-        tools=tools,
-        memory=memory,
-        verbose=True,
-        handle_parsing_errors=True,
-        max_iterations=5,
-        max_execution_time=timeout
+    if not enable_search or _skip_agent_without_gaps(search_gaps, prompt, conversation_history, metadata):
+        client = get_async_openai_client(api_key, base_url, timeout)
+        
+        messages = _build_messages(financial_data, prompt, conversation_history)
+        
+        print("Sending request to LLM (non-agentic mode)...", file=sys.stderr)
+        if on_event is None:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages
+            )
+            print("Received response from LLM", file=sys.stderr)
+            return response.choices[0].message.content, metadata
+        
+        chunks = []
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                chunks.append(token)
+                on_event("token", {"text": token})
+        print("Received response from LLM", file=sys.stderr)
+        return "".join(chunks), metadata
+    
+    print("Initializing agentic LLM with tools and memory...", file=sys.stderr)
+    
+    cache = get_search_cache()
+    agent_executor = get_agent_executor(
+        prompt, model, api_key, base_url, timeout, streaming=on_event is not None
     )
     
-    # Prepare input with explicit instructions about tool usage
-    company_context = f"\n\nCompany Name: {company_name}\n" if company_name else ""
-    user_input = (
-        f"Analyze the following financial data{company_context}"
-        f"\n\nIMPORTANT: If any data is missing or marked as 'Not available' in the HTML below, "
-        f"you MUST use the internet_search tool to find it. Do not skip searching for missing critical metrics. "
-        f"The HTML data follows:\n\n{financial_data}"
+    max_parallel, deadline_seconds = get_search_limits_config()
+    search_tool_coroutine = create_async_internet_search_tool(
+        provider=search_provider,
+        api_key=search_api_key,
+        cache=cache,
+        company_name=company_name,
+        on_event=on_event,
+        semaphore=search_semaphore,
+        max_parallel=max_parallel,
+        deadline_seconds=deadline_seconds
     )
     
+    budget = _observation_budget(observation_tokens, model)
+    if prefetched_searches is None and search_gaps:
+        prefetched_searches = await prefetch_searches_async(
+            search_gaps, company_name, search_provider, search_api_key, on_event, search_semaphore
+        )
+    prefetched = prefetched_searches or []
+    _record_search_gaps(search_gaps, prefetched, metadata)
+    
+    user_input = _build_agent_input(financial_data, company_name, _prefetched_context(prefetched, budget))
+    
     print("Running agentic analysis with tool access...", file=sys.stderr)
     if company_name:
         print(f"Company name provided: {company_name}", file=sys.stderr)
     
     try:
-        result = agent_executor.invoke({"input": user_input})
-        analysis = result.get("output", "")
-        
-        # Extract tool usage information from intermediate steps
-        if "intermediate_steps" in result:
-            for step in result["intermediate_steps"]:
-                if len(step) >= 2:
-                    tool_action = step[0]
-                    tool_result = step[1]
-                    if hasattr(tool_action, "tool"):
-                        tool_name = tool_action.tool
-                        metadata["tool_calls"].append(tool_name)
-                        if tool_name == "internet_search" and hasattr(tool_action, "tool_input"):
-                            query = tool_action.tool_input.get("query", "") if isinstance(tool_action.tool_input, dict) else str(tool_action.tool_input)
-                            metadata["search_queries"].append(query)
-        
-        print(f"Agent completed with {len(metadata['tool_calls'])} tool call(s)", file=sys.stderr)
-        if metadata['search_queries']:
-            print(f"Search queries used: {metadata['search_queries']}", file=sys.stderr)
-        else:
-            print("Warning: No search queries were executed. Tool may not have been invoked.", file=sys.stderr)
-        
+        config = {"callbacks": [_TokenEventHandler(on_event)]} if on_event else None
+        with bind_search_functions(coroutine=budget.wrap_async(search_tool_coroutine)):
+            result = await agent_executor.ainvoke({
+                "input": user_input,
+                "chat_history": _history_messages(conversation_history)
+            }, config=config)
+        analysis = _record_agent_result(result, metadata)
+        metadata["observation_budget"] = budget.as_metadata()
         return analysis, metadata
         
     except Exception as e:
         print(f"Error in agentic execution: {e}", file=sys.stderr)
-        # Fallback to non-agentic mode
         print("Falling back to non-agentic mode...", file=sys.stderr)
-        return analyze_with_llm(
+        if on_event:
+            on_event("status", {"stage": "fallback", "message": "Agent failed; retrying without tools"})
+        analysis, fallback_metadata = await analyze_with_llm_async(
             financial_data=financial_data,
             prompt=prompt,
             base_url=base_url,
@@ -256,6 +746,8 @@ def analyze_with_llm(
             timeout=timeout,
             enable_search=False,
             conversation_history=conversation_history,
-            company_name=company_name
+            company_name=company_name,
+            on_event=on_event
         )
-
+        fallback_metadata["fallback"] = True
+        return analysis, fallback_metadata
@@ -0,0 +1,255 @@
+"""Process-wide OpenAI clients, so LLM calls reuse pooled keep-alive connections."""
+
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from config import get_llm_pool_config
+
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Distinct (base_url, key, timeout) combinations kept; the least recently used is dropped
+MAX_REGISTRY_ENTRIES = 32
+
+# Seconds (on top of the client timeout) before a dropped client is closed,
+# so requests still using it can finish
+EVICTED_CLIENT_GRACE_SECONDS = 60
+
+# (base_url, api-key fingerprint, timeout)
+ClientKey = Tuple[Optional[str], str, float]
+
+
+@dataclass
+class _ClientEntry:
+    """Clients sharing one connection pool per event loop (plus one for sync calls)."""
+    
+    http_client: httpx.Client
+    client: OpenAI
+    async_clients: Dict[int, Tuple[httpx.AsyncClient, AsyncOpenAI]] = field(default_factory=dict)
+    loops: Dict[int, "weakref.ReferenceType[asyncio.AbstractEventLoop]"] = field(default_factory=dict)
+    uses: int = 0
+
+
+_entries: "OrderedDict[ClientKey, _ClientEntry]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short, non-reversible identifier of an API key (safe to log and report)."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _http_kwargs(timeout: float) -> Dict[str, Any]:
+    max_connections, max_keepalive, keepalive_seconds, _ = get_llm_pool_config()
+    return {
+        "timeout": timeout,
+        "http2": HTTP2_AVAILABLE,
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_seconds,
+        ),
+    }
+
+
+def _client_kwargs(api_key: str, base_url: Optional[str], timeout: float) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"api_key": api_key, "timeout": timeout}
+    if base_url:
+        kwargs["base_url"] = base_url
+    return kwargs
+
+
+def _entry(api_key: str, base_url: Optional[str], timeout: float) -> _ClientEntry:
+    key = (base_url or None, key_fingerprint(api_key), float(timeout))
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            http_client = httpx.Client(**_http_kwargs(timeout))
+            entry = _ClientEntry(
+                http_client=http_client,
+                client=OpenAI(**_client_kwargs(api_key, base_url, timeout), http_client=http_client),
+            )
+            _entries[key] = entry
+            while len(_entries) > MAX_REGISTRY_ENTRIES:
+                (_, _, evicted_timeout), evicted = _entries.popitem(last=False)
+                # A request may still be using the evicted clients: close them later
+                closer = threading.Timer(evicted_timeout + EVICTED_CLIENT_GRACE_SECONDS, _close_entry, args=(evicted,))
+                closer.daemon = True
+                closer.start()
+        else:
+            _entries.move_to_end(key)
+        entry.uses += 1
+        return entry
+
+
+def _close_entry(entry: _ClientEntry) -> None:
+    """Close an evicted entry's clients; async ones are closed on the loop that owns them."""
+    entry.http_client.close()
+    with _lock:
+        pairs = list(entry.async_clients.items())
+        entry.async_clients.clear()
+    for loop_id, (http_client, _) in pairs:
+        loop = entry.loops.get(loop_id, lambda: None)()
+        if loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+
+
+def event_loop_id() -> int:
+    """Identify the running event loop (0 outside one); async clients are per loop."""
+    try:
+        return id(asyncio.get_running_loop())
+    except RuntimeError:
+        return 0  # No loop: the async client is only built, never used
+
+
+def _async_pair(entry: _ClientEntry, api_key: str, base_url: Optional[str], timeout: float):
+    # Async connections belong to the loop that opened them, so each loop gets its own pool
+    loop_id = event_loop_id()
+    with _lock:
+        pair = entry.async_clients.get(loop_id)
+        if pair is None:
+            http_client = httpx.AsyncClient(**_http_kwargs(timeout))
+            pair = (http_client, AsyncOpenAI(**_client_kwargs(api_key, base_url, timeout), http_client=http_client))
+            entry.async_clients[loop_id] = pair
+            if loop_id:
+                entry.loops[loop_id] = weakref.ref(asyncio.get_running_loop())
+        return pair
+
+
+def get_openai_client(api_key: str, base_url: Optional[str], timeout: float) -> OpenAI:
+    """
+    Return the shared synchronous OpenAI client for an endpoint and key.
+    
+    Args:
+        api_key: OpenAI API key
+        base_url: Base URL for the OpenAI-compatible API (None => default)
+        timeout: Request timeout in seconds
+    """
+    return _entry(api_key, base_url, timeout).client
+
+
+def get_async_openai_client(api_key: str, base_url: Optional[str], timeout: float) -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for an endpoint and key on the running event loop."""
+    entry = _entry(api_key, base_url, timeout)
+    return _async_pair(entry, api_key, base_url, timeout)[1]
+
+
+def get_http_clients(api_key: str, base_url: Optional[str], timeout: float) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Return the shared httpx clients for an endpoint and key.
+    
+    Used for LangChain's ChatOpenAI (http_client/http_async_client), so the
+    agent and the non-agentic path share one pool.
+    
+    Returns:
+        Tuple of (sync client, async client for the running event loop)
+    """
+    entry = _entry(api_key, base_url, timeout)
+    return entry.http_client, _async_pair(entry, api_key, base_url, timeout)[0]
+
+
+def _pool_connections(http_client: Any) -> Dict[str, int]:
+    """Count open/idle connections of an httpx client (best effort: relies on httpcore internals)."""
+    try:
+        connections = http_client._transport._pool.connections
+    except AttributeError:
+        return {"connections": 0, "idle": 0}
+    return {
+        "connections": len(connections),
+        "idle": sum(1 for connection in connections if connection.is_idle()),
+    }
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Describe the registry and its connection pools.
+    
+    Returns:
+        Dictionary with the pool limits and one record per registered
+        client: base_url, key fingerprint, timeout, times handed out, and
+        open/idle connections for the sync pool and each event loop's pool
+    """
+    max_connections, max_keepalive, keepalive_seconds, _ = get_llm_pool_config()
+    with _lock:
+        items = list(_entries.items())
+    clients: List[Dict[str, Any]] = []
+    for (base_url, fingerprint, timeout), entry in items:
+        async_pools = [_pool_connections(http) for http, _ in list(entry.async_clients.values())]
+        clients.append({
+            "base_url": base_url or str(entry.client.base_url),
+            "key_fingerprint": fingerprint,
+            "timeout": timeout,
+            "uses": entry.uses,
+            "sync_pool": _pool_connections(entry.http_client),
+            "async_pools": async_pools,
+        })
+    return {
+        "limits": {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive,
+            "keepalive_seconds": keepalive_seconds,
+        },
+        "http2": HTTP2_AVAILABLE,
+        "clients": clients,
+    }
+
+
+async def warm_llm_clients(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 30.0
+) -> bool:
+    """
+    Open a connection to the LLM endpoint ahead of the first analysis.
+    
+    Sends one cheap authenticated request (GET /models) so DNS, TCP and TLS
+    are done and the connection sits in the keep-alive pool. Failures are
+    only logged.
+    
+    Args:
+        api_key: API key (default: OPENAI_API_KEY; nothing is done without one)
+        base_url: Endpoint (default: the OpenAI client's default/OPENAI_BASE_URL)
+        timeout: Client timeout; must match the timeout analyses use for the
+                 connection to be reused
+                 
+    Returns:
+        True if the request succeeded
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return False
+    client = get_async_openai_client(api_key, base_url, timeout)
+    try:
+        await client.with_options(max_retries=0).models.list()
+    except Exception as e:
+        # Any HTTP answer (even 404 from servers without /models) still leaves a warm connection
+        print(f"LLM connection warm-up: {client.base_url} answered with {e.__class__.__name__}", file=sys.stderr)
+        return False
+    print(f"LLM connection warmed: {client.base_url}", file=sys.stderr)
+    return True
+
+
+async def close_llm_clients() -> None:
+    """Close every pooled connection (call on application shutdown)."""
+    with _lock:
+        entries = list(_entries.values())
+        _entries.clear()
+    loop_id = event_loop_id()
+    for entry in entries:
+        entry.http_client.close()
+        pair = entry.async_clients.pop(loop_id, None)
+        if pair is not None:
+            await pair[0].aclose()
@@ -0,0 +1,217 @@
+"""Compress search results before they enter the agent scratchpad, within a token budget."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from token_counter import count_tokens
+
+# Lines that label the text after them (cached-query headers, numbered Tavily hits)
+_HEADER_RE = re.compile(r"^(?:=== Cached: .* ===|\d+\.\s+.+)$")
+_URL_LINE_RE = re.compile(r"^URL:\s*\S*$")
+_URL_RE = re.compile(r"https?://\S+")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_KEY_RE = re.compile(r"[a-z0-9]+")
+
+# Navigation, consent and sharing text scraped along with page content.
+# Only short sentences are dropped for it, so real content mentioning a word survives.
+_BOILERPLATE_RE = re.compile(
+    r"\b(?:cookies?|subscribe|sign (?:in|up)|log ?in|all rights reserved|privacy policy|"
+    r"terms of (?:use|service)|click here|advertisement|read more|share (?:this|on)|follow us|"
+    r"download the app)\b",
+    re.IGNORECASE,
+)
+BOILERPLATE_MAX_WORDS = 25
+
+# Sentences shorter than this (normalized characters) are never treated as duplicates
+MIN_DEDUPE_CHARS = 20
+
+# A sentence is cut to fit only if at least this many tokens of the budget are left
+MIN_PARTIAL_TOKENS = 20
+
+
+@dataclass
+class _Block:
+    """A header line (or none) and the sentences under it."""
+    
+    header: Optional[str]
+    sentences: List[str] = field(default_factory=list)
+
+
+def _clean_line(line: str) -> str:
+    line = _URL_RE.sub("", line).strip()
+    if line.endswith("..."):
+        line = line[:-3].rstrip()
+    return line
+
+
+def _parse(text: str) -> List[_Block]:
+    """Split a search result into header-led blocks of sentences, dropping URL lines and boilerplate."""
+    blocks = [_Block(header=None)]
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or _URL_LINE_RE.match(line):
+            continue
+        if _HEADER_RE.match(line):
+            blocks.append(_Block(header=_clean_line(line)))
+            continue
+        for sentence in _SENTENCE_SPLIT_RE.split(_clean_line(line)):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if _BOILERPLATE_RE.search(sentence) and len(sentence.split()) <= BOILERPLATE_MAX_WORDS:
+                continue
+            blocks[-1].sentences.append(sentence)
+    return blocks
+
+
+def _dedupe_key(sentence: str) -> Optional[str]:
+    key = " ".join(_KEY_RE.findall(sentence.lower()))
+    return key if len(key) >= MIN_DEDUPE_CHARS else None
+
+
+class ObservationBudget:
+    """
+    Per-analysis compressor for internet_search observations.
+    
+    Every result returned to the agent is stripped of URL lines, inline
+    links and short boilerplate sentences, loses sentences already returned
+    earlier in the same analysis (from this or a previous call), and is
+    clipped to per_call_tokens and to what is left of request_tokens. A
+    budget of 0 disables that limit. Not thread-safe: one instance serves
+    one analysis (the async agent's concurrent calls share its event loop).
+    """
+    
+    def __init__(self, per_call_tokens: int, request_tokens: int, model: Optional[str] = None):
+        """
+        Initialize the budget.
+        
+        Args:
+            per_call_tokens: Maximum tokens of one observation (0 = no limit)
+            request_tokens: Maximum tokens of all observations of the analysis (0 = no limit)
+            model: Model name used to select the tokenizer
+        """
+        self.per_call_tokens = max(0, per_call_tokens)
+        self.request_tokens = max(0, request_tokens)
+        self.model = model
+        self._seen: Set[str] = set()
+        self._stats = {
+            "calls": 0,
+            "raw_tokens": 0,
+            "used_tokens": 0,
+            "duplicates_removed": 0,
+            "clipped_calls": 0,
+            "exhausted_calls": 0,
+        }
+    
+    @property
+    def remaining(self) -> Optional[int]:
+        """Tokens left for the analysis (None without a request budget)."""
+        if not self.request_tokens:
+            return None
+        return max(0, self.request_tokens - self._stats["used_tokens"])
+    
+    def compress(self, query: str, text: str) -> str:
+        """
+        Compress one search result for the agent.
+        
+        Args:
+            query: The search query (used in notes returned instead of a result)
+            text: Search result text
+            
+        Returns:
+            Observation within the budget
+        """
+        self._stats["calls"] += 1
+        raw_tokens = count_tokens(text, self.model)
+        self._stats["raw_tokens"] += raw_tokens
+        
+        limit = self._call_limit()
+        if limit == 0:
+            self._stats["exhausted_calls"] += 1
+            return self._note(
+                f"Search budget for this analysis is used up; result for '{query}' omitted. "
+                "Continue the analysis with the data already available."
+            )
+        
+        blocks = _parse(text)
+        kept: List[Tuple[Optional[str], List[str]]] = []
+        used = 0
+        clipped = False
+        for block in blocks:
+            sentences: List[str] = []
+            header_tokens = count_tokens(block.header, self.model) if block.header else 0
+            for sentence in block.sentences:
+                key = _dedupe_key(sentence)
+                if key is not None and key in self._seen:
+                    self._stats["duplicates_removed"] += 1
+                    continue
+                sentence_tokens = count_tokens(sentence, self.model)
+                # A header costs tokens only with its first kept sentence
+                overhead = 0 if sentences else header_tokens
+                if limit is not None and used + overhead + sentence_tokens > limit:
+                    partial = self._cut(sentence, sentence_tokens, limit - used - overhead)
+                    if partial:
+                        sentences.append(partial)
+                        used = limit
+                    clipped = True
+                    break
+                if key is not None:
+                    self._seen.add(key)
+                sentences.append(sentence)
+                used += overhead + sentence_tokens
+            if sentences:
+                kept.append((block.header, sentences))
+            if clipped:
+                break
+        
+        if clipped:
+            self._stats["clipped_calls"] += 1
+        if not kept:
+            return self._note(f"No new information for '{query}' beyond earlier search results.")
+        
+        observation = "\n\n".join(
+            f"{header}\n{' '.join(sentences)}" if header else " ".join(sentences)
+            for header, sentences in kept
+        )
+        self._stats["used_tokens"] += count_tokens(observation, self.model)
+        return observation
+    
+    def wrap(self, func: Callable[[str], str]) -> Callable[[str], str]:
+        """Wrap a search function so its results are compressed."""
+        def compressed_search(query: str) -> str:
+            return self.compress(query, func(query))
+        return compressed_search
+    
+    def wrap_async(self, coroutine: Callable[[str], Awaitable[str]]) -> Callable[[str], Awaitable[str]]:
+        """Wrap a search coroutine function so its results are compressed."""
+        async def compressed_search(query: str) -> str:
+            return self.compress(query, await coroutine(query))
+        return compressed_search
+    
+    def as_metadata(self) -> Dict[str, Any]:
+        """Summary for the response metadata (observation_budget)."""
+        return {
+            "per_call_tokens": self.per_call_tokens,
+            "request_tokens": self.request_tokens,
+            "remaining_tokens": self.remaining,
+            **self._stats,
+        }
+    
+    def _call_limit(self) -> Optional[int]:
+        limits = [limit for limit in (self.per_call_tokens or None, self.remaining) if limit is not None]
+        return min(limits) if limits else None
+    
+    @staticmethod
+    def _cut(sentence: str, sentence_tokens: int, tokens: int) -> Optional[str]:
+        """Shorten a sentence to about the given number of tokens (None if too few are left)."""
+        if tokens < MIN_PARTIAL_TOKENS:
+            return None
+        words = sentence.split()
+        keep = max(1, len(words) * tokens // max(1, sentence_tokens) - 1)
+        return " ".join(words[:keep]) + " …"
+    
+    def _note(self, note: str) -> str:
+        # Notes are short and count against the budget like any observation
+        self._stats["used_tokens"] += count_tokens(note, self.model)
+        return note
@@ -0,0 +1,140 @@
+"""Rate limiting, retry backoff and circuit breaking for outbound HTTP calls."""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+    
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is temporarily unavailable; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter usable from threads and coroutines.
+    
+    Callers reserve a token up front and then wait for it, so concurrent
+    callers are spaced out fairly instead of all retrying at once.
+    """
+    
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        """
+        Args:
+            rate_per_second: Sustained request rate (<= 0 disables limiting)
+            burst: Maximum number of requests allowed back-to-back
+        """
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self) -> None:
+        """Wait (without blocking the event loop) until a request may be sent."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Fail fast after repeated upstream failures.
+    
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected for reset_timeout seconds; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+    
+    def before_call(self) -> bool:
+        """
+        Check whether a call may proceed.
+        
+        Returns:
+            True if the call is the half-open trial. Its caller must end it
+            with record_success or record_failure, also when the call is
+            cancelled or fails unexpectedly; otherwise no call is ever let
+            through again.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open (or a trial call is running)
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed >= self.reset_timeout and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(self.name, max(1.0, self.reset_timeout - elapsed))
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 10.0) -> float:
+    """
+    Full-jitter exponential backoff.
+    
+    Args:
+        attempt: Zero-based retry attempt
+        base: Delay scale in seconds
+        cap: Maximum delay in seconds
+        
+    Returns:
+        Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -1,42 +1,436 @@
 """Screener.in client for fetching company HTML data."""
 
+import asyncio
 import sys
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from http.cookiejar import CookieJar
+from typing import Any, Dict, Optional, Sequence, Tuple
 
-import requests
+import httpx
 
+from cache import HtmlCache
+from config import get_screener_cache_config, get_screener_client_config
 from constants import DEFAULT_REQUEST_TIMEOUT
+from resilience import CircuitBreaker, CircuitOpenError, TokenBucket, backoff_delay
+
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Browser-like headers sent with every Screener request (built once)
+SCREENER_HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    # httpx only decodes the encodings it has codecs for; don't advertise br/zstd.
+    "accept-encoding": "gzip, deflate",
+    "accept-language": "en-GB,en-US;q=0.9,en;q=0.8",
+    "referer": "https://www.screener.in/",
+    "sec-ch-ua": "\"Not/A)Brand\";v=\"8\", \"Chromium\";v=\"120\", \"Google Chrome\";v=\"120\"",
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": "\"macOS\"",
+    "sec-fetch-dest": "document",
+    "sec-fetch-mode": "navigate",
+    "sec-fetch-site": "same-origin",
+    "sec-fetch-user": "?1",
+    "upgrade-insecure-requests": "1",
+    "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+}
+
+# URL suffix of each company page view; the plain company URL is the standalone view
+SCREENER_VIEWS = {"standalone": "", "consolidated": "consolidated/"}
+
+# Views fetched by fetch_company_views, primary view first
+DEFAULT_VIEWS = ("consolidated", "standalone")
+
+# Statuses worth retrying; 403 is not retried (it needs cookies, not patience)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Statuses that mean Screener is rejecting or failing us (count toward the breaker);
+# 403 is left out: it is about the caller's cookies, not Screener's health
+BREAKER_STATUSES = {429, 500, 502, 503, 504}
+
+# Process-wide Screener page cache (created on first use)
+_html_cache: Optional[HtmlCache] = None
+
+# Shared connection pools, rate limiter and breaker (created on first use)
+_sync_client: Optional[httpx.Client] = None
+_async_clients: Dict[int, httpx.AsyncClient] = {}
+_rate_limiter: Optional[TokenBucket] = None
+_circuit_breaker: Optional[CircuitBreaker] = None
+_max_retries = 0
+_setup_lock = threading.Lock()
+
+
+class ScreenerError(Exception):
+    """Raised when a Screener page cannot be fetched."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _NoPersistCookieJar(CookieJar):
+    """Cookie jar that ignores Set-Cookie, so a shared client never leaks one caller's session to another."""
+    
+    def extract_cookies(self, response, request) -> None:
+        return None
 
 
 def parse_cookie_header(cookie_header: str) -> dict:
     """Convert a raw cookie header string into a dict for requests."""
-    cookies = {}
+    return dict(_parse_cookie_pairs(cookie_header))
+
+
+@lru_cache(maxsize=64)
+def _parse_cookie_pairs(cookie_header: str) -> tuple:
+    pairs = []
     for part in cookie_header.split(";"):
         if "=" in part:
             k, v = part.split("=", 1)
-            cookies[k.strip()] = v.strip()
-    return cookies
+            pairs.append((k.strip(), v.strip()))
+    return tuple(pairs)
+
+
+@lru_cache(maxsize=64)
+def _cookie_header_value(cookie_header: str) -> str:
+    """Normalize a raw cookie header for sending on a shared client."""
+    return "; ".join(f"{k}={v}" for k, v in _parse_cookie_pairs(cookie_header))
 
 
 def build_screener_headers() -> dict:
     """Return browser-like headers for screener.in requests."""
+    return dict(SCREENER_HEADERS)
+
+
+def _setup() -> None:
+    """Create the rate limiter and circuit breaker from configuration."""
+    global _rate_limiter, _circuit_breaker, _max_retries
+    if _rate_limiter is not None:
+        return
+    with _setup_lock:
+        if _rate_limiter is not None:
+            return
+        rate, burst, max_retries, breaker_threshold, breaker_reset = get_screener_client_config()
+        _max_retries = max(0, max_retries)
+        _circuit_breaker = CircuitBreaker("Screener", breaker_threshold, breaker_reset)
+        _rate_limiter = TokenBucket(rate, burst)
+
+
+def _client_kwargs(timeout: float) -> Dict[str, Any]:
+    return {
+        "headers": SCREENER_HEADERS,
+        "cookies": _NoPersistCookieJar(),
+        "follow_redirects": True,
+        "timeout": timeout,
+        "http2": HTTP2_AVAILABLE,
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+    }
+
+
+def _get_sync_client() -> httpx.Client:
+    """Return the shared keep-alive client for synchronous fetches."""
+    global _sync_client
+    _setup()
+    if _sync_client is None:
+        with _setup_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(**_client_kwargs(DEFAULT_REQUEST_TIMEOUT))
+    return _sync_client
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for the running event loop."""
+    _setup()
+    loop_id = id(asyncio.get_running_loop())
+    client = _async_clients.get(loop_id)
+    if client is None:
+        client = httpx.AsyncClient(**_client_kwargs(DEFAULT_REQUEST_TIMEOUT))
+        _async_clients[loop_id] = client
+    return client
+
+
+async def close_clients() -> None:
+    """Close the shared connection pools (call on application shutdown)."""
+    global _sync_client
+    client = _async_clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def get_html_cache() -> HtmlCache:
+    """Return the process-wide Screener HTML cache."""
+    global _html_cache
+    if _html_cache is None:
+        enabled, cache_dir, ttl_minutes = get_screener_cache_config()
+        _html_cache = HtmlCache(cache_dir=cache_dir, ttl_minutes=ttl_minutes, enabled=enabled)
+    return _html_cache
+
+
+def _conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Build If-None-Match/If-Modified-Since headers from a cache entry."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["if-none-match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["if-modified-since"] = entry["last_modified"]
+    return headers
+
+
+def _request_headers(entry: Optional[Dict[str, Any]], cookie_header: Optional[str]) -> Dict[str, str]:
+    """Per-request headers on top of the client defaults."""
+    headers = _conditional_headers(entry)
+    if cookie_header:
+        headers["cookie"] = _cookie_header_value(cookie_header)
+    return headers
+
+
+def _cache_metadata(status: str, entry: Optional[Dict[str, Any]], bytes_saved: int = 0) -> Dict[str, Any]:
+    """Describe how a page was obtained, for response metadata."""
     return {
-        "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "accept-encoding": "gzip, deflate, br, zstd",
-        "accept-language": "en-GB,en-US;q=0.9,en;q=0.8",
-        "referer": "https://www.screener.in/",
-        "sec-ch-ua": "\"Not/A)Brand\";v=\"8\", \"Chromium\";v=\"120\", \"Google Chrome\";v=\"120\"",
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": "\"macOS\"",
-        "sec-fetch-dest": "document",
-        "sec-fetch-mode": "navigate",
-        "sec-fetch-site": "same-origin",
-        "sec-fetch-user": "?1",
-        "upgrade-insecure-requests": "1",
-        "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "cache": status,
+        "bytes": entry.get("size", 0) if entry else 0,
+        "bytes_saved": bytes_saved,
+        "sha256": entry.get("sha256") if entry else None,
     }
 
 
+def _view_url(ticker: str, view: str) -> str:
+    if view not in SCREENER_VIEWS:
+        raise ValueError(f"Unknown Screener view '{view}'; expected one of {', '.join(SCREENER_VIEWS)}")
+    return f"https://www.screener.in/company/{ticker}/{SCREENER_VIEWS[view]}"
+
+
+def _view_cache_key(ticker: str, view: str) -> str:
+    # The standalone page keeps the plain ticker key used before views existed
+    return ticker if view == "standalone" else f"{ticker}.{view}"
+
+
+def _check_view(response: httpx.Response, ticker: str, view: str) -> None:
+    """Raise a 404 ScreenerError when Screener redirected away from the requested view."""
+    suffix = SCREENER_VIEWS[view]
+    if suffix and not response.url.path.endswith(f"/{suffix}"):
+        raise ScreenerError(f"Screener has no {view} view for {ticker}.", status_code=404)
+
+
+def _normalize_ticker(company: str) -> str:
+    """Return the upper-cased ticker or exit if it is empty."""
+    ticker = company.strip().upper()
+    if not ticker:
+        print("Error: --company value cannot be empty.", file=sys.stderr)
+        sys.exit("company value cannot be empty.")
+    return ticker
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a numeric Retry-After header."""
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _http_error(status: int, ticker: str, response: Optional[httpx.Response] = None) -> ScreenerError:
+    """Build a helpful error for a failed Screener response."""
+    message = f"Failed to fetch Screener page for {ticker} (status {status})."
+    if status == 403:
+        message += (
+            " Screener returned 403 (forbidden). You may need to provide authenticated cookies"
+            " via --cookie-header or SCREENER_COOKIE_HEADER."
+        )
+    elif status == 404:
+        message += f" Screener cannot find ticker '{ticker}'. Double-check the symbol on screener.in."
+    elif status == 429:
+        message += " Screener is rate limiting requests; lower SCREENER_RATE_PER_SECOND."
+    print(f"Error: {message}", file=sys.stderr)
+    retry_after = _retry_after_seconds(response) if response is not None else None
+    return ScreenerError(message, status_code=status, retry_after=retry_after)
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    """Delay before the next attempt, honouring Retry-After when present."""
+    retry_after = _retry_after_seconds(response) if response is not None else None
+    if retry_after is not None:
+        return min(retry_after, 30.0)
+    return backoff_delay(attempt)
+
+
+def _check_circuit(ticker: str) -> bool:
+    """Raise a 503 ScreenerError while the breaker is open; True for the half-open trial call."""
+    try:
+        return _circuit_breaker.before_call()
+    except CircuitOpenError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        raise ScreenerError(
+            f"Screener is temporarily unavailable (too many recent failures); not fetching {ticker}.",
+            status_code=503,
+            retry_after=exc.retry_after,
+        ) from exc
+
+
+def _finish(response: httpx.Response, ticker: str) -> httpx.Response:
+    """Record the outcome with the breaker and raise for error statuses."""
+    status = response.status_code
+    if status in BREAKER_STATUSES:
+        _circuit_breaker.record_failure()
+    else:
+        _circuit_breaker.record_success()
+    if status >= 400:
+        raise _http_error(status, ticker, response)
+    return response
+
+
+def _request_error(ticker: str, error: httpx.HTTPError) -> ScreenerError:
+    """Record a failed request with the breaker and wrap it in a ScreenerError."""
+    _circuit_breaker.record_failure()
+    print(f"Network error while fetching Screener page: {error}", file=sys.stderr)
+    return ScreenerError(f"Network error while fetching Screener page for {ticker}: {error}")
+
+
+def _get_with_retries(url: str, headers: Dict[str, str], ticker: str, timeout: float) -> httpx.Response:
+    """GET a Screener URL on the shared client with rate limiting and retries."""
+    client = _get_sync_client()
+    trial = _check_circuit(ticker)
+    try:
+        attempt = 0
+        while True:
+            _rate_limiter.acquire()
+            try:
+                response = client.get(url, headers=headers, timeout=timeout)
+            except httpx.TransportError as req_err:
+                if attempt >= _max_retries:
+                    raise _request_error(ticker, req_err) from req_err
+                response = None
+            except httpx.HTTPError as req_err:
+                # Redirect loops, undecodable bodies, ...: retrying would not help
+                raise _request_error(ticker, req_err) from req_err
+            else:
+                if response.status_code not in RETRYABLE_STATUSES or attempt >= _max_retries:
+                    return _finish(response, ticker)
+            delay = _retry_delay(attempt, response)
+            attempt += 1
+            print(f"Retrying Screener fetch for {ticker} in {delay:.1f}s (attempt {attempt}/{_max_retries})", file=sys.stderr)
+            time.sleep(delay)
+    except ScreenerError:
+        raise  # Outcome already recorded
+    except BaseException:
+        # Ended without an outcome (interrupted, unexpected error): a half-open trial counts as failed
+        if trial:
+            _circuit_breaker.record_failure()
+        raise
+
+
+async def _aget_with_retries(url: str, headers: Dict[str, str], ticker: str, timeout: float) -> httpx.Response:
+    """Async counterpart of _get_with_retries."""
+    client = _get_async_client()
+    trial = _check_circuit(ticker)
+    try:
+        attempt = 0
+        while True:
+            await _rate_limiter.acquire_async()
+            try:
+                response = await client.get(url, headers=headers, timeout=timeout)
+            except httpx.TransportError as req_err:
+                if attempt >= _max_retries:
+                    raise _request_error(ticker, req_err) from req_err
+                response = None
+            except httpx.HTTPError as req_err:
+                raise _request_error(ticker, req_err) from req_err
+            else:
+                if response.status_code not in RETRYABLE_STATUSES or attempt >= _max_retries:
+                    return _finish(response, ticker)
+            delay = _retry_delay(attempt, response)
+            attempt += 1
+            print(f"Retrying Screener fetch for {ticker} in {delay:.1f}s (attempt {attempt}/{_max_retries})", file=sys.stderr)
+            await asyncio.sleep(delay)
+    except ScreenerError:
+        raise
+    except BaseException:
+        # Includes cancellation (e.g. a streaming client disconnected)
+        if trial:
+            _circuit_breaker.record_failure()
+        raise
+
+
+def fetch_company_page(
+    company: str,
+    cookie_header: Optional[str] = None,
+    timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    view: str = "standalone"
+) -> tuple[str, Dict[str, Any]]:
+    """
+    Get Screener HTML for a ticker, served from the disk cache when possible.
+    
+    Fresh cache entries skip the network; expired ones are revalidated with
+    ETag/Last-Modified and reused on 304 Not Modified. Requests go through a
+    shared keep-alive client with rate limiting, jittered retries for
+    transient errors and a circuit breaker.
+    
+    Args:
+        company: Ticker/symbol as used on Screener (e.g., IPL)
+        cookie_header: Raw cookie header string for authenticated access
+        timeout: Request timeout in seconds
+        view: Page view, "standalone" (the plain company URL) or "consolidated"
+        
+    Returns:
+        Tuple of (html_content, cache_metadata) where cache_metadata has
+        "cache" ("hit", "revalidated", "miss" or "disabled"), "bytes",
+        "bytes_saved" and "sha256" (content digest of the page)
+        
+    Raises:
+        SystemExit: If company is empty
+        ScreenerError: If the page cannot be fetched (status 404 when the
+                       company or the view does not exist)
+    """
+    ticker = _normalize_ticker(company)
+    url = _view_url(ticker, view)
+    cache_key = _view_cache_key(ticker, view)
+    html_cache = get_html_cache()
+    
+    entry = html_cache.lookup(cache_key)
+    if entry and entry["fresh"]:
+        html = html_cache.read(entry)
+        if html is not None:
+            print(f"✓ Screener cache HIT for {cache_key} ({entry['size']:,} bytes)", file=sys.stderr)
+            return html, _cache_metadata("hit", entry, entry["size"])
+        entry = None
+    
+    print(f"Fetching Screener page for {cache_key}...", file=sys.stderr)
+    response = _get_with_retries(url, _request_headers(entry, cookie_header), ticker, timeout)
+    
+    if response.status_code == 304 and entry:
+        html = html_cache.read(entry)
+        if html is not None:
+            entry = html_cache.touch(cache_key, entry)
+            print(f"✓ Screener page for {cache_key} not modified; reusing cached copy", file=sys.stderr)
+            return html, _cache_metadata("revalidated", entry, entry["size"])
+        # Cached body vanished: drop the entry and fetch unconditionally
+        html_cache.invalidate(cache_key)
+        return fetch_company_page(company, cookie_header=cookie_header, timeout=timeout, view=view)
+    
+    _check_view(response, ticker, view)
+    print(
+        f"✅ Screener HTML fetched successfully for {cache_key} ({len(response.text):,} characters).",
+        file=sys.stderr
+    )
+    entry = html_cache.store(
+        cache_key,
+        response.text,
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"),
+    )
+    return response.text, _cache_metadata("miss" if html_cache.enabled else "disabled", entry)
+
+
 def fetch_company_html(
     company: str,
     cookie_header: Optional[str] = None,
@@ -54,42 +448,169 @@ def fetch_company_html(
         HTML content as string
         
     Raises:
-        SystemExit: If company is empty or request fails
+        SystemExit: If company is empty
+        ScreenerError: If the page cannot be fetched
     """
-    ticker = company.strip().upper()
-    if not ticker:
-        print("Error: --company value cannot be empty.", file=sys.stderr)
-        sys.exit(1)
+    html, _ = fetch_company_page(company, cookie_header=cookie_header, timeout=timeout)
+    return html
+
+
+async def fetch_company_page_async(
+    company: str,
+    cookie_header: Optional[str] = None,
+    timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    view: str = "standalone"
+) -> tuple[str, Dict[str, Any]]:
+    """
+    Async variant of fetch_company_page that does not block the event loop.
     
-    url = f"https://www.screener.in/company/{ticker}/"
-    headers = build_screener_headers()
-    cookies = parse_cookie_header(cookie_header) if cookie_header else None
+    Args:
+        company: Ticker/symbol as used on Screener (e.g., IPL)
+        cookie_header: Raw cookie header string for authenticated access
+        timeout: Request timeout in seconds
+        view: Page view, "standalone" or "consolidated"
+        
+    Returns:
+        Tuple of (html_content, cache_metadata)
+        
+    Raises:
+        SystemExit: If company is empty
+        ScreenerError: If the page cannot be fetched
+    """
+    ticker = _normalize_ticker(company)
+    url = _view_url(ticker, view)
+    cache_key = _view_cache_key(ticker, view)
+    html_cache = get_html_cache()
     
-    print(f"Fetching Screener page for {ticker}...", file=sys.stderr)
-    try:
-        response = requests.get(url, headers=headers, cookies=cookies, timeout=timeout)
-        response.raise_for_status()
-    except requests.HTTPError as http_err:
-        status = http_err.response.status_code if http_err.response else "unknown"
-        print(f"Error: Failed to fetch Screener page (status {status}).", file=sys.stderr)
-        if status == 403:
-            print(
-                "Screener returned 403 (forbidden). You may need to provide authenticated cookies via --cookie-header or SCREENER_COOKIE_HEADER.",
-                file=sys.stderr
-            )
-        elif status == 404:
-            print(
-                f"Screener cannot find ticker '{ticker}'. Double-check the symbol on screener.in.",
-                file=sys.stderr
-            )
-        sys.exit(1)
-    except requests.RequestException as req_err:
-        print(f"Network error while fetching Screener page: {req_err}", file=sys.stderr)
-        sys.exit(1)
+    entry = await asyncio.to_thread(html_cache.lookup, cache_key)
+    if entry and entry["fresh"]:
+        html = await asyncio.to_thread(html_cache.read, entry)
+        if html is not None:
+            print(f"✓ Screener cache HIT for {cache_key} ({entry['size']:,} bytes)", file=sys.stderr)
+            return html, _cache_metadata("hit", entry, entry["size"])
+        entry = None
     
+    print(f"Fetching Screener page for {cache_key}...", file=sys.stderr)
+    response = await _aget_with_retries(url, _request_headers(entry, cookie_header), ticker, timeout)
+    
+    if response.status_code == 304 and entry:
+        html = await asyncio.to_thread(html_cache.read, entry)
+        if html is not None:
+            entry = await asyncio.to_thread(html_cache.touch, cache_key, entry)
+            print(f"✓ Screener page for {cache_key} not modified; reusing cached copy", file=sys.stderr)
+            return html, _cache_metadata("revalidated", entry, entry["size"])
+        await asyncio.to_thread(html_cache.invalidate, cache_key)
+        return await fetch_company_page_async(company, cookie_header=cookie_header, timeout=timeout, view=view)
+    
+    _check_view(response, ticker, view)
     print(
-        f"✅ Screener HTML fetched successfully for {ticker} ({len(response.text):,} characters).",
+        f"✅ Screener HTML fetched successfully for {cache_key} ({len(response.text):,} characters).",
         file=sys.stderr
     )
-    return response.text
+    entry = await asyncio.to_thread(
+        html_cache.store,
+        cache_key,
+        response.text,
+        response.headers.get("etag"),
+        response.headers.get("last-modified"),
+    )
+    return response.text, _cache_metadata("miss" if html_cache.enabled else "disabled", entry)
 
+
+async def fetch_company_html_async(
+    company: str,
+    cookie_header: Optional[str] = None,
+    timeout: int = DEFAULT_REQUEST_TIMEOUT
+) -> str:
+    """
+    Async variant of fetch_company_html.
+    
+    Returns:
+        HTML content as string
+    """
+    html, _ = await fetch_company_page_async(company, cookie_header=cookie_header, timeout=timeout)
+    return html
+
+
+def _collect_views(
+    ticker: str,
+    views: Sequence[str],
+    outcomes: Sequence[Any]
+) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """Keep the views that exist; raise when none does or a fetch failed for another reason."""
+    pages: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    missing = []
+    for view, outcome in zip(views, outcomes):
+        if isinstance(outcome, ScreenerError) and outcome.status_code == 404:
+            missing.append(outcome)
+            print(f"Note: No {view} view for {ticker}; continuing without it", file=sys.stderr)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            pages[view] = outcome
+    if not pages:
+        raise missing[-1]
+    
+    # Without consolidated figures Screener may serve the standalone page under both URLs
+    digests = {}
+    for view in list(pages):
+        digest = pages[view][1].get("sha256")
+        if digest is not None and digest in digests:
+            print(f"Note: {view} view of {ticker} is the same page as {digests[digest]}", file=sys.stderr)
+            del pages[view]
+        elif digest is not None:
+            digests[digest] = view
+    return pages
+
+
+def fetch_company_views(
+    company: str,
+    cookie_header: Optional[str] = None,
+    timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    views: Sequence[str] = DEFAULT_VIEWS
+) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """
+    Fetch several views of a company page concurrently.
+    
+    Each view goes through fetch_company_page (cache, rate limiter,
+    retries) on the shared keep-alive client, so the requests share its
+    connections (multiplexed over one connection with HTTP/2).
+    
+    Args:
+        company: Ticker/symbol as used on Screener (e.g., IPL)
+        cookie_header: Raw cookie header string for authenticated access
+        timeout: Request timeout in seconds
+        views: Views to fetch, primary view first
+        
+    Returns:
+        View -> (html_content, cache_metadata) for the views that exist, in
+        the order of views. A view Screener does not have (404, a redirect
+        to another view, or the same page as an earlier view) is left out.
+        
+    Raises:
+        SystemExit: If company is empty
+        ScreenerError: If no view exists or a fetch fails for another reason
+    """
+    ticker = _normalize_ticker(company)
+    with ThreadPoolExecutor(max_workers=len(views), thread_name_prefix="screener-view") as executor:
+        futures = [
+            executor.submit(fetch_company_page, ticker, cookie_header, timeout, view)
+            for view in views
+        ]
+        outcomes = [future.exception() or future.result() for future in futures]
+    return _collect_views(ticker, views, outcomes)
+
+
+async def fetch_company_views_async(
+    company: str,
+    cookie_header: Optional[str] = None,
+    timeout: int = DEFAULT_REQUEST_TIMEOUT,
+    views: Sequence[str] = DEFAULT_VIEWS
+) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """Async variant of fetch_company_views (same arguments and result)."""
+    ticker = _normalize_ticker(company)
+    outcomes = await asyncio.gather(
+        *(fetch_company_page_async(ticker, cookie_header, timeout, view) for view in views),
+        return_exceptions=True
+    )
+    return _collect_views(ticker, views, outcomes)
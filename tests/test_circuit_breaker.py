@@ -0,0 +1,79 @@
+"""Tests for the circuit breaker guarding Screener fetches."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock."""
+    now = [100.0]
+    monkeypatch.setattr("resilience.time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        assert breaker.before_call() is False
+        breaker.record_failure()
+
+
+def test_opens_at_threshold(clock):
+    breaker = CircuitBreaker("screener", failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 60
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("screener", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_exactly_one_trial_through(clock):
+    breaker = CircuitBreaker("screener", failure_threshold=2, reset_timeout=60)
+    _open(breaker)
+    
+    clock[0] += 60
+    assert breaker.state == "half-open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_trial_closes_the_circuit(clock):
+    breaker = CircuitBreaker("screener", failure_threshold=2, reset_timeout=60)
+    _open(breaker)
+    clock[0] += 60
+    assert breaker.before_call() is True
+    
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_reopens_for_a_full_reset_timeout(clock):
+    breaker = CircuitBreaker("screener", failure_threshold=5, reset_timeout=60)
+    _open(breaker)
+    clock[0] += 60
+    assert breaker.before_call() is True
+    
+    # A single failure re-opens the circuit, below the threshold
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock[0] += 59
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock[0] += 1
+    assert breaker.before_call() is True
@@ -0,0 +1,119 @@
+"""Tests for fitting the financial data into the context window."""
+
+import pytest
+
+from context_fitter import FitCandidate, candidate_ladder, fit_to_context
+from financial_tables import OUTPUT_FORMATS, serialize
+from html_extractor import extract_financial_tables
+from html_parsers import get_parser_backend
+from token_counter import count_tokens
+
+MODEL = "gpt-4o-mini"
+
+
+def _table(periods, rows, seed):
+    head = "".join(f"<th>{period}</th>" for period in periods)
+    body = []
+    for row_index, label in enumerate(rows):
+        cells = []
+        for column in range(len(periods)):
+            value = (seed * 7919 + row_index * 104729 + column * 1299709) % 50000
+            # Some empty cells, which aggressive mode drops
+            cells.append("<td></td>" if value % 11 == 0 else f"<td>{value:,}</td>")
+        body.append(f"<tr><td class='text'>{label}</td>{''.join(cells)}</tr>")
+    return (
+        f"<table class='data-table'><thead><tr><th class='text'></th>{head}</tr></thead>"
+        f"<tbody>{''.join(body)}</tbody></table>"
+    )
+
+
+def _page():
+    """A Screener-like page with every section extracted by default."""
+    quarters = [f"{month} {year}" for year in range(2021, 2025) for month in ("Mar", "Jun", "Sep", "Dec")]
+    years = [f"Mar {year}" for year in range(2013, 2025)]
+    rows = ["Sales", "Expenses", "Operating Profit", "Other Income", "Net Profit", "EPS in Rs"]
+    sections = [
+        ("quarters", "Quarterly Results", quarters),
+        ("profit-loss", "Profit & Loss", years + ["TTM"]),
+        ("balance-sheet", "Balance Sheet", years),
+        ("cash-flow", "Cash Flows", years),
+        ("ratios", "Ratios", years),
+        ("shareholding", "Shareholding Pattern", quarters[-8:]),
+    ]
+    parts = ["<html><body><h1>Test Industries Ltd</h1>"]
+    for seed, (section_id, title, periods) in enumerate(sections):
+        parts.append(f"<section id='{section_id}'><h2>{title}</h2>{_table(periods, rows, seed)}</section>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return extract_financial_tables(
+        _page(), max_years=10, max_quarters=12, backend=get_parser_backend("html.parser"), use_cache=False
+    )
+
+
+@pytest.fixture(scope="module")
+def requested(tables):
+    return FitCandidate(
+        max_years=10,
+        max_quarters=12,
+        sections=tuple(section.section_id for section in tables.sections),
+        aggressive=False,
+    )
+
+
+def _ladder_tokens(tables, requested, output_format):
+    tokens = []
+    for index, candidate in enumerate(candidate_ladder(requested, output_format)):
+        trimmed = tables if index == 0 else tables.trimmed(
+            candidate.max_years, candidate.max_quarters, candidate.sections, candidate.aggressive
+        )
+        tokens.append(count_tokens(serialize(trimmed, output_format), MODEL))
+    return tokens
+
+
+@pytest.mark.parametrize("output_format", list(OUTPUT_FORMATS))
+def test_ladder_token_counts_never_increase(tables, requested, output_format):
+    tokens = _ladder_tokens(tables, requested, output_format)
+    assert len(tokens) > 10
+    assert all(later <= earlier for earlier, later in zip(tokens, tokens[1:]))
+    assert tokens[-1] < tokens[0]
+
+
+@pytest.mark.parametrize("output_format", ["html", "compact"])
+def test_fit_is_monotonic_in_budget_and_picks_the_richest_candidate(tables, requested, output_format):
+    tokens = _ladder_tokens(tables, requested, output_format)
+    previous = 0
+    for budget in range(tokens[-1], tokens[0] + 1, max(1, (tokens[0] - tokens[-1]) // 40)):
+        fit = fit_to_context(tables, requested, output_format, budget, MODEL)
+        assert fit.fits
+        assert fit.data_tokens <= budget
+        assert fit.data_tokens >= previous
+        previous = fit.data_tokens
+        # Binary search agrees with a linear scan of the ladder
+        assert fit.data_tokens == next(count for count in tokens if count <= budget)
+        assert fit.requested_tokens == tokens[0]
+
+
+def test_request_that_fits_is_sent_unchanged(tables, requested):
+    fit = fit_to_context(tables, requested, "html", 10 ** 6, MODEL)
+    assert fit.fits
+    assert not fit.applied
+    assert fit.candidate == requested
+    assert fit.financial_data == serialize(tables, "html")
+    assert fit.candidates_evaluated == 1
+
+
+def test_nothing_fits_returns_the_leanest_candidate(tables, requested):
+    fit = fit_to_context(tables, requested, "html", 1, MODEL)
+    assert not fit.fits
+    assert fit.candidate == candidate_ladder(requested, "html")[-1]
+
+
+def test_auto_fit_disabled_only_considers_the_request(tables, requested):
+    fit = fit_to_context(tables, requested, "html", 1, MODEL, auto_fit=False)
+    assert not fit.fits
+    assert not fit.applied
+    assert fit.candidate == requested
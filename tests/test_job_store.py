@@ -0,0 +1,107 @@
+"""Tests for the lease-based requeueing of the durable job store."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from jobs.store import STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING, JobStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable wall clock for heartbeats and lease expiry."""
+    now = [1_000_000.0]
+    monkeypatch.setattr("jobs.store.time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    return JobStore(str(tmp_path / "jobs.db"), lease_seconds=60, max_attempts=2)
+
+
+def test_live_lease_is_not_requeued(store, clock):
+    job_id = store.enqueue({"company": "TCS"})
+    store.heartbeat("a")
+    assert store.claim_next("a")["id"] == job_id
+    
+    clock[0] += 30
+    assert store.requeue_expired() == 0
+    assert store.get(job_id)["status"] == STATUS_RUNNING
+
+
+def test_expired_lease_is_requeued_and_claimed_by_another_owner(store, clock):
+    job_id = store.enqueue({"company": "TCS"})
+    store.heartbeat("a")
+    store.claim_next("a")
+    
+    clock[0] += 61
+    store.heartbeat("b")
+    assert store.requeue_expired() == 1
+    job = store.get(job_id)
+    assert job["status"] == STATUS_QUEUED
+    assert job["started_at"] is None
+    
+    assert store.claim_next("b")["id"] == job_id
+    assert store.get(job_id)["attempts"] == 2
+
+
+def test_heartbeat_keeps_lease_alive(store, clock):
+    store.enqueue({"company": "TCS"})
+    store.heartbeat("a")
+    store.claim_next("a")
+    for _ in range(5):
+        clock[0] += 40
+        store.heartbeat("a")
+        assert store.requeue_expired() == 0
+
+
+def test_job_is_failed_after_max_attempts(store, clock):
+    job_id = store.enqueue({"company": "TCS"})
+    for owner in ("a", "b"):
+        store.heartbeat(owner)
+        assert store.claim_next(owner)["id"] == job_id
+        clock[0] += 61
+        store.requeue_expired()
+    
+    job = store.get(job_id)
+    assert job["status"] == STATUS_FAILED
+    assert job["attempts"] == 2
+    assert "Abandoned after 2 attempt(s)" in job["error"]
+
+
+def test_pinned_job_waits_for_its_owner_until_the_lease_expires(store, clock):
+    job_id = store.enqueue({"company": "TCS"}, owner="a")
+    store.heartbeat("a")
+    store.heartbeat("b")
+    assert store.claim_next("b") is None
+    
+    clock[0] += 61
+    store.heartbeat("b")
+    store.requeue_expired()
+    assert store.claim_next("b")["id"] == job_id
+
+
+def test_release_requeues_without_counting_the_attempt(store):
+    job_id = store.enqueue({"company": "TCS"})
+    store.heartbeat("a")
+    store.claim_next("a")
+    
+    assert store.release("a") == 1
+    job = store.get(job_id)
+    assert job["status"] == STATUS_QUEUED
+    assert job["attempts"] == 0
+
+
+def test_outcome_of_a_taken_over_job_is_dropped(store, clock):
+    job_id = store.enqueue({"company": "TCS"})
+    store.heartbeat("a")
+    store.claim_next("a")
+    clock[0] += 61
+    store.heartbeat("b")
+    store.requeue_expired()
+    store.claim_next("b")
+    
+    assert not store.complete(job_id, {"analysis": "stale"}, owner="a")
+    assert store.complete(job_id, {"analysis": "fresh"}, owner="b")
+    assert store.get(job_id)["result"] == {"analysis": "fresh"}
@@ -0,0 +1,87 @@
+"""Tests for the in-memory cache of finished analyses."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from cache.result_cache import ResultCache, result_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable wall clock for entry ages."""
+    now = [1_000_000.0]
+    monkeypatch.setattr("cache.result_cache.time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_key_depends_on_every_part_but_not_their_order():
+    assert result_cache_key(model="a", prompt="p") == result_cache_key(prompt="p", model="a")
+    assert result_cache_key(model="a", prompt="p") != result_cache_key(model="b", prompt="p")
+
+
+def test_hit_returns_a_copy_of_the_metadata(clock):
+    cache = ResultCache()
+    cache.put("k", "analysis", {"tool_calls": []})
+    analysis, metadata, created_at = cache.get("k")
+    assert (analysis, metadata, created_at) == ("analysis", {"tool_calls": []}, clock[0])
+    
+    metadata["tool_calls"].append("mutated")
+    assert cache.get("k")[1] == {"tool_calls": []}
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(ttl_hours=1)
+    cache.put("k", "analysis", {})
+    
+    clock[0] += 3599
+    assert cache.get("k") is not None
+    clock[0] += 1
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert stats["expired"] == 1
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2)
+    cache.put("a", "1", {})
+    cache.put("b", "2", {})
+    cache.get("a")
+    cache.put("c", "3", {})
+    
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_bound_evicts_until_under_max_bytes(clock):
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", "x" * 4, {})
+    cache.put("b", "x" * 4, {})
+    cache.put("c", "x" * 4, {})
+    
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+    
+    # Larger than the whole cache: not stored, nothing evicted
+    cache.put("d", "x" * 11, {})
+    assert cache.get("d") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_replacing_a_key_keeps_the_size_accounting(clock):
+    cache = ResultCache()
+    cache.put("k", "short", {})
+    cache.put("k", "much longer", {})
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == (1, len("much longer"))
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = ResultCache(enabled=False)
+    cache.put("k", "analysis", {})
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,64 @@
+"""Tests for the per-analysis search time budget of the async search tool."""
+
+import asyncio
+
+import pytest
+
+import tools.internet_search as internet_search
+
+
+class _SleepingProvider:
+    """Answers a query after the number of seconds it ends with."""
+    
+    async def asearch(self, query: str) -> str:
+        await asyncio.sleep(float(query.split()[-1]))
+        return f"results for {query}"
+
+
+@pytest.fixture
+def search_tool(monkeypatch):
+    monkeypatch.setattr(internet_search, "_search_provider", lambda provider, api_key: _SleepingProvider())
+    
+    def make(deadline_seconds):
+        return internet_search.create_async_internet_search_tool(
+            "duckduckgo", company_name="TCS", deadline_seconds=deadline_seconds
+        )
+    
+    return make
+
+
+def _skipped(result: str) -> bool:
+    return "did not finish within the time allowed" in result
+
+
+def test_time_between_searches_does_not_use_the_budget(search_tool):
+    async def run():
+        tool = search_tool(0.2)
+        await asyncio.sleep(0.3)  # An LLM turn
+        return await tool("tcs roce 0.05")
+    
+    assert asyncio.run(run()) == "results for tcs roce 0.05"
+
+
+def test_concurrent_searches_are_charged_once(search_tool):
+    async def run():
+        tool = search_tool(0.4)
+        first = await asyncio.gather(tool("tcs roce 0.15"), tool("tcs debt 0.15"))
+        second = await tool("tcs margins 0.15")
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert not any(_skipped(result) for result in first)
+    assert not _skipped(second)
+
+
+def test_search_is_abandoned_when_the_budget_runs_out(search_tool):
+    async def run():
+        tool = search_tool(0.2)
+        slow = await tool("tcs roce 5")
+        after = await tool("tcs debt 0.01")
+        return slow, after
+    
+    slow, after = asyncio.run(run())
+    assert _skipped(slow)
+    assert _skipped(after)
@@ -0,0 +1,131 @@
+"""Tests for the SQLite search cache and its in-memory hot tier."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from cache.search_cache import HOT_TIER_REFRESH_SECONDS, SearchCache
+from tools.internet_search import _cached_search_result
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable wall clock for refresh times and expiry."""
+    now = [1_000_000.0]
+    monkeypatch.setattr("cache.search_cache.time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def make_cache(tmp_path, clock):
+    caches = []
+    
+    def make(**kwargs):
+        cache = SearchCache(cache_dir=str(tmp_path), **kwargs)
+        caches.append(cache)
+        return cache
+    
+    yield make
+    for cache in caches:
+        cache.close()
+
+
+def test_result_is_served_until_ttl_expires(make_cache, clock):
+    cache = make_cache(ttl_hours=1)
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    
+    clock[0] += 3599
+    assert cache.get_cached_result("TCS", "tcs roce") == "ROCE 50%"
+    clock[0] += 1
+    assert cache.get_cached_result("TCS", "tcs roce") is None
+    assert cache.get_all_cached_queries("TCS") == {}
+
+
+def test_write_refreshes_the_ttl_of_the_whole_company(make_cache, clock):
+    cache = make_cache(ttl_hours=1)
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    clock[0] += 3000
+    cache.set_cached_result("TCS", "tcs debt", "Debt free")
+    
+    clock[0] += 3000
+    assert cache.get_all_cached_queries("TCS") == {"tcs roce": "ROCE 50%", "tcs debt": "Debt free"}
+
+
+def test_expired_results_do_not_come_back_with_a_new_write(make_cache, clock):
+    cache = make_cache(ttl_hours=1)
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    clock[0] += 3600
+    cache.set_cached_result("TCS", "tcs debt", "Debt free")
+    
+    assert cache.get_all_cached_queries("TCS") == {"tcs debt": "Debt free"}
+
+
+def test_sweep_deletes_only_expired_companies(make_cache, clock):
+    cache = make_cache(ttl_hours=1)
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    cache.set_cached_result("TCS", "tcs debt", "Debt free")
+    clock[0] += 1800
+    cache.set_cached_result("INFY", "infy roce", "ROCE 30%")
+    
+    clock[0] += 1800
+    assert cache.sweep_expired() == 2
+    assert cache.stats()["expired"] == 2
+    assert cache.get_cached_result("INFY", "infy roce") == "ROCE 30%"
+
+
+def test_results_are_shared_with_another_instance(make_cache):
+    make_cache().set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    assert make_cache().get_cached_result("TCS", "tcs roce") == "ROCE 50%"
+
+
+def test_hot_tier_evicts_least_recently_used_company(make_cache):
+    cache = make_cache(hot_max_entries=2)
+    for company in ("TCS", "INFY", "WIPRO"):
+        cache.set_cached_result(company, f"{company} roce", "ROCE")
+    
+    cache.get_all_cached_queries("TCS")
+    cache.get_all_cached_queries("INFY")
+    cache.get_all_cached_queries("TCS")
+    cache.get_all_cached_queries("WIPRO")
+    stats = cache.stats()
+    assert stats["hot_entries"] == 2
+    assert stats["evictions"] == 1
+    
+    hot_hits = stats["hot_hits"]
+    cache.get_all_cached_queries("TCS")
+    assert cache.stats()["hot_hits"] == hot_hits + 1
+    cache.get_all_cached_queries("INFY")  # Evicted: read from SQLite
+    assert cache.stats()["hot_hits"] == hot_hits + 1
+
+
+def test_hot_tier_entry_is_reloaded_after_refresh_interval(make_cache, clock):
+    cache = make_cache()
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    cache.get_all_cached_queries("TCS")
+    
+    # Another process writes to the shared database
+    make_cache().set_cached_result("TCS", "tcs debt", "Debt free")
+    assert "tcs debt" not in cache.get_all_cached_queries("TCS")
+    clock[0] += HOT_TIER_REFRESH_SECONDS
+    assert "tcs debt" in cache.get_all_cached_queries("TCS")
+
+
+def test_tool_lookup_is_counted_once(make_cache):
+    cache = make_cache()
+    
+    assert _cached_search_result(cache, "TCS", "tcs roce") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 1)
+    
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    assert _cached_search_result(cache, "TCS", "tcs roce") == "ROCE 50%"
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+    
+    # Company cached, but nothing relevant to the query
+    assert _cached_search_result(cache, "TCS", "dividend payout") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 2)
+
+
+def test_disabled_cache_stores_nothing(make_cache):
+    cache = make_cache(enabled=False)
+    cache.set_cached_result("TCS", "tcs roce", "ROCE 50%")
+    assert cache.get_cached_result("TCS", "tcs roce") is None
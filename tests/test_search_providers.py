@@ -0,0 +1,47 @@
+"""Tests for the process-wide search provider registry."""
+
+import pytest
+
+import tools.search_providers as search_providers
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(search_providers, "_providers", search_providers.OrderedDict())
+    monkeypatch.setattr(search_providers, "MAX_PROVIDER_ENTRIES", 2)
+    monkeypatch.setattr(search_providers, "get_search_provider_config", lambda: (15.0, 10.0, False, 2.0))
+    closed = []
+    
+    class _Timer:
+        """Runs the delayed close immediately."""
+        
+        def __init__(self, delay, function):
+            self.delay, self.function, self.daemon = delay, function, False
+        
+        def start(self):
+            closed.append(self.delay)
+            self.function()
+    
+    monkeypatch.setattr(search_providers.threading, "Timer", _Timer)
+    return closed
+
+
+def test_provider_is_shared_per_api_key(registry):
+    first = search_providers.get_search_provider("tavily", "key-1")
+    assert search_providers.get_search_provider("tavily", "key-1") is first
+    assert search_providers.get_search_provider("tavily", "key-2") is not first
+
+
+def test_least_recently_used_provider_is_evicted_and_closed_later(registry, monkeypatch):
+    first = search_providers.get_search_provider("tavily", "key-1")
+    second = search_providers.get_search_provider("tavily", "key-2")
+    closed_providers = []
+    monkeypatch.setattr(second, "close_all", lambda: closed_providers.append(second))
+    
+    assert search_providers.get_search_provider("tavily", "key-1") is first  # key-2 is now the oldest
+    search_providers.get_search_provider("tavily", "key-3")
+    
+    assert closed_providers == [second]
+    assert registry == [second.timeout + search_providers.EVICTED_PROVIDER_GRACE_SECONDS]
+    assert search_providers.get_search_provider("tavily", "key-1") is first
+    assert search_providers.get_search_provider("tavily", "key-2") is not second
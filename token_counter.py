@@ -0,0 +1,131 @@
+"""Token counting with the model's BPE tokenizer, plus a memoized prompt-size cache."""
+
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from config import get_tokenizer_encoding
+from prompts import PROMPTS
+
+try:
+    import tiktoken
+    from tiktoken.model import encoding_name_for_model
+except ImportError:  # tiktoken is optional; counts fall back to an approximation
+    tiktoken = None  # type: ignore
+    encoding_name_for_model = None  # type: ignore
+
+# Approximation of GPT-style pre-tokenization (contractions, words, 1-3 digit
+# groups, punctuation runs, whitespace). Each piece is roughly one BPE token,
+# which tracks real counts far better than a fixed characters-per-token ratio.
+_PRETOKEN_RE = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+",
+    re.IGNORECASE,
+)
+
+# Name reported when the approximation is used
+APPROXIMATE_METHOD = "approximate"
+
+
+@lru_cache(maxsize=None)
+def _encoding_name_for_model(model: Optional[str]) -> str:
+    """Map a model name to its tiktoken encoding (configured default for unknown models)."""
+    if encoding_name_for_model is not None and model:
+        try:
+            return encoding_name_for_model(model)
+        except KeyError:
+            pass
+    return get_tokenizer_encoding()
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str):
+    """Load an encoding once; None (remembered) if tiktoken or its data is unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        print(
+            f"Warning: Tokenizer '{encoding_name}' unavailable ({e.__class__.__name__}); "
+            "using approximate token counts.",
+            file=sys.stderr,
+        )
+        return None
+
+
+def _resolve(model: Optional[str]):
+    encoding_name = _encoding_name_for_model(model)
+    return encoding_name, _load_encoding(encoding_name)
+
+
+def tokenizer_name(model: Optional[str] = None) -> str:
+    """Describe how tokens are counted for a model (e.g. "tiktoken:o200k_base")."""
+    encoding_name, encoding = _resolve(model)
+    return f"tiktoken:{encoding_name}" if encoding is not None else APPROXIMATE_METHOD
+
+
+@lru_cache(maxsize=512)
+def _count(encoding_name: str, text: str) -> int:
+    encoding = _load_encoding(encoding_name)
+    if encoding is None:
+        return len(_PRETOKEN_RE.findall(text))
+    return len(encoding.encode_ordinary(text))
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count tokens the way the model's tokenizer does.
+    
+    Args:
+        text: Text to count
+        model: Model name (selects the encoding; unknown models use TOKENIZER_ENCODING)
+        
+    Returns:
+        Token count (approximate if tiktoken or the encoding is unavailable)
+    """
+    if not text:
+        return 0
+    encoding_name, _ = _resolve(model)
+    return _count(encoding_name, text)
+
+
+def prompt_token_count(prompt_name: str, model: Optional[str] = None) -> int:
+    """
+    Token count of a registered prompt, computed once per (prompt, encoding).
+    
+    Raises:
+        KeyError: If the prompt is not registered
+    """
+    encoding_name, _ = _resolve(model)
+    return _prompt_tokens(prompt_name, encoding_name)
+
+
+@lru_cache(maxsize=None)
+def _prompt_tokens(prompt_name: str, encoding_name: str) -> int:
+    # Kept apart from _count so payload churn never evicts prompt counts
+    return _count(encoding_name, PROMPTS[prompt_name])
+
+
+def warm_prompt_token_cache(models: Tuple[Optional[str], ...] = (None,)) -> Dict[str, int]:
+    """
+    Load the tokenizer(s) and precompute token counts for every registered prompt.
+    
+    Args:
+        models: Models to warm (None means the configured default encoding)
+        
+    Returns:
+        Mapping of prompt name to token count for the first model
+    """
+    counts: Dict[str, int] = {}
+    for i, model in enumerate(models):
+        for name in PROMPTS:
+            tokens = prompt_token_count(name, model)
+            if i == 0:
+                counts[name] = tokens
+    print(
+        f"Prompt token cache warmed ({tokenizer_name(models[0] if models else None)}): "
+        + ", ".join(f"{name}={tokens:,}" for name, tokens in counts.items()),
+        file=sys.stderr,
+    )
+    return counts
@@ -1,6 +1,29 @@
 """Tools package for agentic analysis."""
 
-from .internet_search import create_internet_search_tool
-
-__all__ = ["create_internet_search_tool"]
+from .internet_search import (
+    asearch_in_context,
+    bind_search_functions,
+    create_async_internet_search_tool,
+    create_internet_search_tool,
+    search_in_context,
+    singleflight_stats,
+)
+from .search_providers import (
+    SearchProvider,
+    close_search_providers,
+    get_search_provider,
+    provider_stats,
+)
 
+__all__ = [
+    "SearchProvider",
+    "asearch_in_context",
+    "bind_search_functions",
+    "close_search_providers",
+    "create_async_internet_search_tool",
+    "create_internet_search_tool",
+    "get_search_provider",
+    "provider_stats",
+    "search_in_context",
+    "singleflight_stats",
+]
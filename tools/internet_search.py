@@ -1,64 +1,188 @@
 """Internet search tool for financial analysis agent."""
 
+import asyncio
 import os
 import re
 import sys
-from typing import Any, Optional
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
 
 from langchain_core.tools import ToolException
 
-try:
-    from langchain_community.tools import DuckDuckGoSearchRun
-except ImportError:
-    DuckDuckGoSearchRun = None
+from .search_providers import SearchProvider, get_search_provider
 
-try:
-    from tavily import TavilyClient
-except ImportError:
-    TavilyClient = None
+# Search functions of the request being run: (sync function, coroutine function).
+# The agent's internet_search tool is built once and shared between requests,
+# so each request binds its own functions (company, cache, events) here.
+_bound_search: ContextVar[Optional[Tuple[Optional[Callable], Optional[Callable]]]] = ContextVar(
+    "bound_search", default=None
+)
 
 
-def _search_with_tavily(query: str, api_key: str, max_results: int = 5) -> str:
-    """Search using Tavily API."""
-    if TavilyClient is None:
-        raise ImportError("tavily-python is not installed")
+class _SingleFlight:
+    """
+    Coalesce identical searches that are in flight at the same time.
     
-    try:
-        client = TavilyClient(api_key=api_key)
-        response = client.search(
-            query=query,
-            search_depth="advanced",
-            max_results=max_results,
-            include_answer=True,
-            include_raw_content=False
-        )
-        
-        results = []
-        if response.get("answer"):
-            results.append(f"Answer: {response['answer']}")
-        
-        if response.get("results"):
-            for i, result in enumerate(response["results"], 1):
-                title = result.get("title", "No title")
-                url = result.get("url", "")
-                content = result.get("content", "")
-                results.append(f"\n{i}. {title}\n   URL: {url}\n   {content[:300]}...")
-        
-        return "\n".join(results) if results else "No results found."
-    except Exception as e:
-        raise ToolException(f"Tavily search failed: {str(e)}")
-
-
-def _search_with_duckduckgo(query: str, max_results: int = 5) -> str:
-    """Search using DuckDuckGo (no API key required)."""
-    if DuckDuckGoSearchRun is None:
-        raise ImportError("langchain-community is not installed or DuckDuckGoSearchRun is not available")
-    try:
-        search = DuckDuckGoSearchRun()
-        result = search.run(query)
-        return result if result else "No results found."
-    except Exception as e:
-        raise ToolException(f"DuckDuckGo search failed: {str(e)}")
+    The first caller for a key (the leader) runs the search; callers that
+    arrive while it runs wait for it and get the same result or exception.
+    Sync callers are coalesced across threads, async callers per event loop.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, str], "_SyncCall"] = {}
+        self._futures: Dict[Tuple[int, str, str], asyncio.Future] = {}
+        self._stats = {"searches": 0, "shared": 0}
+    
+    def do(self, key: Tuple[str, str], search: Callable[[], str]) -> str:
+        """Run search() unless an identical search is running; then wait for its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _SyncCall()
+            self._count(leader)
+        
+        if not leader:
+            print(f"↺ Joining in-flight search for: '{key[1][:60]}'", file=sys.stderr)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = search()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def do_async(self, key: Tuple[str, str], search: Callable[[], Awaitable[str]]) -> str:
+        """Async do(); if the leader is cancelled, a waiting caller runs the search itself."""
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), *key)
+        while True:
+            with self._lock:
+                future = self._futures.get(loop_key)
+                leader = future is None
+                if leader:
+                    future = self._futures[loop_key] = loop.create_future()
+                self._count(leader)
+            if leader:
+                break
+            print(f"↺ Joining in-flight search for: '{key[1][:60]}'", file=sys.stderr)
+            # asyncio.wait does not raise when the leader's future is cancelled
+            await asyncio.wait({future})
+            if not future.cancelled():
+                return future.result()
+        
+        try:
+            result = await search()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved here, so no "never retrieved" warning without waiters
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[loop_key]
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+    
+    def _count(self, leader: bool) -> None:
+        # Caller holds the lock
+        self._stats["searches" if leader else "shared"] += 1
+
+
+class _SyncCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class _SearchBudget:
+    """
+    Time an analysis may spend waiting for searches.
+    
+    The budget shrinks only while at least one search is being waited for,
+    so LLM turns between searches do not use it up, and searches that run
+    concurrently are charged once.
+    """
+    
+    def __init__(self, seconds: float):
+        self._seconds = seconds
+        self._spent = 0.0
+        self._waiting = 0
+        self._since = 0.0
+    
+    def remaining(self) -> float:
+        spent = self._spent
+        if self._waiting:
+            spent += time.monotonic() - self._since
+        return max(0.0, self._seconds - spent)
+    
+    async def wait(self, awaitable: Awaitable[str]) -> str:
+        """Await a search, raising asyncio.TimeoutError when the budget runs out."""
+        if not self._waiting:
+            self._since = time.monotonic()
+        self._waiting += 1
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        finally:
+            self._waiting -= 1
+            if not self._waiting:
+                self._spent += time.monotonic() - self._since
+
+
+# Shared by every search function of the process
+_search_flights = _SingleFlight()
+
+
+def _flight_key(company: Optional[str], query: str) -> Tuple[str, str]:
+    """Singleflight key: normalized company and case/whitespace-insensitive query."""
+    from cache import normalize_company_name
+    
+    return normalize_company_name(company or ""), " ".join(query.lower().split())
+
+
+def singleflight_stats() -> Dict[str, int]:
+    """Provider searches started and searches that joined one already in flight."""
+    return _search_flights.stats()
+
+
+def _resolve_provider(provider: str, api_key: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Pick the provider name and Tavily key, falling back to DuckDuckGo without a key."""
+    provider = provider.lower()
+    if provider == "tavily":
+        if not api_key:
+            api_key = os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            print(
+                "Warning: TAVILY_API_KEY not found. Falling back to DuckDuckGo.",
+                file=sys.stderr
+            )
+            provider = "duckduckgo"
+    return provider, api_key if provider == "tavily" else None
+
+
+def _search_provider(provider: str, api_key: Optional[str]) -> SearchProvider:
+    # Looked up per search: the instances are shared and created on first use
+    return get_search_provider(provider, api_key)
 
 
 def _extract_company_name_from_query(query: str, default_company: Optional[str] = None) -> Optional[str]:
@@ -99,6 +223,35 @@ def _extract_company_name_from_query(query: str, default_company: Optional[str]
     return default_company
 
 
+def _cached_search_result(cache: Any, company: str, query: str) -> Optional[str]:
+    """
+    Answer a query from the search cache.
+    
+    Returns the stored result of the same query if there is one, otherwise
+    the cached snippets of the company most relevant to the query (BM25,
+    within the cache's top-k and token budget). Nothing derived is written
+    back to the cache.
+    
+    Returns:
+        Result text, or None if nothing relevant is cached
+    """
+    from cache.snippet_index import AGGREGATE_PREFIX
+    
+    # One lookup: the exact read is not counted, the snippet search counts the outcome
+    exact = cache.get_cached_result(company, query, record_stats=False)
+    if exact is not None and not exact.startswith(AGGREGATE_PREFIX):
+        cache.record_lookup(hit=True)
+        print(f"✓ Cache HIT for company '{company}' - same query cached", file=sys.stderr)
+        return exact
+    
+    snippets = cache.search_snippets(company, query)
+    if not snippets:
+        return None
+    print(f"✓ Cache HIT for company '{company}' - {len(snippets)} relevant cached snippet(s)", file=sys.stderr)
+    print(f"  From cached queries: {', '.join(dict.fromkeys(s.query for s in snippets))}", file=sys.stderr)
+    return "\n\n".join(f"=== Cached: {snippet.query} ===\n{snippet.text}" for snippet in snippets)
+
+
 def create_internet_search_tool(
     provider: str = "tavily",
     api_key: Optional[str] = None,
@@ -117,68 +270,45 @@ def create_internet_search_tool(
     Returns:
         LangChain tool function for internet search
     """
-    provider = provider.lower()
-    
-    if provider == "tavily":
-        if not api_key:
-            api_key = os.getenv("TAVILY_API_KEY")
-        if not api_key:
-            print(
-                "Warning: TAVILY_API_KEY not found. Falling back to DuckDuckGo.",
-                file=sys.stderr
-            )
-            provider = "duckduckgo"
+    provider, api_key = _resolve_provider(provider, api_key)
     
-    if provider == "tavily" and api_key:
-        def tavily_search(query: str) -> str:
-            """Search the internet for financial information, company data, industry benchmarks, or recent news.
-            
-            Use this tool when:
-            - HTML data is missing or incomplete
-            - You need industry benchmarks or peer comparisons
-            - You need recent news or events about the company
-            - You need additional context about the company's business
-            
-            Args:
-                query: Search query string (e.g., "Reliance Industries financial ratios 2024")
-                
-            Returns:
-                Search results with relevant information
-            """
-            # CRITICAL: Check cache FIRST before any internet search - match by company name only
-            # Prioritize passed company_name over extraction from query
-            from cache import normalize_company_name
-            
-            extracted_company = company_name if company_name else _extract_company_name_from_query(query, None)
+    def internet_search(query: str) -> str:
+        """Search the internet for financial information, company data, industry benchmarks, or recent news.
+        
+        Use this tool when:
+        - HTML data is missing or incomplete
+        - You need industry benchmarks or peer comparisons
+        - You need recent news or events about the company
+        - You need additional context about the company's business
+        
+        Args:
+            query: Search query string (e.g., "Reliance Industries financial ratios 2024")
             
-            if cache and extracted_company:
-                # Normalize company name for consistent cache lookup
-                normalized_company = normalize_company_name(extracted_company)
-                print(f"Checking cache for company: '{normalized_company}' (from '{extracted_company}')", file=sys.stderr)
-                
-                # Check if we have ANY cached data for this company (company name match only)
-                all_cached = cache.get_all_cached_queries(normalized_company)
-                if all_cached:
-                    # Return all cached data for the company (combine all cached queries)
-                    print(f"✓ Cache HIT for company '{normalized_company}' - found {len(all_cached)} cached queries", file=sys.stderr)
-                    print(f"  Cached queries: {', '.join(list(all_cached.keys())[:5])}", file=sys.stderr)
-                    
-                    # Combine all cached results
-                    combined_results = []
-                    for cached_query, cached_result in all_cached.items():
-                        combined_results.append(f"=== Cached: {cached_query} ===\n{cached_result}")
-                    
-                    result = "\n\n".join(combined_results)
-                    
-                    # Also cache this new query with the combined result for future use
-                    cache.set_cached_result(normalized_company, query, result)
-                    return result
-                else:
-                    print(f"✗ Cache MISS - No cached data for company '{normalized_company}'", file=sys.stderr)
+        Returns:
+            Search results with relevant information
+        """
+        # CRITICAL: Check cache FIRST before any internet search - match by company name only
+        # Prioritize passed company_name over extraction from query
+        from cache import normalize_company_name
+        
+        extracted_company = company_name if company_name else _extract_company_name_from_query(query, None)
+        
+        if cache and extracted_company:
+            # Normalize company name for consistent cache lookup
+            normalized_company = normalize_company_name(extracted_company)
+            print(f"Checking cache for company: '{normalized_company}' (from '{extracted_company}')", file=sys.stderr)
             
+            # Serve the query itself, or the most relevant snippets cached for the company
+            result = _cached_search_result(cache, normalized_company, query)
+            if result is not None:
+                return result
+            else:
+                print(f"✗ Cache MISS - No relevant cached data for company '{normalized_company}'", file=sys.stderr)
+        
+        def search_and_store() -> str:
             # Only perform internet search if cache miss
             print(f"→ Performing internet search for: '{query[:60]}...'", file=sys.stderr)
-            result = _search_with_tavily(query, api_key)
+            result = _search_provider(provider, api_key).search(query)
             
             # Store in cache
             if cache and extracted_company:
@@ -188,65 +318,163 @@ def create_internet_search_tool(
             
             return result
         
-        return tavily_search
-    else:
-        def duckduckgo_search(query: str) -> str:
-            """Search the internet for financial information, company data, industry benchmarks, or recent news.
-            
-            Use this tool when:
-            - HTML data is missing or incomplete
-            - You need industry benchmarks or peer comparisons
-            - You need recent news or events about the company
-            - You need additional context about the company's business
-            
-            Args:
-                query: Search query string (e.g., "Reliance Industries financial ratios 2024")
-                
-            Returns:
-                Search results with relevant information
-            """
-            # CRITICAL: Check cache FIRST before any internet search - match by company name only
-            # Prioritize passed company_name over extraction from query
-            from cache import normalize_company_name
-            
-            extracted_company = company_name if company_name else _extract_company_name_from_query(query, None)
+        # An identical search already running in this process is joined, not repeated
+        return _search_flights.do(_flight_key(extracted_company, query), search_and_store)
+    
+    return internet_search
+
+
+def create_async_internet_search_tool(
+    provider: str = "tavily",
+    api_key: Optional[str] = None,
+    cache: Optional[Any] = None,
+    company_name: Optional[str] = None,
+    on_event: Optional[Callable[[str, dict], None]] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    max_parallel: Optional[int] = None,
+    deadline_seconds: Optional[float] = None
+) -> callable:
+    """
+    Create an awaitable internet search tool for the async agent.
+    
+    Cache handling matches create_internet_search_tool; cache reads and
+    writes run in worker threads and the provider call is awaited, so a
+    busy cache or a slow search never blocks the event loop.
+    The async agent runs the tool calls of one turn concurrently, so a
+    turn takes as long as its slowest search.
+    
+    Create one tool per analysis: max_parallel and deadline_seconds apply
+    to the searches of the returned function. deadline_seconds bounds the
+    time spent waiting for searches, not the time between them; a search
+    still running when it is used up is abandoned and the agent is told to
+    continue without it.
+    
+    Args:
+        provider: Search provider ("tavily" or "duckduckgo")
+        api_key: API key for Tavily (required if provider is "tavily")
+        cache: SearchCache instance for caching results (optional)
+        company_name: Default company name for cache key (optional)
+        on_event: Callback receiving ("search", {...}) events with the query
+                  and whether it was served from cache (optional)
+        semaphore: Limits concurrent provider calls, e.g. across a batch (optional)
+        max_parallel: Maximum concurrent provider calls of this analysis (optional)
+        deadline_seconds: Total time this analysis may wait for searches (optional)
+        
+    Returns:
+        Coroutine function for internet search
+    """
+    provider, api_key = _resolve_provider(provider, api_key)
+    
+    parallel_limit = asyncio.Semaphore(max_parallel) if max_parallel else None
+    budget = _SearchBudget(deadline_seconds) if deadline_seconds else None
+    
+    async def provider_search(query: str) -> str:
+        # Request slot first, so a request waiting for its own slot holds no batch slot
+        async with parallel_limit or nullcontext():
+            async with semaphore or nullcontext():
+                return await _search_provider(provider, api_key).asearch(query)
+    
+    async def internet_search(query: str) -> str:
+        """Search the internet for financial information, company data, industry benchmarks, or recent news.
+        
+        Args:
+            query: Search query string (e.g., "Reliance Industries financial ratios 2024")
             
-            if cache and extracted_company:
-                # Normalize company name for consistent cache lookup
-                normalized_company = normalize_company_name(extracted_company)
-                print(f"Checking cache for company: '{normalized_company}' (from '{extracted_company}')", file=sys.stderr)
-                
-                # Check if we have ANY cached data for this company (company name match only)
-                all_cached = cache.get_all_cached_queries(normalized_company)
-                if all_cached:
-                    # Return all cached data for the company (combine all cached queries)
-                    print(f"✓ Cache HIT for company '{normalized_company}' - found {len(all_cached)} cached queries", file=sys.stderr)
-                    print(f"  Cached queries: {', '.join(list(all_cached.keys())[:5])}", file=sys.stderr)
-                    
-                    # Combine all cached results
-                    combined_results = []
-                    for cached_query, cached_result in all_cached.items():
-                        combined_results.append(f"=== Cached: {cached_query} ===\n{cached_result}")
-                    
-                    result = "\n\n".join(combined_results)
-                    
-                    # Also cache this new query with the combined result for future use
-                    cache.set_cached_result(normalized_company, query, result)
-                    return result
-                else:
-                    print(f"✗ Cache MISS - No cached data for company '{normalized_company}'", file=sys.stderr)
+        Returns:
+            Search results with relevant information
+        """
+        from cache import normalize_company_name
+        
+        extracted_company = company_name if company_name else _extract_company_name_from_query(query, None)
+        
+        if cache and extracted_company:
+            normalized_company = normalize_company_name(extracted_company)
+            print(f"Checking cache for company: '{normalized_company}' (from '{extracted_company}')", file=sys.stderr)
             
-            # Only perform internet search if cache miss
+            # SQLite lookups (and the BM25 index build) may block: keep them off the event loop
+            result = await asyncio.to_thread(_cached_search_result, cache, normalized_company, query)
+            if result is not None:
+                if on_event:
+                    on_event("search", {"query": query, "company": normalized_company, "cache": "hit", "provider": provider})
+                return result
+            else:
+                print(f"✗ Cache MISS - No relevant cached data for company '{normalized_company}'", file=sys.stderr)
+        
+        if on_event:
+            on_event("search", {
+                "query": query,
+                "company": extracted_company,
+                "cache": "miss" if cache else "disabled",
+                "provider": provider,
+            })
+        
+        async def search_and_store() -> str:
             print(f"→ Performing internet search for: '{query[:60]}...'", file=sys.stderr)
-            result = _search_with_duckduckgo(query)
-            
-            # Store in cache
+            result = await provider_search(query)
             if cache and extracted_company:
                 normalized_company = normalize_company_name(extracted_company)
-                cache.set_cached_result(normalized_company, query, result)
+                await asyncio.to_thread(cache.set_cached_result, normalized_company, query, result)
                 print(f"Cached result for company '{normalized_company}'", file=sys.stderr)
-            
             return result
         
-        return duckduckgo_search
+        # An identical search already running in this process is joined, not repeated
+        flight = _search_flights.do_async(_flight_key(extracted_company, query), search_and_store)
+        if budget is None:
+            return await flight
+        try:
+            return await budget.wait(flight)
+        except asyncio.TimeoutError:
+            print(f"Warning: Search deadline reached, skipping '{query[:60]}'", file=sys.stderr)
+            return (
+                f"Search for '{query}' did not finish within the time allowed for searches. "
+                "Continue the analysis with the data already available."
+            )
+    
+    return internet_search
+
+
+@contextmanager
+def bind_search_functions(
+    func: Optional[Callable] = None,
+    coroutine: Optional[Callable] = None
+) -> Iterator[None]:
+    """
+    Route search_in_context/asearch_in_context to a request's search functions.
+    
+    The binding is a context variable, so concurrent requests (threads or
+    asyncio tasks) each see their own functions.
+    
+    Args:
+        func: Function from create_internet_search_tool (optional)
+        coroutine: Function from create_async_internet_search_tool (optional)
+    """
+    token = _bound_search.set((func, coroutine))
+    try:
+        yield
+    finally:
+        _bound_search.reset(token)
+
+
+def _bound_functions() -> Tuple[Optional[Callable], Optional[Callable]]:
+    bound = _bound_search.get()
+    if bound is None:
+        raise ToolException("internet_search is not available outside an analysis")
+    return bound
+
+
+def search_in_context(query: str) -> str:
+    """Run the current request's search function (see bind_search_functions)."""
+    func, _ = _bound_functions()
+    if func is None:
+        raise ToolException("internet_search has no synchronous implementation bound")
+    return func(query)
+
 
+async def asearch_in_context(query: str) -> str:
+    """Awaitable search_in_context; a sync-only binding runs in a thread."""
+    func, coroutine = _bound_functions()
+    if coroutine is not None:
+        return await coroutine(query)
+    if func is None:
+        raise ToolException("internet_search has no implementation bound")
+    return await asyncio.to_thread(func, query)
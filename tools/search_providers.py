@@ -0,0 +1,436 @@
+"""Search providers with long-lived clients, per-provider timeouts and optional hedging."""
+
+import asyncio
+import statistics
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.tools import ToolException
+
+from config import get_search_provider_config
+from llm_clients import event_loop_id, key_fingerprint
+
+try:
+    from langchain_community.tools import DuckDuckGoSearchRun
+except ImportError:
+    DuckDuckGoSearchRun = None
+
+# Recent latencies kept per provider, and how many are needed before their p90 is trusted
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Shortest wait before a hedged request fires the second provider
+MIN_HEDGE_DELAY_SECONDS = 0.1
+
+# Distinct (provider, API key) combinations kept; the least recently used is dropped
+MAX_PROVIDER_ENTRIES = 32
+
+# Seconds (on top of the provider timeout) before a dropped provider is closed,
+# so searches still using it can finish
+EVICTED_PROVIDER_GRACE_SECONDS = 60
+
+
+def _format_tavily_response(response: dict) -> str:
+    """Render a Tavily response as plain text for the agent."""
+    results = []
+    if response.get("answer"):
+        results.append(f"Answer: {response['answer']}")
+    
+    if response.get("results"):
+        for i, result in enumerate(response["results"], 1):
+            title = result.get("title", "No title")
+            url = result.get("url", "")
+            content = result.get("content", "")
+            results.append(f"\n{i}. {title}\n   URL: {url}\n   {content[:300]}...")
+    
+    return "\n".join(results) if results else "No results found."
+
+
+class SearchProvider:
+    """
+    A search backend with a timeout and latency statistics.
+    
+    Subclasses implement _search (blocking) and _asearch (awaitable);
+    search/asearch add the timeout, latency tracking and error wrapping.
+    Instances are long-lived and shared between analyses.
+    """
+    
+    name = "base"
+    
+    def __init__(self, timeout: float):
+        """
+        Initialize the provider.
+        
+        Args:
+            timeout: Seconds a single search may take
+        """
+        self.timeout = timeout
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._stats = {"searches": 0, "errors": 0, "timeouts": 0}
+    
+    def search(self, query: str) -> str:
+        """Run a search, blocking the calling thread."""
+        started = time.monotonic()
+        try:
+            result = self._search(query)
+        except ToolException:
+            self._count("errors")
+            raise
+        except (TimeoutError, FutureTimeoutError, httpx.TimeoutException):
+            self._count("timeouts")
+            raise ToolException(f"{self.name} search timed out after {self.timeout:g}s")
+        except Exception as e:
+            self._count("errors")
+            raise ToolException(f"{self.name} search failed: {e}")
+        self._record(time.monotonic() - started)
+        return result
+    
+    async def asearch(self, query: str) -> str:
+        """Run a search without blocking the event loop."""
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._asearch(query), self.timeout)
+        except ToolException:
+            self._count("errors")
+            raise
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            self._count("timeouts")
+            raise ToolException(f"{self.name} search timed out after {self.timeout:g}s")
+        except Exception as e:
+            self._count("errors")
+            raise ToolException(f"{self.name} search failed: {e}")
+        self._record(time.monotonic() - started)
+        return result
+    
+    def latency_quantile(self, quantile: float = 0.9) -> Optional[float]:
+        """Latency quantile of recent successful searches (None until MIN_LATENCY_SAMPLES)."""
+        with self._lock:
+            samples = list(self._latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return statistics.quantiles(samples, n=100, method="inclusive")[round(quantile * 100) - 1]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters, timeout and recent latency quantiles."""
+        p50 = self.latency_quantile(0.5)
+        p90 = self.latency_quantile(0.9)
+        with self._lock:
+            return {
+                **self._stats,
+                "timeout": self.timeout,
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "p90_seconds": round(p90, 3) if p90 is not None else None,
+            }
+    
+    def close(self) -> None:
+        """Release pooled connections (sync clients only; see aclose)."""
+    
+    async def aclose(self) -> None:
+        """Release the running event loop's pooled connections."""
+    
+    def close_all(self) -> None:
+        """Release every pooled connection from any thread; async ones are closed on their own loop."""
+        self.close()
+    
+    def _search(self, query: str) -> str:
+        raise NotImplementedError
+    
+    async def _asearch(self, query: str) -> str:
+        raise NotImplementedError
+    
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self._stats["searches"] += 1
+            self._latencies.append(seconds)
+    
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+class TavilyProvider(SearchProvider):
+    """Tavily search API over pooled keep-alive httpx clients."""
+    
+    name = "tavily"
+    base_url = "https://api.tavily.com"
+    
+    def __init__(self, api_key: str, timeout: float, max_results: int = 5):
+        """
+        Initialize the provider.
+        
+        Args:
+            api_key: Tavily API key
+            timeout: Seconds a single search may take
+            max_results: Results requested per search
+        """
+        super().__init__(timeout)
+        self._api_key = api_key
+        self.max_results = max_results
+        self._client: Optional[httpx.Client] = None
+        # Async connections belong to the loop that opened them
+        self._async_clients: Dict[int, httpx.AsyncClient] = {}
+        self._loops: Dict[int, "weakref.ref[asyncio.AbstractEventLoop]"] = {}
+    
+    def _payload(self, query: str) -> Dict[str, Any]:
+        return {
+            "api_key": self._api_key,
+            "query": query,
+            "search_depth": "advanced",
+            "max_results": self.max_results,
+            "include_answer": True,
+            "include_raw_content": False,
+        }
+    
+    def _client_kwargs(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "timeout": self.timeout}
+    
+    def _search(self, query: str) -> str:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._client_kwargs())
+            client = self._client
+        response = client.post("/search", json=self._payload(query))
+        response.raise_for_status()
+        return _format_tavily_response(response.json())
+    
+    async def _asearch(self, query: str) -> str:
+        loop_id = event_loop_id()
+        with self._lock:
+            client = self._async_clients.get(loop_id)
+            if client is None:
+                client = self._async_clients[loop_id] = httpx.AsyncClient(**self._client_kwargs())
+                self._loops[loop_id] = weakref.ref(asyncio.get_running_loop())
+        response = await client.post("/search", json=self._payload(query))
+        response.raise_for_status()
+        return _format_tavily_response(response.json())
+    
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+    
+    async def aclose(self) -> None:
+        with self._lock:
+            client = self._async_clients.pop(event_loop_id(), None)
+        if client is not None:
+            await client.aclose()
+    
+    def close_all(self) -> None:
+        self.close()
+        with self._lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop_id, client in clients:
+            loop = self._loops.pop(loop_id, lambda: None)()
+            if loop is not None and not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+
+class DuckDuckGoProvider(SearchProvider):
+    """DuckDuckGo through one reused LangChain tool, run on a small shared thread pool."""
+    
+    name = "duckduckgo"
+    
+    def __init__(self, timeout: float, max_workers: int = 8):
+        """
+        Initialize the provider.
+        
+        Args:
+            timeout: Seconds a single search may take
+            max_workers: Threads running searches (the client is blocking)
+        """
+        super().__init__(timeout)
+        if DuckDuckGoSearchRun is None:
+            raise ImportError("langchain-community is not installed or DuckDuckGoSearchRun is not available")
+        self._tool = DuckDuckGoSearchRun()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckduckgo-search")
+    
+    def _run(self, query: str) -> str:
+        result = self._tool.run(query)
+        return result if result else "No results found."
+    
+    def _search(self, query: str) -> str:
+        # A thread that runs past the timeout is abandoned, not interrupted
+        return self._executor.submit(self._run, query).result(timeout=self.timeout)
+    
+    async def _asearch(self, query: str) -> str:
+        return await asyncio.wrap_future(self._executor.submit(self._run, query))
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HedgedProvider(SearchProvider):
+    """
+    Race a second provider against a slow first one.
+    
+    asearch starts the primary provider; if it has not answered after its
+    recent p90 latency (default_delay until enough samples exist), or
+    fails before that, the secondary provider is started as well and the
+    first successful answer wins. The sync search path does not race: it
+    falls back to the secondary provider when the primary fails.
+    """
+    
+    def __init__(self, primary: SearchProvider, secondary: SearchProvider, default_delay: float):
+        """
+        Initialize the hedged provider.
+        
+        Args:
+            primary: Provider asked first
+            secondary: Provider fired when the primary is slow or fails
+            default_delay: Hedge delay used until the primary's p90 is known
+        """
+        super().__init__(max(primary.timeout, secondary.timeout))
+        self.name = primary.name
+        self.primary = primary
+        self.secondary = secondary
+        self.default_delay = default_delay
+        self._stats.update({"hedged": 0, "secondary_wins": 0})
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before firing the secondary."""
+        p90 = self.primary.latency_quantile(0.9)
+        return max(MIN_HEDGE_DELAY_SECONDS, p90 if p90 is not None else self.default_delay)
+    
+    def search(self, query: str) -> str:
+        self._count("searches")
+        try:
+            return self.primary.search(query)
+        except ToolException as e:
+            print(f"Warning: {e}; trying {self.secondary.name}", file=sys.stderr)
+            self._count("hedged")
+            result = self.secondary.search(query)
+            self._count("secondary_wins")
+            return result
+    
+    async def asearch(self, query: str) -> str:
+        self._count("searches")
+        first = asyncio.create_task(self.primary.asearch(query))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if done and first.exception() is None:
+                return first.result()
+            
+            self._count("hedged")
+            print(f"Hedging search with {self.secondary.name}: '{query[:60]}'", file=sys.stderr)
+            second = asyncio.create_task(self.secondary.asearch(query))
+            pending = {second} if done else {first, second}
+            error: Optional[BaseException] = first.exception() if done else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("secondary_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "hedge_delay_seconds": round(self.hedge_delay(), 3)}
+
+
+_providers: "OrderedDict[Tuple[str, str], SearchProvider]" = OrderedDict()
+_providers_lock = threading.Lock()
+
+
+def _store_provider(key: Tuple[str, str], provider: SearchProvider) -> None:
+    """Register a provider, dropping the least recently used ones beyond MAX_PROVIDER_ENTRIES (lock held)."""
+    _providers[key] = provider
+    _providers.move_to_end(key)
+    while len(_providers) > MAX_PROVIDER_ENTRIES:
+        _, evicted = _providers.popitem(last=False)
+        if isinstance(evicted, HedgedProvider):
+            continue  # Owns no connections; its providers are entries of their own
+        # Hedged wrappers around the evicted provider would keep using it after it is closed
+        for hedged_key in [k for k, p in _providers.items()
+                           if isinstance(p, HedgedProvider) and evicted in (p.primary, p.secondary)]:
+            del _providers[hedged_key]
+        # A search may still be using the evicted provider: close it later
+        closer = threading.Timer(evicted.timeout + EVICTED_PROVIDER_GRACE_SECONDS, evicted.close_all)
+        closer.daemon = True
+        closer.start()
+
+
+def _provider(name: str, api_key: Optional[str]) -> SearchProvider:
+    """Return the shared provider instance for a name (and, for Tavily, API key)."""
+    # DuckDuckGo takes no key: one instance (and thread pool) serves every caller
+    key = (name, key_fingerprint(api_key if name == "tavily" else None))
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            tavily_timeout, duckduckgo_timeout, _, _ = get_search_provider_config()
+            if name == "tavily":
+                provider = TavilyProvider(api_key, timeout=tavily_timeout)
+            else:
+                provider = DuckDuckGoProvider(timeout=duckduckgo_timeout)
+            _store_provider(key, provider)
+        else:
+            _providers.move_to_end(key)
+        return provider
+
+
+def get_search_provider(name: str, api_key: Optional[str] = None) -> SearchProvider:
+    """
+    Return the shared provider for a search, hedged if configured.
+    
+    Args:
+        name: "tavily" (requires api_key) or "duckduckgo"
+        api_key: Tavily API key
+        
+    Returns:
+        Long-lived provider; with SEARCH_HEDGE enabled and the other
+        provider available, a HedgedProvider with the other as secondary
+    """
+    name = "tavily" if name == "tavily" and api_key else "duckduckgo"
+    _, _, hedge, hedge_delay = get_search_provider_config()
+    primary = _provider(name, api_key)
+    if not hedge:
+        return primary
+    
+    if name == "duckduckgo" and not api_key:
+        return primary
+    try:
+        secondary = _provider("tavily" if name == "duckduckgo" else "duckduckgo", api_key)
+    except ImportError:
+        return primary  # DuckDuckGo unavailable: nothing to hedge with
+    
+    key = (f"hedged:{name}", key_fingerprint(api_key))
+    with _providers_lock:
+        hedged = _providers.get(key)
+        if hedged is None or hedged.primary is not primary or hedged.secondary is not secondary:
+            hedged = HedgedProvider(primary, secondary, hedge_delay)
+            _store_provider(key, hedged)
+        else:
+            _providers.move_to_end(key)
+        return hedged
+
+
+def provider_stats() -> List[Dict[str, Any]]:
+    """Counters and latencies of every provider created so far."""
+    with _providers_lock:
+        items = list(_providers.items())
+    return [{"provider": name, **provider.stats()} for (name, _), provider in items]
+
+
+async def close_search_providers() -> None:
+    """Close pooled provider connections (call on application shutdown)."""
+    with _providers_lock:
+        providers = list(_providers.values())
+        _providers.clear()
+    for provider in providers:
+        provider.close()
+        await provider.aclose()